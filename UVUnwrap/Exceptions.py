@@ -1,5 +1,3 @@
-import FreeCAD as App
-
 # UVUnwrap exception base classes
 class UVUnwrapException( Exception ):
     pass
@@ -13,6 +11,12 @@ class RepeatedFaceWarning( UVUnwrapWarning ):
     pass
 class RepeatedEdgeWarning( UVUnwrapWarning ):
     pass
+class ConvergenceWarning( UVUnwrapWarning ):
+    pass
+class DegenerateTriangleWarning( UVUnwrapWarning ):
+    pass
+class FuseFallbackWarning( UVUnwrapWarning ):
+    pass
 
 class UnderconstrainedMeshException( UVUnwrapException ):
     pass
@@ -22,6 +26,9 @@ class InvalidSelectionException( UVUnwrapException ):
     pass
 class LargeMeshException( UVUnwrapException ):
     pass
+class DegenerateMeshException( UVUnwrapException ):
+    pass
 
 def warn(warning):
+    import FreeCAD as App # Only imported once a warning is reported, such that the array based modules (and their tests) do not depend on FreeCAD
     App.Console.PrintWarning(f"{warning.__class__.__name__}: {', '.join(warning.args)}\n")
@@ -13,7 +13,7 @@ class UVUnwrap(Workbench):
         import UVUlib
 
         meshing_commands = ["UVU_meshify"]
-        unwrapping_commands = ["UVU_unwrapPlane", "UVU_unwrapLSCM", "UVU_pinFeature"]
+        unwrapping_commands = ["UVU_unwrapPlane", "UVU_unwrapCylinder", "UVU_unwrapSphere", "UVU_unwrapTorus", "UVU_unwrapLSCM", "UVU_unwrapSCP", "UVU_pinFeature"]
         packing_commands = ["UVU_manualPacking", "UVU_multiPacking"]
         selection_commands = ["UVU_printSelection_shape", "UVU_printSelection_face", "UVU_printSelection_edge", "UVU_printSelection_vertex", "UVU_printSelection_any"]
         export_commands = ["UVU_export"]
@@ -23,9 +23,9 @@ def get_shape_selection(implicit: bool = True, resolve: bool = False):
                     yield from resolve_subfeatures_shape(feature)
                 else:
                     yield feature
-        # If object is a mesh:
+        # If object is a mesh, it is always included as a whole:
         elif sel.Object.isDerivedFrom("Mesh::Feature"):
-            App.Console.PrintWarning( NotImplementedError("Mesh selection is not yet implemented") )
+            yield (*feature[:2], "")
 
 def get_face_selection(implicit: bool = True, resolve: bool = False):
     for sel in Gui.Selection.getCompleteSelection():
@@ -38,9 +38,9 @@ def get_face_selection(implicit: bool = True, resolve: bool = False):
                     yield from resolve_subfeatures_face(feature)
                 else:
                     yield feature
-        # If object is a mesh:
+        # If object is a mesh, it is always included as a whole:
         elif sel.Object.isDerivedFrom("Mesh::Feature"):
-            App.Console.PrintWarning( NotImplementedError("Mesh selection is not yet implemented") )
+            yield (*feature[:2], "")
 
 def get_edge_selection(implicit: bool = True, resolve: bool = False):
     for sel in Gui.Selection.getCompleteSelection():
@@ -53,9 +53,7 @@ def get_edge_selection(implicit: bool = True, resolve: bool = False):
                     yield from resolve_subfeatures_edge(feature)
                 else:
                     yield feature
-        # If object is a mesh:
-        elif sel.Object.isDerivedFrom("Mesh::Feature"):
-            App.Console.PrintWarning( NotImplementedError("Mesh selection is not yet implemented") )
+        # Mesh objects do not contain any (topological) edges, and are thus never included.
 
 def get_vertex_selection(implicit: bool = True, resolve: bool = False):
     for sel in Gui.Selection.getCompleteSelection():
@@ -68,9 +66,7 @@ def get_vertex_selection(implicit: bool = True, resolve: bool = False):
                     yield from resolve_subfeatures_vertex(feature)
                 else:
                     yield feature
-        # If object is a mesh:
-        elif sel.Object.isDerivedFrom("Mesh::Feature"):
-            App.Console.PrintWarning( NotImplementedError("Mesh selection is not yet implemented") )
+        # Mesh objects do not contain any (topological) vertices, and are thus never included.
 
 def get_feature_selection():
     """
@@ -98,11 +94,19 @@ def has_vertex_selection(implicit: bool = True):
 # ==========================< Feature type checking >===========================
 # The following functions test if the given feature has subfeatures of the
 # specified type
+def feature_is_mesh(feature) -> bool:
+    """
+    Whether the feature belongs to a mesh object (Mesh::Feature) rather than to a shape.
+    Mesh objects are always handled as a whole, regardless of the selected facet(s).
+    """
+    obj = App.getDocument(feature[0]).getObject(feature[1])
+    return obj is not None and obj.isDerivedFrom("Mesh::Feature")
+
 def feature_has_shape(feature, implicit: bool = True):
-    return any(get_feature_shapes(feature, implicit))
+    return feature_is_mesh(feature) or any(get_feature_shapes(feature, implicit))
 
 def feature_has_face(feature, implicit: bool = True):
-    return any(get_feature_faces(feature, implicit))
+    return feature_is_mesh(feature) or any(get_feature_faces(feature, implicit))
 
 def feature_has_edge(feature, implicit: bool = True):
     return any(get_feature_edges(feature, implicit))
@@ -115,22 +119,30 @@ def feature_has_vertex(feature, implicit: bool = True):
 # user selection to be re-interpreted into its TopoShape contents of the
 # specific type.
 def get_feature_shapes(feature, implicit: bool = True):
+    if feature_is_mesh(feature):
+        return
     obj = App.getDocument(feature[0]).getObject(feature[1])
     # Yield only if the feature is either a Shape (feature[2] == ""), or if implicit is enabled
     if not feature[2] or implicit:
         yield obj.Shape
 
 def get_feature_faces(feature, implicit: bool = True):
+    if feature_is_mesh(feature):
+        return
     obj = App.getDocument(feature[0]).getObject(feature[1]).getSubObject(feature[2])
     if obj.ShapeType == "Face" or implicit:
         yield from obj.Faces
 
 def get_feature_edges(feature, implicit: bool = True):
+    if feature_is_mesh(feature):
+        return
     obj = App.getDocument(feature[0]).getObject(feature[1]).getSubObject(feature[2])
     if obj.ShapeType == "Edge" or implicit:
         yield from obj.Edges
 
 def get_feature_vertices(feature, implicit: bool = True):
+    if feature_is_mesh(feature):
+        return
     obj = App.getDocument(feature[0]).getObject(feature[1]).getSubObject(feature[2])
     if obj.ShapeType == "Vertex" or implicit:
         yield from obj.Vertexes
@@ -162,6 +174,9 @@ feature_to_obj = get_feature
 def resolve_subfeatures_shape(feature, implicit: bool = True):
     if feature is None:
         return
+    elif feature_is_mesh(feature):
+        yield (feature[0], feature[1], '')
+        return
     obj = App.getDocument(feature[0]).getObject(feature[1])
     # Yield only if the feature is either a Shape (feature[2] == ""), or if implicit is enabled
     if not feature[2] or implicit:
@@ -170,21 +185,26 @@ def resolve_subfeatures_shape(feature, implicit: bool = True):
 def resolve_subfeatures_face(feature, implicit: bool = True):
     if feature is None:
         return
+    # A mesh object is always included as a whole
+    elif feature_is_mesh(feature):
+        yield (feature[0], feature[1], '')
+        return
     obj = App.getDocument(feature[0]).getObject(feature[1]).getSubObject(feature[2])
     if obj.ShapeType == "Face":
         yield feature
-    elif obj.ShapeType == "Solid" and implicit:
+    # For a shape, all faces may be yielded without needing to do an inclusion check
+    elif (obj.ShapeType == "Solid" or not feature[2]) and implicit:
         for i in range(1, 1 + len(obj.Faces)):
             yield (feature[0], feature[1], f"Face{i}")
 
 def resolve_subfeatures_edge(feature, implicit: bool = True):
-    if feature is None:
+    if feature is None or feature_is_mesh(feature):
         return
     obj = App.getDocument(feature[0]).getObject(feature[1]).getSubObject(feature[2])
     if obj.ShapeType == "Edge":
         yield feature
     # For a shape, all edges may be yielded without needing to do an inclusion check
-    elif obj.ShapeType == "Solid" and implicit:
+    elif (obj.ShapeType == "Solid" or not feature[2]) and implicit:
         for i in range(1, 1 + len(obj.Edges)):
             yield (feature[0], feature[1], f"Edge{i}")
     # If a face is selected, only yield the edges which are actually included in that shape
@@ -198,7 +218,7 @@ def resolve_subfeatures_edge(feature, implicit: bool = True):
                 yield (feature[0], feature[1], f"Edge{i}")
 
 def resolve_subfeatures_vertex(feature, implicit: bool = True):
-    if feature is None:
+    if feature is None or feature_is_mesh(feature):
         return
     obj = App.getDocument(feature[0]).getObject(feature[1]).getSubObject(feature[2])
     if obj.ShapeType == "Vertex":
@@ -316,6 +336,14 @@ def get_axis(obj):
     elif obj.isDerivedFrom("App::Line"):
         return obj.Placement.Matrix.col(0)
 
+# ===============================< Preferences >================================
+def lazy_restore() -> bool:
+    """
+    Whether restored objects should defer their recompute until their data is first used, rather than recomputing while the document is opened.
+    Can be disabled using the LazyRestore parameter in User parameter:BaseApp/Preferences/Mod/UVUnwrap.
+    """
+    return App.ParamGet("User parameter:BaseApp/Preferences/Mod/UVUnwrap").GetBool("LazyRestore", True)
+
 # ==================================< Layout >==================================
 def get_layout_transform(layout: tuple[float], chained: bool = True) -> np.ndarray[np.float64]:
     """
@@ -329,3 +357,10 @@ def get_layout_transform(layout: tuple[float], chained: bool = True) -> np.ndarr
     if chained:
         transform.append([0, 0, 1])
     return np.array(transform, dtype = np.float64)
+
+def transform_points(transform: np.ndarray[np.float64], points: np.ndarray[np.float64]) -> np.ndarray[np.float64]:
+    """
+    Applies a (chained or non-chained) layout transform, as generated by get_layout_transform, to all (N, 2) points at once.
+    """
+    points = np.asarray(points, dtype = np.float64).reshape((-1, 2))
+    return points @ transform[:2, :2].T + transform[:2, 2]
@@ -7,12 +7,15 @@ import FreeCADGui as Gui
 import UVUlib
 import dialogs
 
+# The projections onto surfaces of revolution share the icon of the planar projection
+projection_methods = ["Cylinder", "Sphere", "Torus"]
+
 class UVU_com_unwrap():
     def __init__(self, method: str):
         self.method = method
     def GetResources(self):
         return {
-            "Pixmap": os.path.join(UVUlib.path_icons, f"UVMesh{self.method}.svg"),
+            "Pixmap": os.path.join(UVUlib.path_icons, f"UVMesh{self.method if self.method not in projection_methods else 'Plane'}.svg"),
             "MenuText": f"Unwrap {self.method}",
             "ToolTip": f"Unwraps the given FaceMesh to UV coordinates using the given method: {self.method}",
         }
@@ -24,8 +27,16 @@ class UVU_com_unwrap():
         selection = UVUlib.get_feature_selection()
         if self.method == "LSCM":
             taskDialog = dialogs.UnwrapDialogLSCM()
+        elif self.method == "SCP":
+            taskDialog = dialogs.UnwrapDialogSCP()
         elif self.method == "Plane":
             taskDialog = dialogs.UnwrapDialogPlane()
+        elif self.method == "Cylinder":
+            taskDialog = dialogs.UnwrapDialogCylinder()
+        elif self.method == "Sphere":
+            taskDialog = dialogs.UnwrapDialogSphere()
+        elif self.method == "Torus":
+            taskDialog = dialogs.UnwrapDialogTorus()
         else:
             App.Console.PrintCritical("Invalid unwrapping method selected. This shouldn't have happened.")
             return
@@ -34,4 +45,8 @@ class UVU_com_unwrap():
         Gui.Control.showDialog(taskDialog)
 
 Gui.addCommand("UVU_unwrapLSCM", UVU_com_unwrap("LSCM"))
+Gui.addCommand("UVU_unwrapSCP", UVU_com_unwrap("SCP"))
 Gui.addCommand("UVU_unwrapPlane", UVU_com_unwrap("Plane"))
+Gui.addCommand("UVU_unwrapCylinder", UVU_com_unwrap("Cylinder"))
+Gui.addCommand("UVU_unwrapSphere", UVU_com_unwrap("Sphere"))
+Gui.addCommand("UVU_unwrapTorus", UVU_com_unwrap("Torus"))
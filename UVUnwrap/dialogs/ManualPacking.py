@@ -2,6 +2,7 @@
 import os
 import FreeCAD as App
 import FreeCADGui as Gui
+import numpy as np
 
 # Local module imports
 import UVUlib
@@ -105,12 +106,14 @@ class ManualPackingDialog():
         """
         if self.active_index is not None:
             coords = UVUlib.get_feature(self.uvMeshes[self.active_index]).Proxy.uv
-            transform = UVUlib.get_layout_transform(self.active_layout)
-            coords = [transform @ (*coord, 1) for coord in coords] or [(0, 0)]
-            self.form.Min_u.setValue(min(i[0] for i in coords))
-            self.form.Min_v.setValue(min(i[1] for i in coords))
-            self.form.Max_u.setValue(max(i[0] for i in coords))
-            self.form.Max_v.setValue(max(i[1] for i in coords))
+            coords = UVUlib.transform_points(UVUlib.get_layout_transform(self.active_layout), coords)
+            if not len(coords):
+                coords = np.zeros((1, 2))
+            (min_u, min_v), (max_u, max_v) = coords.min(axis = 0).tolist(), coords.max(axis = 0).tolist()
+            self.form.Min_u.setValue(min_u)
+            self.form.Min_v.setValue(min_v)
+            self.form.Max_u.setValue(max_u)
+            self.form.Max_v.setValue(max_v)
         else:
             self.form.Min_u.setValue(0)
             self.form.Min_v.setValue(0)
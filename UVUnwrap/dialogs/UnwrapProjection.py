@@ -0,0 +1,84 @@
+# Official module imports
+import os
+import FreeCAD as App
+import FreeCADGui as Gui
+
+# Local module imports
+import UVUlib
+from .UnwrapDialog import unwrapDialog
+from unwrapping import UVMeshProjection
+
+class UnwrapDialogProjection(unwrapDialog):
+    method = None # The surface the mesh is projected on, set by the derived classes
+    def __init__(self, uvMesh = None):
+        super().__init__(uvMesh)
+        self.form = Gui.PySideUic.loadUi(os.path.join(UVUlib.path_ui, "UVMesh_projection.ui"))
+        self.form.FaceMesh_select.toggled.connect(lambda enabled: self.toggle_select(enabled, 1))
+        self.form.Ref_select.toggled.connect(lambda enabled: self.toggle_select(enabled, 2))
+        self.form.Ref_manual.toggled.connect(self.set_manual)
+        self.set_manual(True)
+
+        self.toggles = ["FaceMesh", "Ref"]
+        self.toggle_texts = ["FaceMesh", "Plane / Line / Axis"]
+
+        if uvMesh is not None:
+            self.form.FaceMesh_textbox.setText(UVUlib.link_to_string(uvMesh.Source))
+            self.form.Ref_textbox.setText(UVUlib.link_to_string(uvMesh.ReferenceLink))
+
+            self.form.Ref_manual.setChecked(uvMesh.Manual)
+            self.set_manual(uvMesh.Manual)
+
+            self.form.X.setValue(uvMesh.ReferenceVec.x)
+            self.form.Y.setValue(uvMesh.ReferenceVec.y)
+            self.form.Z.setValue(uvMesh.ReferenceVec.z)
+            self.form.X_center.setValue(uvMesh.Center.x)
+            self.form.Y_center.setValue(uvMesh.Center.y)
+            self.form.Z_center.setValue(uvMesh.Center.z)
+
+    def set_manual(self, enabled):
+        if self.selection_mode == 2:
+            self.toggle_select(False, 2)
+        self.form.Ref_select.setEnabled(not enabled)
+        self.form.Ref_textbox.setEnabled(not enabled)
+        for name in ["X", "Y", "Z", "X_center", "Y_center", "Z_center"]:
+            self.form.__getattribute__(f"{name}_label").setEnabled(enabled)
+            self.form.__getattribute__(name).setEnabled(enabled)
+
+    def accept(self):
+        params = (
+            UVUlib.string_to_feature(self.form.FaceMesh_textbox.text()),
+
+            self.form.Ref_manual.isChecked(),
+            UVUlib.string_to_feature(self.form.Ref_textbox.text()),
+            App.Base.Vector(self.form.X.value(), self.form.Y.value(), self.form.Z.value()),
+            App.Base.Vector(self.form.X_center.value(), self.form.Y_center.value(), self.form.Z_center.value()),
+            )
+        # Try to create an object. If it fails due to an invalid value, don't close the dialog. The message will be provided by the creation function.
+        try:
+            if self.uvMesh is None:
+                UVMeshProjection.make_UVMeshProjection(self.method, *params)
+            else:
+                UVMeshProjection.update_UVMeshProjection(self.uvMesh, *params)
+        except ValueError:
+            return False
+
+        self.close()
+
+    def allow(self, *feature):
+        if self.selection_mode <= 1:
+            return super().allow(*feature)
+        elif self.selection_mode <= 2:
+            return feature[1].isDerivedFrom("PartDesign::Plane") or \
+                   feature[1].isDerivedFrom("PartDesign::Line") or \
+                   feature[1].isDerivedFrom("PartDesign::CoordinateSystem") or \
+                   feature[1].isDerivedFrom("App::Plane") or \
+                   feature[1].isDerivedFrom("App::Line")
+
+class UnwrapDialogCylinder(UnwrapDialogProjection):
+    method = "Cylinder"
+
+class UnwrapDialogSphere(UnwrapDialogProjection):
+    method = "Sphere"
+
+class UnwrapDialogTorus(UnwrapDialogProjection):
+    method = "Torus"
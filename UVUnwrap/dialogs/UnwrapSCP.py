@@ -0,0 +1,35 @@
+# Official module imports
+import os
+import FreeCAD as App
+import FreeCADGui as Gui
+
+# Local module imports
+import UVUlib
+from .UnwrapDialog import unwrapDialog
+from unwrapping import UVMeshSCP
+
+class UnwrapDialogSCP(unwrapDialog):
+    def __init__(self, uvMesh = None):
+        super().__init__(uvMesh)
+        self.form = Gui.PySideUic.loadUi(os.path.join(UVUlib.path_ui, "UVMesh_scp.ui"))
+        self.form.FaceMesh_select.toggled.connect(lambda enabled: self.toggle_select(enabled, 1))
+
+        self.toggles = ["FaceMesh"]
+        self.toggle_texts = ["FaceMesh"]
+
+        if uvMesh is not None:
+            self.form.FaceMesh_textbox.setText(UVUlib.link_to_string(uvMesh.Source))
+
+    def accept(self):
+        faceMesh = UVUlib.string_to_feature(self.form.FaceMesh_textbox.text())
+
+        # Try to create an object. If it fails due to an invalid value, don't close the dialog. The message will be provided by the creation function.
+        try:
+            if self.uvMesh is None:
+                UVMeshSCP.make_UVMeshSCP(faceMesh)
+            else:
+                UVMeshSCP.update_UVMeshSCP(self.uvMesh, faceMesh)
+        except ValueError:
+            return False
+
+        self.close()
@@ -7,6 +7,8 @@ from .FaceMesh import FaceMeshDialog
 # Unwrapping
 from .UnwrapPlane import UnwrapDialogPlane
 from .UnwrapLSCM import UnwrapDialogLSCM
+from .UnwrapSCP import UnwrapDialogSCP
+from .UnwrapProjection import UnwrapDialogCylinder, UnwrapDialogSphere, UnwrapDialogTorus
 from .UVPin import UVPinDialog
 
 # Packing
@@ -12,21 +12,20 @@ def export_obj(packing, filename: str, precision = 5):
         f.write("# Generated by the UV Unwrapping workbench for FreeCAD\n")
         for uvMesh, transform in packing.Proxy.transforms.items():
             uvMesh = UVUlib.get_feature(uvMesh)
-            for vertex in uvMesh.Proxy.vertices:
+            for vertex in uvMesh.Proxy.vertex_array.tolist():
                 f.write(f"v {vertex[0]} {vertex[1]} {vertex[2]}\n")
-            for uv in uvMesh.Proxy.uv:
-                uv = transform @ (*uv, 1)
+            for uv in UVUlib.transform_points(transform, uvMesh.Proxy.uv).tolist():
                 f.write(f"vt {uv[0]} {uv[1]}\n")
-            for triangle in uvMesh.Proxy.triangles:
+            for triangle in uvMesh.Proxy.triangle_array.tolist():
                 f.write(f"f {triangle[0]+1+index_offset}/{triangle[0]+1+index_offset} {triangle[1]+1+index_offset}/{triangle[1]+1+index_offset} {triangle[2]+1+index_offset}/{triangle[2]+1+index_offset}\n")
-            index_offset += len(uvMesh.Proxy.vertices)
+            index_offset += len(uvMesh.Proxy.vertex_array)
 
 
 def export_faceMesh_obj(faceMesh, filename: str):
     index_offset = 0
     with open(filename, "w") as f:
         f.write("# Generated by the UV Unwrapping workbench for FreeCAD\n")
-        for vertex in faceMesh.Proxy.vertices:
+        for vertex in faceMesh.Proxy.vertex_array.tolist():
             f.write(f"v {vertex[0]} {vertex[1]} {vertex[2]}\n")
-        for triangle in faceMesh.Proxy.triangles:
+        for triangle in faceMesh.Proxy.triangle_array.tolist():
             f.write(f"f {triangle[0]+1+index_offset} {triangle[1]+1+index_offset} {triangle[2]+1+index_offset}\n")
@@ -17,7 +17,7 @@ def export_svg(packing, filename: str, precision = 5):
             uvMesh = UVUlib.get_feature(uvMesh)
             f.write(f'  <g fill="none" stroke="{colour}" stroke-linecap="round" stroke-linejoin="round">\n')
             for edge, is_internal in uvMesh.Proxy.draw_edges:
-                f.write(f'    <path d="M {" L ".join(f"{u * packing.Resolution[0]:.{precision}f},{v * packing.Resolution[1]:.{precision}f}" for u, v in map(lambda uv: transform @ [*uv, 1], edge))}" stroke-dasharray="{"1,2" if is_internal else "none"}"/>\n')
+                f.write(f'    <path d="M {" L ".join(f"{u * packing.Resolution[0]:.{precision}f},{v * packing.Resolution[1]:.{precision}f}" for u, v in UVUlib.transform_points(transform, edge).tolist())}" stroke-dasharray="{"1,2" if is_internal else "none"}"/>\n')
             f.write(f'  </g>\n')
 
         f.write('</svg>\n')
@@ -8,20 +8,72 @@ __all__ = ["make_FaceMesh", "FaceMesh"]
 
 # Official module imports
 from functools import cached_property
+from collections import namedtuple
+import itertools
+import hashlib
 import os
 import math
+import numpy as np
 import scipy as sp
 import FreeCAD as App
 import FreeCADGui as Gui
-import MeshPart
+import Part
 
 # Local module imports
 import UVUlib
 from Exceptions import *
 import dialogs
-from .fuse_edge import fuse_edge
-from .unlink_edge_nodes import unlink_edge_nodes
+from .fuse_edge import get_edge_fuse_pairs, merge_vertices
+from . import mesh_cache
+from . import mesh_file
+from . import tessellation
+from .charts import segment_charts, split_charts
+from .utils import ShapeSet
+from .topology import MeshTopology
+
+# A session-wide counter, used to give every generated mesh a unique revision number
+_revision_counter = itertools.count()
+
+# The tessellation of a single face.
+# face: The TopoShape face
+# vertices: (N, 3) np.ndarray - The vertex positions
+# triangles: (T, 3) np.ndarray - The (block local) vertex indices of every triangle
+# bounds: (2, 3) np.ndarray - The bounding box of the vertices in the form [[x_min, y_min, z_min], [x_max, y_max, z_max]]
+FaceBlock = namedtuple("FaceBlock", ["face", "vertices", "triangles", "bounds"])
+
+def make_face_block(face: "OCCT::Face", vertices: np.ndarray[np.float64], triangles: np.ndarray[np.int32]) -> FaceBlock:
+    if len(vertices):
+        bounds = np.array([vertices.min(axis = 0), vertices.max(axis = 0)])
+    else:
+        bounds = np.array([[math.inf] * 3, [-math.inf] * 3])
+    return FaceBlock(face, vertices, triangles, bounds)
+
+def mesh_digest(vertices: np.ndarray[np.float64], triangles: np.ndarray[np.int32]) -> str:
+    return hashlib.sha256(vertices.tobytes() + triangles.tobytes()).hexdigest()
+
+def body_signature(obj):
+    """
+    Returns an identifier of the current geometry of the given body, which can be compared using same_body.
+    For a shape, this is the Shape itself, since it is only the same shape if it was not modified. For a mesh object, this is a digest of its points and facets.
+    """
+    if obj.isDerivedFrom("Mesh::Feature"):
+        return mesh_digest(*tessellation.mesh_arrays(obj.Mesh))
+    return obj.Shape
 
+def same_body(obj, signature) -> bool:
+    """
+    Whether the geometry of the given body is unchanged since its signature was generated.
+    """
+    if isinstance(signature, str):
+        return body_signature(obj) == signature
+    return not obj.isDerivedFrom("Mesh::Feature") and obj.Shape.isSame(signature)
+
+# The vertex pairs fused along a single edge, stored relative to the face blocks such that these remain valid if other blocks are added or removed.
+# overlap: frozenset - The keys of all face blocks whose bounding box touched the edge when the pairs were determined
+# keys: tuple - The keys of the face blocks that are referenced by the pairs
+# blocks: (P, 2) np.ndarray - The index in keys of the face block of both vertices of every pair
+# vertices: (P, 2) np.ndarray - The (block local) vertex index of both vertices of every pair
+EdgeRecord = namedtuple("EdgeRecord", ["overlap", "keys", "blocks", "vertices"])
 
 class FaceMesh():
     """
@@ -40,21 +92,75 @@ class FaceMesh():
         obj.addProperty("App::PropertyFloat", "LinearDeflection", "Meshing", "The maximum linear deflection of the generated mesh").LinearDeflection = linearDeflection
         obj.addProperty("App::PropertyFloat", "AngularDeflection", "Meshing", "The maximum linear deflection of the generated mesh").AngularDeflection = angularDeflection
         obj.addProperty("App::PropertyBool", "RelativeDeflection", "Meshing", "Whether the linear deflection value is relative to the respective edge length").RelativeDeflection = relativeDeflection
-        obj.addProperty("App::PropertyBool", "CheckDuplicate", "Meshing", "Whether the FaceMesh should detect duplicated faces and edges in the selection during meshing. Disabling this can give a slight performance improvement.").CheckDuplicate = True
+        obj.addProperty("App::PropertyBool", "CheckDuplicate", "Meshing", "Whether the FaceMesh should detect duplicated faces and edges in the selection during meshing, such that these are only included once.").CheckDuplicate = True
+        self.add_cache_properties(obj)
+        self.add_parallel_properties(obj)
+        self.add_mesh_properties(obj)
+        self.add_segmentation_properties(obj)
+        self.add_fuse_properties(obj)
+        self.add_persistence_properties(obj)
         self.init()
         self.set_selection(faces, edges)
 
+    def add_cache_properties(self, obj):
+        obj.addProperty("App::PropertyBool", "UseCache", "Meshing", "Whether the generated mesh should be stored in (and when possible, loaded from) the persistent mesh cache, skipping the meshing of unchanged geometry.").UseCache = True
+
+    def add_parallel_properties(self, obj):
+        obj.addProperty("App::PropertyBool", "ParallelMeshing", "Meshing", "Whether the faces of different bodies should be meshed in parallel worker processes. Only has an effect if multiple bodies need to be meshed.").ParallelMeshing = False
+
+    def add_mesh_properties(self, obj):
+        obj.addProperty("App::PropertyFloat", "WeldTolerance", "Meshing", "The distance within which the vertices of included mesh objects are welded together").WeldTolerance = 1e-3
+
+    def add_fuse_properties(self, obj):
+        obj.addProperty("App::PropertyEnumeration", "FuseMethod", "Meshing", "The method used to find the mesh vertices to be fused at the selected edges. Topology: Pairs the vertices by their order along the edge, which is exact, falling back to Geometry where the faces on either side of an edge are not discretised consistently. Geometry: Pairs all vertices that coincide within a fixed tolerance.")
+        obj.FuseMethod = ["Topology", "Geometry"]
+        obj.FuseMethod = "Topology"
+
+    def add_persistence_properties(self, obj):
+        obj.addProperty("App::PropertyBool", "SaveMesh", "Main", "Determines whether the mesh data should be included in the save file, such that it does not need to be regenerated when the document is opened").SaveMesh = True
+        obj.addProperty("App::PropertyFileIncluded", "MeshData", "Main", "The mesh data stored in the save file", 4 | 8) # Hidden, and does not touch the object when changed
+
+    def add_segmentation_properties(self, obj):
+        obj.addProperty("App::PropertyBool", "AutoSegment", "Segmentation", "Whether the mesh should automatically be segmented into disk-like charts. If enabled, all included faces are first fused together, after which the mesh is split into charts.").AutoSegment = False
+        obj.addProperty("App::PropertyAngle", "FeatureAngle", "Segmentation", "The dihedral angle above which an edge is always used as a chart boundary").FeatureAngle = 45.
+        obj.addProperty("App::PropertyAngle", "MaxChartAngle", "Segmentation", "The maximum angle between the normal of any triangle in a chart and the mean normal of that chart. Limits the distortion of the unwrapped charts.").MaxChartAngle = 60.
+
     def init(self):
         """
         A function that initiates all relevant variables with empty / placeholder values.
         """
         # Book-keeping data:
-        self.topo_faces = [] # A list of the TopoShape faces included in the mesh. Useful to limit the required recomputations by preventing repeated faces through indirect selections.
-        self.topo_edges = [] # A list of the TopoShape edges included in the mesh. Useful to limit the required recomputations by preventing repeated edges through indirect selections.
+        self.topo_faces = ShapeSet() # The TopoShape faces included in the mesh. Useful to limit the required recomputations by preventing repeated faces through indirect selections.
+        self.topo_edges = ShapeSet() # The TopoShape edges included in the mesh. Useful to limit the required recomputations by preventing repeated edges through indirect selections.
+
+        # Incremental recompute data. Only the face blocks / edge records which are affected by a change are regenerated during a recompute.
+        self.face_blocks = {} # The FaceBlock of every meshed face, keyed by its face feature.
+        self.edge_records = {} # The EdgeRecord of every fused edge, keyed by its edge feature.
+        self.body_signatures = {} # The signature (see body_signature) of every body at the time its face blocks / edge records were generated, keyed by the body feature.
+        self.record_params = None # The mesh parameters used to generate the face blocks.
+        self.feature_digests = {} # The body signature and geometry digest (see mesh_cache.feature_digest) of every selected feature, keyed by the feature. Only re-generated once the body changes.
 
         # Mesh data:
-        self.vertices: list[App.Base.Vector] = []
-        self.triangles: list[tuple[int]] = []
+        self.set_mesh(np.empty((0, 3), dtype = np.float64), np.empty((0, 3), dtype = np.int32))
+        self.restore_pending = False # Whether the mesh data stored in the document still needs to be loaded
+
+    def set_mesh(self, vertices: np.ndarray[np.float64], triangles: np.ndarray[np.int32], fused_edges: np.ndarray[np.int32] = None):
+        """
+        Replaces the stored mesh data.
+
+        vertices: (N, 3) array_like - The vertex positions
+        triangles: (T, 3) array_like - The vertex indices of every triangle
+        fused_edges: (F, 2) array_like - The mesh edges along which faces were fused together
+        """
+        self._vertex_array = np.ascontiguousarray(vertices, dtype = np.float64).reshape((-1, 3))
+        self._triangle_array = np.ascontiguousarray(triangles, dtype = np.int32).reshape((-1, 3))
+        self._fused_edge_array = np.ascontiguousarray(fused_edges if fused_edges is not None else (), dtype = np.int32).reshape((-1, 2))
+        # The list based views of the mesh data, which are only generated when first requested
+        self._vertices = None
+        self._triangles = None
+        self._topology = None
+        # A unique identifier for the current mesh data, which is updated whenever the mesh data changes. Allows any derived data (e.g. solver factorisations) to be cached.
+        self.revision = next(_revision_counter)
 
     def set_selection(self, faces: list[tuple[str]], edges: list[tuple[str]]):
         # TODO: Cleanup
@@ -72,35 +178,219 @@ class FaceMesh():
         self.edges.clear()
         self.topo_faces.clear()
         self.topo_edges.clear()
-        self.vertices.clear()
-        self.triangles.clear()
+        self.set_mesh(np.empty((0, 3), dtype = np.float64), np.empty((0, 3), dtype = np.int32))
 
     def execute(self, obj = None):
         """
         Recomputes the mesh created by / stored in this object.
+
+        Only the faces and edges which are affected by a change since the previous recompute are re-meshed and re-fused. All other face blocks and edge records are reused.
         """
-        # Clear the data of the previous recompute
-        self.clear()
-        # Recompute the mesh
-        bodies = {UVUlib.link_to_feature(face[0]) for face in self.obj.Faces}
-        for body in bodies:
-            if not self.obj.ManualMeshParams:
-                MeshPart.meshFromShape(UVUlib.get_feature(body).Shape)
-            else:
-                MeshPart.meshFromShape(
-                    Shape = UVUlib.get_feature(body).Shape,
-                    LinearDeflection = self.obj.LinearDeflection,
-                    AngularDeflection = math.radians(self.obj.AngularDeflection),
-                    Relative = self.obj.RelativeDeflection
-                    )
+        self.restore_pending = False
+        self.topo_faces.clear()
+        self.topo_edges.clear()
+        self.invalidate_records()
+        face_keys, edge_keys = self.selection_keys()
+
+        # If nothing can be reused, but the same mesh was generated before, load it from the cache instead
+        checksum = self.mesh_checksum(face_keys, edge_keys) if self.obj.UseCache or self.obj.SaveMesh else None
+        cache_key = checksum if self.obj.UseCache else None
+        if not self.face_blocks and cache_key is not None and (mesh := mesh_cache.load(cache_key)) is not None:
+            vertices, triangles, fused_edges, records = mesh
+            self.add_topo_shapes(face_keys, edge_keys)
+            self.set_mesh(vertices, triangles, fused_edges)
+            # Restores the face blocks and edge records, such that the next change only re-meshes the affected faces
+            if records is not None:
+                self.load_records(records, face_keys, edge_keys)
+            self.store_mesh(checksum)
+            return
 
         # Update the FaceMesh object
-        for feature in self.faces:
-            for face in UVUlib.get_feature_faces(feature, implicit = True):
-                self._add_face(face)
-        for feature in self.edges:
-            for edge in UVUlib.get_feature_edges(feature, implicit = True):
-                self._add_edge(edge)
+        rebuilt = self.update_face_blocks(face_keys)
+        blocks = [key for key in face_keys if self.face_blocks[key].face is None or self._add_topo_face(self.face_blocks[key].face)]
+        offsets = self.assemble_faces(blocks)
+        # Fuse the mesh at all edges in a single pass
+        self.fuse_edges(edge_keys, offsets, rebuilt)
+        if self.obj.AutoSegment:
+            self.segment()
+
+        if cache_key is not None:
+            mesh_cache.store(cache_key, self.vertex_array, self.triangle_array, self.fused_edge_array, self.record_arrays())
+        self.store_mesh(checksum)
+
+    def selection_keys(self) -> tuple[list[tuple[str]]]:
+        """
+        Resolves the selected faces and edges into the individual (unique) face and edge features.
+        """
+        face_keys = [*dict.fromkeys(key for feature in self.faces for key in UVUlib.resolve_subfeatures_face(feature))]
+        edge_keys = [*dict.fromkeys(key for feature in self.edges for key in UVUlib.resolve_subfeatures_edge(feature))]
+        return face_keys, edge_keys
+
+    def add_topo_shapes(self, face_keys: list[tuple[str]], edge_keys: list[tuple[str]]):
+        """
+        Adds the toposhapes of the given features to the book-keeping data, for mesh data that was loaded rather than generated.
+        """
+        for key in face_keys:
+            if not UVUlib.feature_is_mesh(key):
+                self._add_topo_face(UVUlib.get_feature(key))
+        for key in edge_keys:
+            self._add_topo_edge(UVUlib.get_feature(key))
+
+    def store_mesh(self, checksum: str):
+        """
+        Stores the mesh data in the document, or removes it if the mesh should not be saved.
+        """
+        if self.obj.SaveMesh:
+            mesh_file.write(self.obj, "MeshData", checksum, vertices = self._vertex_array, triangles = self._triangle_array, fused_edges = self._fused_edge_array)
+        else:
+            mesh_file.clear(self.obj, "MeshData")
+
+    def restore_mesh(self):
+        """
+        Loads the mesh data stored in the document. If the stored data is missing, or was generated from different inputs than the current ones, the mesh is recomputed instead.
+        Called when the mesh data of a restored object is first used.
+        """
+        self.restore_pending = False
+        mesh = mesh_file.read(self.obj, "MeshData", self.checksum)
+        if mesh is None:
+            self.execute()
+            self.obj.purgeTouched() # The deferred recompute is done
+            return
+        self.add_topo_shapes(*self.selection_keys())
+        self.set_mesh(mesh["vertices"], mesh["triangles"], mesh["fused_edges"])
+
+    def record_arrays(self) -> dict[str, np.ndarray]:
+        """
+        Packs the face blocks and edge records into flat arrays, such that these can be stored in the mesh cache.
+        The features are stored without their document name, like in the cache key. Face blocks / edge records are referenced by their index in block_keys.
+        """
+        block_keys = [*self.face_blocks]
+        block_index = {key: i for i, key in enumerate(block_keys)}
+        blocks = [self.face_blocks[key] for key in block_keys]
+        records = [*self.edge_records.values()]
+        return {
+            "block_keys": np.array([key[1:] for key in block_keys], dtype = str).reshape((-1, 2)),
+            "block_sizes": np.array([(len(block.vertices), len(block.triangles)) for block in blocks], dtype = np.intp).reshape((-1, 2)),
+            "block_vertices": np.concatenate([np.empty((0, 3), dtype = np.float64), *(block.vertices for block in blocks)]),
+            "block_triangles": np.concatenate([np.empty((0, 3), dtype = np.int32), *(block.triangles for block in blocks)]),
+            "edge_keys": np.array([key[1:] for key in self.edge_records], dtype = str).reshape((-1, 2)),
+            "edge_sizes": np.array([(len(record.overlap), len(record.keys), len(record.blocks)) for record in records], dtype = np.intp).reshape((-1, 3)),
+            "edge_overlap": np.array([block_index[key] for record in records for key in record.overlap], dtype = np.intp),
+            "edge_blocks": np.array([block_index[key] for record in records for key in record.keys], dtype = np.intp),
+            "edge_pair_blocks": np.concatenate([np.empty((0, 2), dtype = np.intp), *(record.blocks for record in records)]),
+            "edge_pair_vertices": np.concatenate([np.empty((0, 2), dtype = np.intp), *(record.vertices for record in records)]),
+            }
+
+    def load_records(self, records: dict[str, np.ndarray], face_keys: list[tuple[str]], edge_keys: list[tuple[str]]):
+        """
+        Restores the face blocks and edge records from the arrays generated by record_arrays.
+        The stored features are matched to the given (selected) features. If any of them cannot be matched, no records are restored.
+        """
+        features = {key[1:]: key for key in [*face_keys, *edge_keys]}
+        try:
+            block_keys = [features[(*key,)] for key in records["block_keys"].tolist()]
+            record_keys = [features[(*key,)] for key in records["edge_keys"].tolist()]
+            block_sizes, edge_sizes = records["block_sizes"], records["edge_sizes"]
+            vertices = np.split(records["block_vertices"], np.cumsum(block_sizes[:, 0])[:-1])
+            triangles = np.split(records["block_triangles"], np.cumsum(block_sizes[:, 1])[:-1])
+            overlaps = np.split(records["edge_overlap"], np.cumsum(edge_sizes[:, 0])[:-1])
+            blocks = np.split(records["edge_blocks"], np.cumsum(edge_sizes[:, 1])[:-1])
+            pair_blocks = np.split(records["edge_pair_blocks"], np.cumsum(edge_sizes[:, 2])[:-1])
+            pair_vertices = np.split(records["edge_pair_vertices"], np.cumsum(edge_sizes[:, 2])[:-1])
+        except KeyError:
+            return
+
+        for key, block_vertices, block_triangles in zip(block_keys, vertices, triangles):
+            self.face_blocks[key] = make_face_block(None if UVUlib.feature_is_mesh(key) else UVUlib.get_feature(key), block_vertices, block_triangles)
+        for key, overlap, keys, record_blocks, record_vertices in zip(record_keys, overlaps, blocks, pair_blocks, pair_vertices):
+            self.edge_records[key] = EdgeRecord(
+                frozenset(block_keys[i] for i in overlap.tolist()),
+                tuple(block_keys[i] for i in keys.tolist()),
+                record_blocks,
+                record_vertices,
+                )
+        for body in dict.fromkeys(key[:2] for key in [*block_keys, *record_keys]):
+            self.body_signatures[body] = body_signature(UVUlib.get_feature(body))
+        self.record_params = self.mesh_params
+
+    def invalidate_records(self):
+        """
+        Removes all face blocks and edge records that are no longer valid, due to a change in the mesh parameters or in the shape of their body.
+        """
+        if self.mesh_params != self.record_params:
+            self.face_blocks.clear()
+            self.edge_records.clear()
+            self.body_signatures.clear()
+            self.record_params = self.mesh_params
+        for body, signature in [*self.body_signatures.items()]:
+            obj = UVUlib.get_feature(body)
+            if obj is not None and same_body(obj, signature):
+                continue
+            del self.body_signatures[body]
+            for records in (self.face_blocks, self.edge_records):
+                for key in [key for key in records if key[:2] == body]:
+                    del records[key]
+
+    def update_face_blocks(self, face_keys: list[tuple[str]]) -> set[tuple[str]]:
+        """
+        Ensures that a face block exists for exactly the given face features.
+        Returns the keys of all face blocks that were (re-)generated.
+
+        If any face of a body lacks a face block, all selected faces of that body are meshed again, and their face blocks replaced. Meshing only the missing faces would discretise their edges without the already meshed faces next to them, such that the shared edges no longer match and cannot be fused topologically.
+        """
+        for key in self.face_blocks.keys() - set(face_keys):
+            del self.face_blocks[key]
+        missing = [key for key in face_keys if key not in self.face_blocks]
+        rebuilt = set(missing)
+        # Mesh objects are read directly, rather than being tessellated
+        for key in [key for key in missing if UVUlib.feature_is_mesh(key)]:
+            self.face_blocks[key] = self.read_mesh(key)
+        missing = [key for key in missing if key not in self.face_blocks]
+
+        # The same faces are meshed in the current process and in the worker processes
+        bodies = {body: [key for key in face_keys if key[:2] == body] for body in dict.fromkeys(key[:2] for key in missing)}
+        rebuilt |= {key for keys in bodies.values() for key in keys}
+        if self.obj.ParallelMeshing and len(bodies) > 1 and self.mesh_faces_parallel(bodies):
+            return rebuilt
+        for body, keys in bodies.items():
+            self.mesh_faces(body, keys)
+            for key in keys:
+                self.face_blocks[key] = self.mesh_face(UVUlib.get_feature(key))
+        return rebuilt
+
+    def read_mesh(self, feature: tuple[str]) -> FaceBlock:
+        """
+        Generates the face block of the given mesh object from its points and facets, welding any coincident vertices.
+        """
+        vertices, triangles = tessellation.mesh_arrays(UVUlib.get_feature(feature).Mesh)
+        self.body_signatures[feature[:2]] = mesh_digest(vertices, triangles)
+        return make_face_block(None, *tessellation.weld_vertices(vertices, triangles, self.obj.WeldTolerance))
+
+    def mesh_faces(self, body: tuple[str], face_keys: list[tuple[str]]):
+        """
+        Generates the tessellation of the given faces of a body, such that it can be read for every one of these faces.
+
+        Only the given faces are meshed, rather than the full body. All given faces are meshed together, such that faces which are adjacent are discretised consistently along their shared edges.
+        """
+        tessellation.mesh_shape(Part.makeCompound([UVUlib.get_feature(key) for key in face_keys]), self.mesh_params[:4])
+        self.body_signatures[body] = body_signature(UVUlib.get_feature(body))
+
+    def mesh_faces_parallel(self, bodies: dict[tuple[str], list[tuple[str]]]) -> bool:
+        """
+        Generates the face blocks for the given faces of every body in parallel worker processes.
+        Returns False if the faces could not be meshed in parallel.
+
+        The tessellation generated by the workers is not stored in the faces of the current process. Like in mesh_faces, all the given faces of a body are meshed together, to ensure that their shared edges are discretised consistently.
+        """
+        faces = {body: [UVUlib.get_feature(key) for key in keys] for body, keys in bodies.items()}
+        results = tessellation.mesh_breps([Part.makeCompound(body_faces).exportBrepToString() for body_faces in faces.values()], self.mesh_params[:4])
+        if results is None:
+            return False
+        for (body, keys), body_faces, arrays in zip(bodies.items(), faces.values(), results):
+            for key, face, (vertices, triangles) in zip(keys, body_faces, arrays):
+                self.face_blocks[key] = make_face_block(face, vertices, triangles)
+            self.body_signatures[body] = body_signature(UVUlib.get_feature(body))
+        return True
 
     def onChanged(self, obj, prop):
         return
@@ -117,27 +407,35 @@ class FaceMesh():
         self.obj.touch()
 
 
-    def _add_face(self, face: "OCCT::Face"):
+    def mesh_face(self, face: "OCCT::Face") -> FaceBlock:
         """
-        Adds the mesh for the given toposhape face to the stored mesh data.
+        Generates the face block for the given toposhape face from its existing tessellation, as generated by mesh_faces. The face blocks are added to the stored mesh data by assemble_faces.
         """
-        if self.obj.CheckDuplicate and any(face.isEqual(_face) for _face in self.topo_faces):
-            warn( RepeatedFaceWarning("Cannot re-add an already added face to a FaceMesh object") )
-            return
-        self.topo_faces.append(face)
-        # Get the existing face tessellation without creating a new tessellation
-        vertices, triangles = face.tessellate(math.inf)
-        UVNodes = face.getUVNodes()
-        # Test if edge vertices are reused on multiple non-adjecent edges. If so, these should be separated.
-        if len(vertices) != len(UVNodes):
-            vertices, triangles = unlink_edge_nodes(face, vertices, UVNodes, triangles)
+        return make_face_block(face, *tessellation.face_arrays(face))
 
+    def assemble_faces(self, keys: list[tuple[str]]) -> dict[tuple[str], int]:
+        """
+        Combines the meshes of the given face blocks into the stored mesh data.
+        Returns the offset of the vertex indices of every face block in the combined mesh.
+        """
+        blocks = [self.face_blocks[key] for key in keys]
         # Remap the triangle / vertex indices
-        vertex_offset = len(self.vertices)
-        triangles = [tuple(i + vertex_offset for i in tri) for tri in triangles]
-
-        self.vertices.extend(vertices)
-        self.triangles.extend(triangles)
+        vertex_offsets = np.cumsum([0, *(len(block.vertices) for block in blocks)])
+        self.set_mesh(
+            np.concatenate([np.empty((0, 3), dtype = np.float64), *(block.vertices for block in blocks)]),
+            np.concatenate([np.empty((0, 3), dtype = np.int32), *(block.triangles + vertex_offset for block, vertex_offset in zip(blocks, vertex_offsets))]),
+            )
+        return dict(zip(keys, vertex_offsets.tolist()))
+
+    def _add_topo_face(self, face: "OCCT::Face") -> bool:
+        """
+        Adds the given toposhape face to the book-keeping data, without meshing it.
+        Returns False if the face was already included.
+        """
+        if not self.topo_faces.add(face) and self.obj.CheckDuplicate:
+            warn( RepeatedFaceWarning("Cannot re-add an already added face to a FaceMesh object") )
+            return False
+        return True
 
     def add_edge(self, feature: tuple[str]):
         """
@@ -150,18 +448,89 @@ class FaceMesh():
         self.obj.Edges += [(UVUlib.get_feature(feature[:2]), feature[2])]
         self.obj.touch()
 
-    def _add_edge(self, edge: "OCCT::Edge"):
-        if self.obj.CheckDuplicate and any(edge.isEqual(_edge) for _edge in self.topo_edges):
+    def _add_topo_edge(self, edge: "OCCT::Edge") -> bool:
+        """
+        Adds the given toposhape edge to the book-keeping data, without fusing it.
+        Returns False if the edge was already included.
+        """
+        if not self.topo_edges.add(edge) and self.obj.CheckDuplicate:
             warn( RepeatedEdgeWarning("Cannot re-add an already added edge to a FaceMesh object") )
-            return
-        self.topo_edges.append(edge)
-        # Apply the relevant transformations to the mesh data
-        self.fuse_edge(edge)
+            return False
+        return True
 
-    def fuse_edge(self, edge: "OCCT::Edge"):
-        self.vertices, self.triangles = fuse_edge(self.vertices, self.triangles, edge)
-        assert all(len(set(tri)) == 3 for tri in self.triangles)
+    def fuse_edges(self, edge_keys: list[tuple[str]], offsets: dict[tuple[str], int], rebuilt: set[tuple[str]], tolerance: float = 1e-3):
+        """
+        Fuses the stored mesh data along all the given edge features.
 
+        The fuse pairs are only determined again for edges which touch a face block that was (re-)generated, added or removed. For all other edges, the stored edge record is reused.
+
+        edge_keys: list[tuple[str]] - The edge features to fuse the mesh at
+        offsets: dict[tuple[str], int] - The offset of the vertex indices of every face block in the stored mesh data, as returned by assemble_faces
+        rebuilt: set[tuple[str]] - The keys of the face blocks which were (re-)generated during this recompute
+        """
+        for key in self.edge_records.keys() - set(edge_keys):
+            del self.edge_records[key]
+        keys = [*offsets]
+        bounds = np.array([self.face_blocks[key].bounds for key in keys]).reshape((-1, 2, 3))
+        block_offsets = np.array([*offsets.values(), len(self.vertex_array)], dtype = np.intp)
+
+        tree = None # The spatial index is only generated if any edge needs to be fused again
+        pairs = []
+        for key in edge_keys:
+            edge = UVUlib.get_feature(key)
+            if not self._add_topo_edge(edge):
+                continue
+            # Any face block with vertices on the edge has a bounding box that touches that of the edge
+            box = edge.BoundBox
+            low = np.array([box.XMin, box.YMin, box.ZMin]) - 2 * tolerance
+            high = np.array([box.XMax, box.YMax, box.ZMax]) + 2 * tolerance
+            overlap = frozenset(keys[i] for i in np.flatnonzero(np.all((bounds[:, 0] <= high) & (bounds[:, 1] >= low), axis = 1)))
+
+            record = self.edge_records.get(key)
+            if record is None or record.overlap != overlap or overlap & rebuilt or any(block not in offsets for block in record.keys):
+                if tree is None:
+                    tree = sp.spatial.cKDTree(self.vertex_array)
+                edge_pairs = get_edge_fuse_pairs(self.vertex_array, tree, self.topology, edge, self.obj.FuseMethod, tolerance, f"{key[1]}.{key[2]}")
+                # Store the pairs relative to their face blocks
+                pair_blocks = np.searchsorted(block_offsets, edge_pairs, side = "right") - 1
+                record_keys, pair_blocks = np.unique(pair_blocks, return_inverse = True)
+                record = EdgeRecord(
+                    overlap,
+                    tuple(keys[i] for i in record_keys.tolist()),
+                    pair_blocks.reshape((-1, 2)),
+                    edge_pairs - block_offsets[record_keys[pair_blocks]].reshape((-1, 2)),
+                    )
+                self.edge_records[key] = record
+                self.body_signatures.setdefault(key[:2], body_signature(UVUlib.get_feature(key[:2])))
+            record_offsets = np.array([offsets[block] for block in record.keys], dtype = np.intp)
+            pairs.append(record_offsets[record.blocks] + record.vertices)
+
+        # The fused edges are the face boundary segments of which both vertices are fused, and which are shared by two triangles after fusing
+        pairs = np.concatenate([np.empty((0, 2), dtype = np.intp), *pairs])
+        boundary_edges = self.topology.boundary_edges
+        boundary_edges = boundary_edges[np.all(np.isin(boundary_edges, pairs), axis = 1)]
+        vertices, triangles, fused_edges = merge_vertices(self.vertex_array, self.triangle_array, pairs, boundary_edges)
+        # Triangles with multiple vertices on the same edge (e.g. slivers narrower than the fuse tolerance) collapse when fused, and are removed
+        degenerate = (triangles[:, 0] == triangles[:, 1]) | (triangles[:, 1] == triangles[:, 2]) | (triangles[:, 2] == triangles[:, 0])
+        if np.any(degenerate):
+            warn( DegenerateTriangleWarning(f"Removed {np.count_nonzero(degenerate)} triangle(s) that collapsed while fusing the mesh edges") )
+            triangles = triangles[~degenerate]
+        self.set_mesh(vertices, triangles)
+        fused_edges = np.unique(np.sort(fused_edges, axis = 1), axis = 0)
+        fused_edges = fused_edges[fused_edges[:, 0] != fused_edges[:, 1]]
+        edges = self.topology.find_edges(fused_edges[:, 0], fused_edges[:, 1])
+        fused_edges, edges = fused_edges[edges >= 0], edges[edges >= 0]
+        self._fused_edge_array = fused_edges[self.topology.edge_counts[edges] == 2].astype(np.int32)
+
+
+    def segment(self):
+        """
+        Replaces the stored mesh data by its automatic segmentation into disk-like charts, which are disconnected from each other.
+        All faces are welded together first, such that the charts are independent of the face boundaries. As such, the segmented mesh does not contain any fused edges.
+        """
+        vertices, triangles = tessellation.weld_vertices(self.vertex_array, self.triangle_array, self.obj.WeldTolerance)
+        labels = segment_charts(vertices, triangles, float(self.obj.FeatureAngle), float(self.obj.MaxChartAngle))
+        self.set_mesh(*split_charts(vertices, triangles, labels))
 
     def merge_faceMesh(self, faceMesh):
         """
@@ -175,8 +544,12 @@ class FaceMesh():
         """
         self.topo_faces.clear()
         self.topo_edges.clear()
-        self.vertices.clear()
-        self.triangles.clear()
+        self.face_blocks.clear()
+        self.edge_records.clear()
+        self.body_signatures.clear()
+        self.feature_digests.clear()
+        self.record_params = None
+        self.set_mesh(np.empty((0, 3), dtype = np.float64), np.empty((0, 3), dtype = np.int32))
 
     def __getstate__(self):
         return {}
@@ -186,8 +559,29 @@ class FaceMesh():
     def onDocumentRestored(self, obj):
         self.obj = obj
         self.obj.ViewObject.Proxy.obj = self.obj.ViewObject
+        # Objects saved before the mesh cache was introduced lack the related properties
+        if not hasattr(obj, "UseCache"):
+            self.add_cache_properties(obj)
+        if not hasattr(obj, "ParallelMeshing"):
+            self.add_parallel_properties(obj)
+        if not hasattr(obj, "WeldTolerance"):
+            self.add_mesh_properties(obj)
+        if not hasattr(obj, "AutoSegment"):
+            self.add_segmentation_properties(obj)
+        if not hasattr(obj, "FuseMethod"):
+            self.add_fuse_properties(obj)
+        if not hasattr(obj, "SaveMesh"):
+            self.add_persistence_properties(obj)
         self.init()
-        self.execute()
+        # The mesh is only restored once it is first used. The stored mesh data is loaded if available, otherwise the mesh is recomputed.
+        # Nothing is validated here, since the checksum of the current inputs requires the source bodies. The checksum stored with the data is only compared once the data is loaded (see restore_mesh).
+        stored = obj.SaveMesh and bool(obj.MeshData)
+        if stored or UVUlib.lazy_restore():
+            self.restore_pending = True
+            if not stored:
+                obj.touch() # Marks the object as requiring a recompute
+        else:
+            self.execute()
 
     # The following properties are implemented as cached properties to allow for
     # these to be correctly set for objects loaded from a file. This includes
@@ -207,19 +601,112 @@ class FaceMesh():
             edges |= {(*feature[0].FullName.split("#"), element) for element in feature[1]}
         return edges
 
+    @property
+    def mesh_params(self) -> tuple:
+        """
+        All parameters, other than the selection, which affect the generated mesh.
+        """
+        return (self.obj.ManualMeshParams, self.obj.LinearDeflection, self.obj.AngularDeflection, self.obj.RelativeDeflection, self.obj.CheckDuplicate, self.obj.WeldTolerance, self.obj.FuseMethod)
+
+    @property
+    def checksum(self) -> str:
+        """
+        A hash of all inputs of the mesh: the selection, the geometry of the selected features, and all parameters affecting the mesh.
+        """
+        return self.mesh_checksum(*self.selection_keys())
+
+    def mesh_checksum(self, face_keys: list[tuple[str]], edge_keys: list[tuple[str]]) -> str:
+        """
+        Generates the checksum for the given (resolved) face and edge features.
+        """
+        for key in self.feature_digests.keys() - set(face_keys) - set(edge_keys):
+            del self.feature_digests[key]
+        return mesh_cache.cache_key(face_keys, edge_keys, self.mesh_params + self.segmentation_params, self.feature_digest)
+
+    def feature_digest(self, feature: tuple[str]) -> str:
+        """
+        The digest of the geometry of the given feature, which is only re-generated if its body changed since the previous digest.
+        """
+        obj = UVUlib.get_feature(feature[:2])
+        signature, digest = self.feature_digests.get(feature, (None, None))
+        if signature is None or not same_body(obj, signature):
+            signature, digest = body_signature(obj), mesh_cache.feature_digest(feature)
+            self.feature_digests[feature] = (signature, digest)
+        return digest
+
+    @property
+    def vertex_array(self) -> np.ndarray[np.float64]:
+        """
+        The (N, 3) vertex positions of the mesh.
+        """
+        if self.restore_pending:
+            self.restore_mesh()
+        return self._vertex_array
+    @property
+    def triangle_array(self) -> np.ndarray[np.int32]:
+        """
+        The (T, 3) vertex indices of every triangle of the mesh.
+        """
+        if self.restore_pending:
+            self.restore_mesh()
+        return self._triangle_array
+    @property
+    def fused_edge_array(self) -> np.ndarray[np.int32]:
+        """
+        The (F, 2) vertex indices of the mesh edges along which faces were fused together.
+        """
+        if self.restore_pending:
+            self.restore_mesh()
+        return self._fused_edge_array
+
+    @property
+    def segmentation_params(self) -> tuple:
+        """
+        All parameters that affect the automatic segmentation of the mesh.
+        """
+        return (self.obj.AutoSegment, float(self.obj.FeatureAngle), float(self.obj.MaxChartAngle)) if self.obj.AutoSegment else (False,)
+
+    @property
+    def vertices(self) -> list[App.Base.Vector]:
+        """
+        The mesh vertices as a list of Base.Vectors. Generated from the vertex array when first requested.
+        """
+        if self._vertices is None:
+            self._vertices = [App.Base.Vector(*vertex) for vertex in self.vertex_array.tolist()]
+        return self._vertices
+    @property
+    def triangles(self) -> list[tuple[int]]:
+        """
+        The mesh triangles as a list of vertex index tuples. Generated from the triangle array when first requested.
+        """
+        if self._triangles is None:
+            self._triangles = [(*triangle,) for triangle in self.triangle_array.tolist()]
+        return self._triangles
+
+    @property
+    def topology(self) -> MeshTopology:
+        """
+        The connectivity of the mesh (adjacency, boundary loops, connected components). Generated from the triangle array when first requested.
+        """
+        if self._topology is None:
+            self._topology = MeshTopology(len(self.vertex_array), self.triangle_array)
+        return self._topology
+
     @property
     def area(self):
         """
         The area of the toposhape faces included in the FaceMesh.
         """
+        if self.restore_pending:
+            self.restore_mesh()
         return sum(face.Area for face in self.topo_faces)
     @property
     def mesh_area(self):
         """
         The area of the meshed representation of the faces included in the FaceMesh.
         """
-        return sum((self.vertices[triangle[1]]-self.vertices[triangle[0]]).cross(self.vertices[triangle[2]]-self.vertices[triangle[0]]).Length \
-                   for triangle in self.triangles) / 2
+        p0, p1, p2 = (self.vertex_array[self.triangle_array[:, i]] for i in range(3))
+        return float(np.linalg.norm(np.cross(p1 - p0, p2 - p0), axis = 1).sum() / 2)
 
 # Testing GUI stuff
 class FaceMeshVP():
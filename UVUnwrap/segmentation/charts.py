@@ -0,0 +1,127 @@
+"""
+This file contains the automatic segmentation of a mesh into charts.
+
+A chart is a connected, disk-like part of the mesh, which can be unwrapped without needing any additional cuts. The charts are determined as follows:
+1. The mesh is split at all sharp edges, i.e. edges with a dihedral angle larger than the feature angle.
+2. Every resulting chart is checked against the distortion budget (the maximum angle between the normals of the chart and its mean normal) and for being disk-like. Any chart that fails these checks is split in two by growing two regions from well separated seed triangles, and the new charts are checked again.
+
+The region growing is performed using a multi-source Dijkstra search over the triangle adjacency graph, in which crossing a strongly curved edge is expensive. As such, the charts tend to be split along curved regions, rather than through flat regions.
+"""
+__all__ = ["triangle_adjacency", "segment_charts", "split_charts"]
+
+# Official module imports
+import math
+import numpy as np
+import scipy as sp
+
+def triangle_adjacency(triangles: np.ndarray[np.int32]) -> tuple[np.ndarray]:
+    """
+    Finds all pairs of triangles that share an edge.
+
+    Returns:
+    pairs: (A, 2) np.ndarray - The indices of the adjacent triangles
+    edges: (A, 2) np.ndarray - The vertex indices of the shared edge, in the order [edge_node_0, edge_node_1], with edge_node_0 < edge_node_1.
+    Note: If more than 2 triangles share an edge, these are connected in a chain.
+    """
+    edges = np.sort(np.asarray(triangles, dtype = np.intp)[:, [[0, 1], [1, 2], [2, 0]]].reshape((-1, 2)), axis = 1)
+    order = np.lexsort((edges[:, 1], edges[:, 0]))
+    edges = edges[order]
+    shared = np.all(edges[1:] == edges[:-1], axis = 1)
+    pairs = np.stack([order[:-1][shared] // 3, order[1:][shared] // 3], axis = 1)
+    return pairs, edges[:-1][shared]
+
+def triangle_normals(vertices: np.ndarray[np.float64], triangles: np.ndarray[np.int32]) -> tuple[np.ndarray]:
+    """
+    Returns the unit normals and the areas of all triangles. Degenerate triangles are given a zero normal.
+    """
+    p0, p1, p2 = (vertices[triangles[:, i]] for i in range(3))
+    normals = np.cross(p1 - p0, p2 - p0)
+    lengths = np.linalg.norm(normals, axis = 1)
+    normals = np.divide(normals, lengths[:, None], out = np.zeros_like(normals), where = lengths[:, None] > 0)
+    return normals, lengths / 2
+
+def segment_charts(vertices: np.ndarray[np.float64], triangles: np.ndarray[np.int32], feature_angle: float = 45., max_chart_angle: float = 60.) -> np.ndarray[np.intp]:
+    """
+    Segments the mesh into disk-like charts.
+    Returns the chart index of every triangle.
+
+    vertices: (N, 3) np.ndarray - The vertex positions
+    triangles: (T, 3) np.ndarray - The vertex indices of every triangle
+    feature_angle: float - The dihedral angle (in degrees) above which an edge is always used as a chart boundary
+    max_chart_angle: float - The maximum angle (in degrees) between the normal of any triangle in a chart and the mean normal of the chart
+    """
+    vertices = np.asarray(vertices, dtype = np.float64).reshape((-1, 3))
+    triangles = np.asarray(triangles, dtype = np.intp).reshape((-1, 3))
+    normals, areas = triangle_normals(vertices, triangles)
+    centroids = vertices[triangles].mean(axis = 1)
+
+    # Build the triangle adjacency graph, omitting all sharp edges. Crossing a curved edge is made more expensive, such that the grown regions prefer to end at curved edges.
+    pairs, edges = triangle_adjacency(triangles)
+    cos_dihedral = np.sum(normals[pairs[:, 0]] * normals[pairs[:, 1]], axis = 1)
+    smooth = cos_dihedral >= math.cos(math.radians(feature_angle))
+    pairs = pairs[smooth]
+    weights = np.linalg.norm(centroids[pairs[:, 0]] - centroids[pairs[:, 1]], axis = 1) * (1 + 10 * (1 - cos_dihedral[smooth])) + 1e-12
+    graph = sp.sparse.coo_array((np.concatenate([weights, weights]), (np.concatenate([pairs[:, 0], pairs[:, 1]]), np.concatenate([pairs[:, 1], pairs[:, 0]]))), 2 * (len(triangles),)).tocsr()
+
+    # Initial charts: the smooth connected regions of the mesh
+    n_components, components = sp.sparse.csgraph.connected_components(graph, directed = False)
+    order = np.argsort(components, kind = "stable")
+    bounds = np.searchsorted(components[order], np.arange(n_components + 1))
+    pending = [order[bounds[i]:bounds[i + 1]] for i in range(n_components)]
+
+    min_cos = math.cos(math.radians(max_chart_angle))
+    labels = np.empty((len(triangles),), dtype = np.intp)
+    n_charts = 0
+    while pending:
+        chart = pending.pop()
+        chart_normals = normals[chart]
+        mean_normal = areas[chart] @ chart_normals
+        mean_length = np.linalg.norm(mean_normal)
+        cos_normals = chart_normals @ (mean_normal / mean_length) if mean_length > 0 else np.full((len(chart),), -1.)
+        within_budget = np.all(cos_normals[areas[chart] > 0] >= min_cos)
+        if len(chart) == 1 or within_budget and is_disk(triangles[chart]):
+            labels[chart] = n_charts
+            n_charts += 1
+            continue
+        pending.extend(chart[region] for region in split_chart(graph[chart][:, chart], chart_normals, cos_normals, within_budget))
+    return labels
+
+def split_chart(graph: sp.sparse.csr_array, normals: np.ndarray[np.float64], cos_normals: np.ndarray[np.float64], within_budget: bool) -> list[np.ndarray[np.intp]]:
+    """
+    Splits a chart in two, by growing two regions from well separated seed triangles.
+    Returns the (chart local) triangle indices of both regions.
+
+    If the chart exceeds the distortion budget, the seeds are the triangles with the most deviating normals. Otherwise (the chart is not disk-like), the seeds are the triangles that are furthest apart.
+    """
+    seed0 = int(np.argmin(cos_normals))
+    seed1 = int(np.argmin(normals @ normals[seed0]))
+    if within_budget or seed1 == seed0:
+        distances = sp.sparse.csgraph.dijkstra(graph, indices = seed0)
+        seed1 = int(np.argmax(np.where(np.isfinite(distances), distances, -1)))
+    # Grow the regions from both seeds at once. Every triangle is assigned to the seed it is closest to.
+    distances, predecessors, sources = sp.sparse.csgraph.dijkstra(graph, indices = [seed0, seed1], min_only = True, return_predecessors = True)
+    region = sources == seed1
+    return [np.flatnonzero(~region), np.flatnonzero(region)]
+
+def is_disk(triangles: np.ndarray[np.intp]) -> bool:
+    """
+    Whether the given connected set of triangles is topologically equivalent to a disk, i.e. it has an Euler characteristic of 1 and a boundary.
+    """
+    vertices, local_triangles = np.unique(triangles, return_inverse = True)
+    edges = np.sort(local_triangles.reshape((-1, 3))[:, [[0, 1], [1, 2], [2, 0]]].reshape((-1, 2)), axis = 1)
+    edges, counts = np.unique(edges[:, 0] * len(vertices) + edges[:, 1], return_counts = True) # Encoded as a single integer, which is far cheaper to sort
+    return len(vertices) - len(edges) + len(triangles) == 1 and np.any(counts == 1)
+
+def split_charts(vertices: np.ndarray[np.float64], triangles: np.ndarray[np.int32], labels: np.ndarray[np.intp]) -> tuple[np.ndarray]:
+    """
+    Disconnects the charts of the mesh from each other, by duplicating all vertices that are shared between charts.
+
+    vertices: (N, 3) np.ndarray - The vertex positions
+    triangles: (T, 3) np.ndarray - The vertex indices of every triangle
+    labels: (T,) np.ndarray - The chart index of every triangle
+    """
+    triangles = np.asarray(triangles, dtype = np.intp).reshape((-1, 3))
+    # Every (chart, vertex) combination becomes a separate vertex
+    keys = np.asarray(labels, dtype = np.intp)[:, None] * len(vertices) + triangles
+    keys, triangles = np.unique(keys, return_inverse = True)
+    return vertices[keys % len(vertices)], triangles.reshape((-1, 3)).astype(np.int32)
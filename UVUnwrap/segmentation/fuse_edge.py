@@ -1,83 +1,211 @@
-__all__ = ["fuse_edge"]
+__all__ = ["merge_vertices", "get_edge_fuse_pairs", "get_fuse_pairs", "get_topological_fuse_pairs", "get_edge_nodes"]
 
 # Official module imports
-import itertools
-import FreeCAD as App
+import numpy as np
+import scipy as sp
 
 # Local module imports
-from .utils import EnumerationDict
+from Exceptions import *
+from .utils import UnionFind
+from .topology import MeshTopology
 
 
-def fuse_edge(vertices: list[App.Base.Vector], triangles: list[tuple[int]], edge: "OCCT::Edge"):
+def merge_vertices(vertices: np.ndarray[np.float64], triangles: np.ndarray[np.int32], pairs: np.ndarray[np.intp], edges: np.ndarray[np.intp] = None) -> tuple[np.ndarray]:
     """
-    Fuses a tessellation at the given edge
+    Merges all the given pairs of vertices, removing any vertices that are no longer in use.
+
+    vertices: (N, 3) np.ndarray - The vertex positions
+    triangles: (T, 3) np.ndarray - The vertex indices of every triangle
+    pairs: (P, 2) array_like - The indices of the vertex pairs to be merged
+    edges: (E, 2) array_like - Optional mesh edges which are remapped to the merged vertices as well, and returned as the third value. These may only contain vertices that are used by a triangle.
+    """
+    fused_vertices = UnionFind(len(vertices)) # The edge fusing history. Every set in the union-find structure is fused into a single vertex.
+    for v0, v1 in np.asarray(pairs, dtype = np.intp).reshape((-1, 2)).tolist():
+        fused_vertices.union(v0, v1)
+
+    # Perform the actual remapping step of the fuse, removing any vertices that are no longer in use
+    roots = fused_vertices.roots()
+    used, triangles = np.unique(roots[triangles], return_inverse = True)
+    if edges is None:
+        return vertices[used], triangles.reshape((-1, 3)).astype(np.int32)
+    edges = np.searchsorted(used, roots[np.asarray(edges, dtype = np.intp).reshape((-1, 2))])
+    return vertices[used], triangles.reshape((-1, 3)).astype(np.int32), edges
+
+def get_edge_fuse_pairs(vertices: np.ndarray[np.float64], tree: sp.spatial.cKDTree, topology: MeshTopology, edge: "OCCT::Edge", method: str = "Topology", tolerance: float = 1e-3, name: str = "") -> np.ndarray[np.intp]:
+    """
+    Finds all the pairs of vertices that should be fused to fuse the tessellation at the given edge, using the given fuse method.
+
+    With the Topology method, the geometric pairing is used for any edge that cannot be paired topologically (see get_topological_fuse_pairs). Since the geometric pairing depends on a fixed tolerance, a FuseFallbackWarning is emitted for every such edge.
+
+    tree: cKDTree - The spatial index of the vertices
+    topology: MeshTopology - The topology of the (unfused) tessellation
+    method: str - Any of ["Topology", "Geometry"]
+    name: str - The name of the edge, used in the warning message
+
+    Returns:
+    (P, 2) np.ndarray - The indices of the vertex pairs to be fused
+    """
+    pairs = None
+    if method == "Topology":
+        if not edge.isClosed():
+            # The nodes are found with a tolerance relative to the edge length (or the OCCT edge tolerance, if larger), such that the pairing does not depend on the scale of the model
+            edge_tolerance = max(edge.Tolerance, 1e-6 * edge.Length)
+            nodes, parameters = get_edge_nodes(vertices, tree, discretize_edge(edge, edge_tolerance), edge_tolerance)
+            pairs = get_topological_fuse_pairs(vertices, topology.boundary_edges, nodes, parameters, edge_tolerance)
+        if pairs is None:
+            warn( FuseFallbackWarning(f"Edge {name} could not be fused topologically, since it is closed or the faces on its sides are not discretised consistently. Its vertices are paired geometrically instead.") )
+    if pairs is None:
+        pairs = get_fuse_pairs(vertices, topology.edges, get_edge_vertices(vertices, tree, edge, tolerance), tolerance)
+    return np.array(pairs, dtype = np.intp).reshape((-1, 2))
+
+def get_fuse_pairs(vertices: np.ndarray[np.float64], mesh_edges: np.ndarray[np.intp], edge_vertices: np.ndarray[np.intp], tolerance: float = 1e-3) -> list[tuple[int]]:
+    """
+    Finds all the pairs of vertices that should be fused to fuse the tessellation at an edge, by pairing the coincident mesh edges along the edge.
+
+    mesh_edges: (E, 2) np.ndarray - All unique mesh edges (= triangle edges) of the tessellation
+    edge_vertices: (M,) np.ndarray - The indices of all vertices that lay on the edge (see get_edge_vertices)
     """
-    tolerance = 1e-3
-    # Find all the vertices that lay on the given TopoShape Edge, along with any potential fusable other vertices
-    edge_vertices = {i for i, vertex in enumerate(vertices) if edge.isInside(vertex, tolerance, False)}
-    fuse_candidates = {vertex: [other for other in edge_vertices if (vertices[vertex] - vertices[other]).Length < tolerance]
-        for vertex in edge_vertices}
-    # Find all the mesh edges (= triangle edges) that lay on the given TopoShape Edge
-    mesh_edges = get_mesh_edges(edge_vertices, triangles)
-
-    fused_vertices = {} # A dictionary of the edge fusing history in the format {original_vertex_index: fused_vertex_index}
-
-    while mesh_edges:
-        mesh_edge = mesh_edges.pop()
-        # Find another coincident edge that has fusable vertices
-        # Note: In the rare case where more than 2 triangle edges share the same
-        # edge (e.g. a solid with a cutout that has an edge exactly on the outer
-        # boundary), this will be taken care of in a future iteration when
-        # mesh_edge gets set to the edge that is currently fuse_edge.
-        fuse_edge = next((fuse_edge for fuse_edge in mesh_edges \
-            if  any(i in fuse_edge for i in fuse_candidates[mesh_edge[0]]) \
-            and any(i in fuse_edge for i in fuse_candidates[mesh_edge[1]]) ),
-            None)
-        # If no compatible other edge was found, continue
-        if fuse_edge is None:
+    edge_vertices = np.asarray(edge_vertices, dtype = np.intp)
+    if len(edge_vertices) < 2:
+        return []
+    # Group the coincident edge vertices, which are the potential fusable vertices. Every vertex is labelled with the index of its group (-1 if not on the edge).
+    coincident = sp.spatial.cKDTree(vertices[edge_vertices]).query_pairs(tolerance, output_type = "ndarray")
+    graph = sp.sparse.coo_array((np.ones((len(coincident),), dtype = np.int8), (coincident[:, 0], coincident[:, 1])), 2 * (len(edge_vertices),))
+    labels = np.full((len(vertices),), -1, dtype = np.intp)
+    labels[edge_vertices] = sp.sparse.csgraph.connected_components(graph, directed = False)[1]
+
+    # Find all the mesh edges that lay on the edge, and group these by the groups of their end points.
+    # Mesh edges in the same group are coincident, and thus should be fused.
+    # Note: In the rare case where more than 2 triangle edges share the same
+    # edge (e.g. a solid with a cutout that has an edge exactly on the outer
+    # boundary), all of these are fused together.
+    coincident_edges = {}
+    edge_labels = labels[mesh_edges]
+    on_edge = np.all(edge_labels >= 0, axis = 1)
+    for mesh_edge, (label0, label1) in zip(mesh_edges[on_edge].tolist(), edge_labels[on_edge].tolist()):
+        if label0 == label1: # Degenerate mesh edge, shorter than the tolerance
             continue
         # Ensure the edges have the same alignment to create a correct mapping
-        if mesh_edge[0] not in fuse_candidates[fuse_edge[0]]:
-            fuse_edge = fuse_edge[-1::-1]
-
-        # Fuse the vertices
-        for v0, v1 in zip(mesh_edge, fuse_edge):
-            # If neither vertex is set up to be fused, simply fuse v1 into v0
-            if not v0 in fused_vertices and not v1 in fused_vertices:
-                fused_vertices[v1] = v0
-            # If both vertices are set up to be fused, redirect all fuses into v1's target towards v0's target.
-            # In this case, they cannot fuse into each other, since a fuse target is never also a fuse source.
-            elif v0 in fused_vertices and v1 in fused_vertices:
-                v0_tgt = fused_vertices[v0]
-                v1_tgt = fused_vertices[v1]
-                for src, tgt in fused_vertices.items():
-                    if tgt == v1_tgt:
-                        fused_vertices[src] = v0_tgt
-            # If only one of the vertices is set up to be fused, and not fuse
-            # towards the other vertex, make the unfused vertex fuse towards the
-            # target of the fused vertex
-            else:
-                if v0 in fused_vertices and fused_vertices[v0] != v1:
-                    fused_vertices[v1] = fused_vertices[v0]
-                elif v1 in fused_vertices and fused_vertices[v1] != v0:
-                    fused_vertices[v0] = fused_vertices[v1]
-
-    # Perform the actual remapping step of the fuse
-    index_cache = EnumerationDict()
-    triangles = [tuple(index_cache[fused_vertices.get(vertex_index, vertex_index)] for vertex_index in triangle) for triangle in triangles]
-    vertices = [vertices[i] for i in index_cache.keys()]
-
-    return vertices, triangles
-
-def get_mesh_edges(edge_vertices: set[int], triangles: list[tuple[int]]) -> set[tuple[int]]:
+        elif label0 < label1:
+            coincident_edges.setdefault((label0, label1), []).append(mesh_edge)
+        else:
+            coincident_edges.setdefault((label1, label0), []).append(mesh_edge[-1::-1])
+
+    fuse_pairs = []
+    for mesh_edge, *others in coincident_edges.values():
+        for fuse_edge in others:
+            fuse_pairs.extend(zip(mesh_edge, fuse_edge))
+
+    return fuse_pairs
+
+def get_topological_fuse_pairs(vertices: np.ndarray[np.float64], boundary_edges: np.ndarray[np.intp], nodes: np.ndarray[np.intp], parameters: np.ndarray[np.float64], tolerance: float) -> list[tuple[int]]:
+    """
+    Finds all the pairs of vertices that should be fused to fuse the tessellation at an (open) edge, using the topology of the tessellation rather than a fixed tolerance.
+
+    Before fusing, the tessellation of every face that borders the edge (a side of the edge) contains the edge as a chain of boundary mesh edges. Since all faces of a body share the same discretisation of their edges, every side contains the same nodes in the same order along the edge. The nodes of the sides are therefore paired by their index along the edge, which is exact, and does not depend on the scale of the model.
+
+    Returns None if the sides of the edge are not discretised consistently (e.g. for faces that were meshed independently), in which case get_fuse_pairs should be used instead.
+
+    boundary_edges: (B, 2) np.ndarray - All boundary mesh edges (= triangle edges used by a single triangle) of the tessellation
+    nodes, parameters: (M,) np.ndarray - The vertices on the edge, and their position along the edge (see get_edge_nodes)
+    tolerance: float - The tolerance with which the nodes were found
+    """
+    if len(nodes) < 4:
+        return None
+
+    # Find the sides of the edge: the chains of boundary mesh edges which lay on the edge
+    local_index = np.full((len(vertices),), -1, dtype = np.intp)
+    local_index[nodes] = np.arange(len(nodes))
+    side_edges = local_index[boundary_edges]
+    side_edges = side_edges[np.all(side_edges >= 0, axis = 1)]
+    graph = sp.sparse.coo_array((np.ones((len(side_edges),), dtype = np.int8), (side_edges[:, 0], side_edges[:, 1])), 2 * (len(nodes),))
+    labels = sp.sparse.csgraph.connected_components(graph, directed = False)[1]
+    # Order the nodes of every side along the edge. Nodes that are not part of any chain are not on a side of the edge.
+    order = np.lexsort((parameters, labels))
+    sides = np.split(order, np.flatnonzero(np.diff(labels[order])) + 1)
+    sides = [side for side in sides if len(side) > 1]
+
+    # Ensure that every side is a single chain, which visits its nodes in the order of the edge parameter
+    chain_links = {(*link,) for link in np.sort(side_edges, axis = 1).tolist()}
+    for side in sides:
+        if len(side_edges[labels[side_edges[:, 0]] == labels[side[0]]]) != len(side) - 1:
+            return None
+        if any((*sorted(link),) not in chain_links for link in zip(side[:-1].tolist(), side[1:].tolist())):
+            return None
+
+    # Group the sides that cover the same part of the edge (e.g. if the faces on either side of the edge are each split into multiple faces)
+    groups = {}
+    for side in sorted(sides, key = lambda side: parameters[side[0]]):
+        group = next((group for start, group in groups.items() if abs(start - parameters[side[0]]) <= 2 * tolerance), None)
+        if group is None:
+            groups[parameters[side[0]]] = [side]
+        else:
+            group.append(side)
+
+    # Pair the nodes of every side with the nodes of the first side in its group
+    fuse_pairs = []
+    for first, *others in groups.values():
+        for other in others:
+            if len(other) != len(first) or np.linalg.norm(vertices[nodes[first]] - vertices[nodes[other]], axis = 1).max() > 2 * tolerance:
+                return None
+            fuse_pairs.extend(zip(nodes[first].tolist(), nodes[other].tolist()))
+    return fuse_pairs
+
+def get_edge_nodes(vertices: np.ndarray[np.float64], tree: sp.spatial.cKDTree, points: np.ndarray[np.float64], tolerance: float) -> tuple[np.ndarray]:
+    """
+    Finds the indices of all vertices that lay within the tolerance of an edge, as well as their position along the edge.
+    The vertices are projected onto the discretisation of the edge. As such, this does not require any per-vertex evaluation of the edge.
+
+    tree: cKDTree - The spatial index of the vertices
+    points: (S, 3) np.ndarray - The discretisation of the edge, with a deflection equal to the tolerance (see discretize_edge)
+
+    Returns:
+    nodes: (M,) np.ndarray - The indices of the vertices on the edge
+    parameters: (M,) np.ndarray - The arc length position along the (discretised) edge
     """
-    For the given triangles, tests if any edge of the triangle lies on the edge of the mesh.
-    If so, that mesh edge is returned in the order [edge_node_0, edge_node_1].
+    points = np.asarray(points, dtype = np.float64).reshape((-1, 3))
+    starts, segments = points[:-1], points[1:] - points[:-1]
+    lengths = np.linalg.norm(segments, axis = 1)
+    arc_lengths = np.concatenate([[0.], np.cumsum(lengths)])
+    # Any vertex on the edge lies within half a segment length (plus the tolerance) of the segment midpoint
+    midpoints = starts + segments / 2
+    candidates = np.array(sorted(set().union(*tree.query_ball_point(midpoints, lengths / 2 + 2 * tolerance))), dtype = np.intp)
+
+    nodes = []
+    parameters = []
+    for chunk in np.array_split(candidates, max(1, len(candidates) * len(segments) // 2**20)): # Limits the memory use for long edges
+        # Project every candidate on every segment of the discretisation, and keep the closest projection
+        offsets = vertices[chunk][:, None, :] - starts[None, :, :]
+        t = np.clip(np.einsum("csi,si->cs", offsets, segments) / np.maximum(lengths, 1e-300)**2, 0., 1.)
+        distances = np.linalg.norm(offsets - t[:, :, None] * segments[None, :, :], axis = 2)
+        closest = np.argmin(distances, axis = 1)
+        on_edge = distances[np.arange(len(chunk)), closest] <= 2 * tolerance
+        nodes.append(chunk[on_edge])
+        parameters.append((arc_lengths[closest] + t[np.arange(len(chunk)), closest] * lengths[closest])[on_edge])
+    return np.concatenate([np.empty((0,), dtype = np.intp), *nodes]), np.concatenate([np.empty((0,)), *parameters])
+
+def get_edge_vertices(vertices: np.ndarray[np.float64], tree: sp.spatial.cKDTree, edge: "OCCT::Edge", tolerance: float = 1e-3) -> np.ndarray[np.intp]:
     """
-    edges = set()
-    for triangle in triangles:
-        for edge in itertools.combinations(sorted(triangle), 2):
-            if edge[0] in edge_vertices and edge[1] in edge_vertices:
-                edges.add(edge)
+    Finds the indices of all vertices that lay on the given TopoShape Edge.
 
-    return edges
+    Rather than testing every vertex, the edge is discretised, and only the vertices near the discretisation are tested.
+    """
+    import FreeCAD as App # Only imported once an actual edge is tested, such that the array based pairing (and its tests) do not depend on FreeCAD
+    points = discretize_edge(edge, tolerance)
+    # Any vertex on the edge lies within half a segment length (plus the deflection) of the segment midpoint
+    midpoints = (points[1:] + points[:-1]) / 2
+    radii = np.linalg.norm(points[1:] - points[:-1], axis = 1) / 2 + 2 * tolerance
+    candidates = set().union(*tree.query_ball_point(midpoints, radii))
+    return np.array(sorted(i for i in candidates if edge.isInside(App.Base.Vector(*vertices[i]), tolerance, False)), dtype = np.intp)
+
+def discretize_edge(edge: "OCCT::Edge", tolerance: float) -> np.ndarray[np.float64]:
+    """
+    Discretises the given TopoShape Edge into a polyline with a deflection equal to the tolerance.
+
+    Returns:
+    (S, 3) np.ndarray - The points of the polyline, at least the two end points of the edge
+    """
+    points = np.array(edge.discretize(Deflection = tolerance), dtype = np.float64).reshape((-1, 3))
+    if len(points) < 2:
+        points = np.array([edge.Vertexes[0].Point, edge.Vertexes[-1].Point], dtype = np.float64)
+    return points
@@ -0,0 +1,117 @@
+"""
+This file contains the persistent, content-addressed cache of generated FaceMesh data.
+
+Meshing the source bodies and fusing the face meshes is by far the most expensive part of recomputing a FaceMesh, which is needed e.g. every time a document is opened. Since the result only depends on the source geometry, the selection, and the meshing parameters, it is stored on disk under a hash of these inputs, such that an unchanged FaceMesh can skip the meshing altogether.
+
+The cache is stored in the FreeCAD user cache directory. Its maximum size (in MB) can be set using the MeshCacheSize parameter in User parameter:BaseApp/Preferences/Mod/UVUnwrap. Once the cache exceeds this size, the least recently used entries are removed.
+"""
+__all__ = ["feature_digest", "cache_key", "load", "store"]
+
+# Official module imports
+import os
+import hashlib
+import numpy as np
+import FreeCAD as App
+
+# Local module imports
+import UVUlib
+from .tessellation import mesh_arrays
+
+# The version of the cached data format. Changing this invalidates all existing cache entries.
+cache_version = 2
+default_cache_size = 256 # MB
+
+def cache_dir() -> str:
+    return os.path.join(App.getUserCachePath(), "UVUnwrap", "FaceMesh")
+
+def cache_size() -> int:
+    """
+    The maximum size of the cache in bytes.
+    """
+    return App.ParamGet("User parameter:BaseApp/Preferences/Mod/UVUnwrap").GetInt("MeshCacheSize", default_cache_size) * 2**20
+
+def feature_digest(feature: tuple[str]) -> str:
+    """
+    Generates a digest of the geometry of a single face or edge feature. For a mesh object, which is always included as a whole, this is a digest of its points and facets.
+    Only the geometry of the feature itself is hashed, such that the cost is proportional to the selection rather than to the full body.
+    """
+    obj = UVUlib.get_feature(feature)
+    digest = hashlib.sha256()
+    if UVUlib.feature_is_mesh(feature):
+        for array in mesh_arrays(obj.Mesh):
+            digest.update(array.tobytes())
+    else:
+        digest.update(obj.exportBrepToString().encode())
+    return digest.hexdigest()
+
+def cache_key(face_keys: list[tuple[str]], edge_keys: list[tuple[str]], params: tuple, digest = feature_digest) -> str:
+    """
+    Generates the cache key for the given FaceMesh inputs.
+
+    face_keys: list[tuple[str]] - The (resolved) face features included in the FaceMesh
+    edge_keys: list[tuple[str]] - The (resolved) edge features included in the FaceMesh
+    params: tuple - Any other parameters that affect the generated mesh (e.g. the meshing parameters)
+    digest: Callable - Generates the digest of the geometry of a single feature. Allows the caller to reuse the digests of unchanged features.
+    """
+    key = hashlib.sha256()
+    key.update(repr((cache_version, params)).encode())
+    # The document name is omitted, such that the key does not change when e.g. an unnamed document is first saved
+    for keys in (face_keys, edge_keys):
+        key.update(repr(len(keys)).encode())
+        for feature in sorted(keys):
+            key.update(repr(feature[1:]).encode())
+            key.update(digest(feature).encode())
+    return key.hexdigest()
+
+def load(key: str) -> tuple:
+    """
+    Loads the cached (vertices, triangles, fused_edges, records) data for the given key.
+    records is a dict of the arrays describing the face blocks and edge records the mesh was generated from (see FaceMesh.record_arrays), or None if these were not stored.
+    Returns None if no (valid) cache entry exists.
+    """
+    filename = os.path.join(cache_dir(), f"{key}.npz")
+    try:
+        with np.load(filename) as data:
+            vertices, triangles, fused_edges = data["vertices"], data["triangles"], data["fused_edges"]
+            records = {name[len("record_"):]: data[name] for name in data.files if name.startswith("record_")} or None
+        os.utime(filename) # Marks the entry as recently used
+    except (OSError, KeyError, ValueError):
+        return None
+    return vertices, triangles, fused_edges, records
+
+def store(key: str, vertices: np.ndarray[np.float64], triangles: np.ndarray[np.int32], fused_edges: np.ndarray[np.int32], records: dict[str, np.ndarray] = None):
+    """
+    Stores the (vertices, triangles, fused_edges) arrays under the given key, after which the cache is trimmed to its maximum size.
+
+    records: dict[str, np.ndarray] - The arrays describing the face blocks and edge records the mesh was generated from, such that a later recompute can continue incrementally from a cache hit
+    """
+    try:
+        os.makedirs(cache_dir(), exist_ok = True)
+        filename = os.path.join(cache_dir(), f"{key}.npz")
+        # Write to a temporary file first, such that an interrupted write can never leave behind a corrupt entry
+        with open(f"{filename}.tmp", "wb") as f:
+            np.savez(f, vertices = vertices, triangles = triangles, fused_edges = fused_edges, **{f"record_{name}": array for name, array in (records or {}).items()})
+        os.replace(f"{filename}.tmp", filename)
+        evict()
+    except OSError as error:
+        App.Console.PrintWarning(f"Could not store the FaceMesh in the mesh cache: {error}\n")
+
+def evict():
+    """
+    Removes the least recently used cache entries until the cache no longer exceeds its maximum size.
+    """
+    entries = []
+    for entry in os.scandir(cache_dir()):
+        if entry.name.endswith(".npz"):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    size = sum(entry[1] for entry in entries)
+    max_size = cache_size()
+    for mtime, entry_size, path in sorted(entries):
+        if size <= max_size:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        size -= entry_size
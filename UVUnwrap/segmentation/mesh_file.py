@@ -0,0 +1,53 @@
+"""
+This file contains the storage of generated mesh data inside the document (FCStd) file.
+
+The arrays are stored as a binary .npz file in an App::PropertyFileIncluded, such that FreeCAD includes them in the document archive. Alongside the arrays, a checksum of the inputs they were generated from is stored. When restoring, the arrays are only used if this checksum still matches the current inputs, such that e.g. a modified source body always results in a recompute.
+"""
+__all__ = ["write", "read", "clear"]
+
+# Official module imports
+import os
+import tempfile
+import numpy as np
+import FreeCAD as App
+
+def write(obj, prop: str, checksum: str, **arrays: np.ndarray):
+    """
+    Stores the given arrays in the file property of the object, together with the checksum of their inputs.
+    """
+    fd, filename = tempfile.mkstemp(suffix = ".npz", dir = App.getTempPath())
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, checksum = np.array(checksum), **arrays)
+        # The file is copied into the document's transient directory, after which the temporary file is no longer needed
+        setattr(obj, prop, filename)
+    except OSError as error:
+        App.Console.PrintWarning(f"Could not store the data of {obj.Label} in the document: {error}\n")
+    finally:
+        try:
+            os.remove(filename)
+        except OSError:
+            pass
+
+def read(obj, prop: str, checksum: str) -> dict[str, np.ndarray]:
+    """
+    Loads the arrays stored in the file property of the object.
+    Returns None if no data is stored, or if the stored data was generated from different inputs (i.e. the checksum does not match).
+    """
+    filename = getattr(obj, prop, "")
+    if not filename or not os.path.isfile(filename):
+        return None
+    try:
+        with np.load(filename) as data:
+            if str(data["checksum"]) != checksum:
+                return None
+            return {key: data[key] for key in data.files if key != "checksum"}
+    except (OSError, KeyError, ValueError):
+        return None
+
+def clear(obj, prop: str):
+    """
+    Removes the stored data from the file property of the object.
+    """
+    if getattr(obj, prop, ""):
+        setattr(obj, prop, "")
@@ -0,0 +1,166 @@
+"""
+This file contains the functions used to tessellate the faces included in a FaceMesh.
+
+The tessellation can either be generated in the current process, or in a pool of worker processes running a headless FreeCAD. In the latter case, the faces of every body are sent to the workers as a BREP string, and the tessellation of every face is returned as arrays.
+
+Mesh objects (Mesh::Feature) are not tessellated, but read directly as arrays, after which any coincident vertices are welded.
+
+The number of worker processes can be set using the MeshProcesses parameter in User parameter:BaseApp/Preferences/Mod/UVUnwrap (0 uses one process per CPU core). The Python interpreter used for the workers is determined automatically, but can be overridden using the PythonExecutable parameter.
+"""
+__all__ = ["mesh_shape", "face_arrays", "mesh_breps", "mesh_arrays", "weld_vertices"]
+
+# Official module imports
+import os
+import sys
+import math
+import itertools
+import shutil
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import scipy as sp
+import FreeCAD as App
+import Part
+import MeshPart
+
+# Local module imports
+from .unlink_edge_nodes import unlink_edge_nodes
+
+# The worker pool is kept alive between recomputes, since starting the workers (and importing FreeCAD in them) is relatively expensive.
+_pool = None
+_pool_size = None
+
+def mesh_shape(shape: "OCCT::Shape", params: tuple):
+    """
+    Generates the tessellation of the given shape. The tessellation is stored in the faces of the shape, from where it can be read using face_arrays.
+
+    params: tuple - The mesh parameters in the form (ManualMeshParams, LinearDeflection, AngularDeflection, RelativeDeflection)
+    """
+    manual, linear, angular, relative = params
+    if not manual:
+        MeshPart.meshFromShape(shape)
+    else:
+        MeshPart.meshFromShape(
+            Shape = shape,
+            LinearDeflection = linear,
+            AngularDeflection = math.radians(angular),
+            Relative = relative
+            )
+
+def face_arrays(face: "OCCT::Face") -> tuple[np.ndarray]:
+    """
+    Returns the existing tessellation of the given face as (vertices, triangles) arrays, without creating a new tessellation.
+    """
+    vertices, triangles = face.tessellate(math.inf)
+    vertices = np.array(vertices, dtype = np.float64).reshape((-1, 3))
+    triangles = np.array(triangles, dtype = np.int32).reshape((-1, 3))
+    UVNodes = face.getUVNodes()
+    # Test if edge vertices are reused on multiple non-adjecent edges. If so, these should be separated.
+    if len(vertices) != len(UVNodes):
+        vertices, triangles = unlink_edge_nodes(face, vertices, UVNodes, triangles)
+    return vertices, triangles
+
+def mesh_arrays(mesh: "Mesh::Mesh") -> tuple[np.ndarray]:
+    """
+    Returns the points and facets of the given mesh as (vertices, triangles) arrays.
+    The mesh topology is read in a single call, rather than per point / facet.
+    """
+    points, facets = mesh.Topology
+    vertices = np.array(points, dtype = np.float64).reshape((-1, 3))
+    triangles = np.array(facets, dtype = np.int32).reshape((-1, 3))
+    return vertices, triangles
+
+def weld_vertices(vertices: np.ndarray[np.float64], triangles: np.ndarray[np.int32], tolerance: float = 1e-3) -> tuple[np.ndarray]:
+    """
+    Welds all vertices that lay within the given tolerance of each other into a single vertex, removing any unused vertices and any triangles that become degenerate.
+
+    vertices: (N, 3) np.ndarray - The vertex positions
+    triangles: (T, 3) np.ndarray - The vertex indices of every triangle
+    """
+    if not len(vertices):
+        return vertices, triangles
+    # Group all coincident vertices. Every group is welded into its lowest index vertex.
+    coincident = sp.spatial.cKDTree(vertices).query_pairs(tolerance, output_type = "ndarray")
+    graph = sp.sparse.coo_array((np.ones((len(coincident),), dtype = np.int8), (coincident[:, 0], coincident[:, 1])), 2 * (len(vertices),))
+    n_groups, labels = sp.sparse.csgraph.connected_components(graph, directed = False)
+    representative = np.empty((n_groups,), dtype = np.intp)
+    representative[labels[::-1]] = np.arange(len(vertices) - 1, -1, -1)
+    triangles = representative[labels[triangles]]
+    # Remove the triangles which collapsed onto an edge or a point
+    triangles = triangles[(triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2]) & (triangles[:, 2] != triangles[:, 0])]
+    used, triangles = np.unique(triangles, return_inverse = True)
+    return vertices[used], triangles.reshape((-1, 3)).astype(np.int32)
+
+def mesh_brep(brep: str, params: tuple) -> list[tuple[np.ndarray]]:
+    """
+    Tessellates the shape stored in the given BREP string, and returns the (vertices, triangles) arrays of every face in the shape.
+    This function is executed by the worker processes.
+    """
+    shape = Part.Shape()
+    shape.importBrepFromString(brep, False)
+    mesh_shape(shape, params)
+    return [face_arrays(face) for face in shape.Faces]
+
+def mesh_breps(breps: list[str], params: tuple) -> list[list[tuple[np.ndarray]]]:
+    """
+    Tessellates the shapes stored in the given BREP strings in parallel, and returns the (vertices, triangles) arrays of every face in every shape.
+    Returns None if no worker processes could be started, in which case the shapes should be tessellated in the current process instead.
+    """
+    pool = get_pool()
+    if pool is None:
+        return None
+    try:
+        return [*pool.map(mesh_brep, breps, itertools.repeat(params))]
+    except Exception as error:
+        App.Console.PrintWarning(f"Parallel meshing failed, meshing in the current process instead: {error}\n")
+        shutdown_pool()
+        return None
+
+def process_count() -> int:
+    return App.ParamGet("User parameter:BaseApp/Preferences/Mod/UVUnwrap").GetInt("MeshProcesses", 0) or os.cpu_count() or 1
+
+def python_executable() -> str:
+    """
+    Finds the Python interpreter used to run the worker processes.
+    Within FreeCAD, sys.executable is usually the FreeCAD executable itself, which cannot be used to start the workers.
+    """
+    executable = App.ParamGet("User parameter:BaseApp/Preferences/Mod/UVUnwrap").GetString("PythonExecutable", "")
+    if executable:
+        return executable
+    if os.path.basename(sys.executable).lower().startswith("python"):
+        return sys.executable
+    for name in ("python", "python3", "python.exe"):
+        executable = os.path.join(App.getHomePath(), "bin", name)
+        if os.path.isfile(executable):
+            return executable
+    return shutil.which("python3")
+
+def get_pool() -> ProcessPoolExecutor:
+    """
+    Returns the worker pool, starting it if required.
+    """
+    global _pool, _pool_size
+    processes = process_count()
+    if _pool is not None and _pool_size == processes:
+        return _pool
+    shutdown_pool()
+    executable = python_executable()
+    if executable is None:
+        App.Console.PrintWarning("Parallel meshing is unavailable: no Python interpreter was found to run the worker processes\n")
+        return None
+    context = multiprocessing.get_context("spawn")
+    context.set_executable(executable)
+    try:
+        _pool = ProcessPoolExecutor(processes, mp_context = context)
+    except OSError as error:
+        App.Console.PrintWarning(f"Parallel meshing is unavailable: {error}\n")
+        return None
+    _pool_size = processes
+    return _pool
+
+def shutdown_pool():
+    global _pool, _pool_size
+    if _pool is not None:
+        _pool.shutdown(wait = False)
+    _pool = None
+    _pool_size = None
@@ -0,0 +1,220 @@
+"""
+This file contains the array based half-edge structure used to query the connectivity of a triangle mesh.
+
+Every triangle t has the three half-edges 3 * t + i, with half-edge i running from corner i to corner (i + 1) % 3 of the triangle. As such, the triangle of a half-edge is simply h // 3, and the next half-edge within the same triangle is 3 * (h // 3) + (h + 1) % 3.
+All other relations (the edge of every half-edge, the opposite half-edge and the half-edges around every vertex) are stored as flat arrays, with the variable length relations stored in a compressed (offsets + values) format. This way, all queries are O(1), while the structure itself is built using a handful of sorts.
+"""
+__all__ = ["MeshTopology", "edge_chains"]
+
+# Official module imports
+from functools import cached_property
+import numpy as np
+import scipy as sp
+
+class MeshTopology():
+    """
+    The connectivity of a triangle mesh.
+
+    n_vertices: int - The number of vertices in the mesh
+    triangles: (T, 3) array_like - The vertex indices of every triangle
+
+    Attributes:
+    edges: (E, 2) np.ndarray - The unique mesh edges, in the order [edge_node_0, edge_node_1], with edge_node_0 < edge_node_1, sorted lexicographically
+    halfedge_edge: (3T,) np.ndarray - The edge index of every half-edge
+    opposite: (3T,) np.ndarray - The opposite half-edge of every half-edge, or -1 if the edge is a boundary edge or a non-manifold edge
+    edge_counts: (E,) np.ndarray - The number of triangles using every edge
+    """
+    def __init__(self, n_vertices: int, triangles: np.ndarray[np.int32]):
+        self.n_vertices = n_vertices
+        self.triangles = np.asarray(triangles, dtype = np.intp).reshape((-1, 3))
+        self.origin = self.triangles.ravel()
+        self.destination = self.triangles[:, [1, 2, 0]].ravel()
+
+        # Group the half-edges by their (undirected) edge
+        keys = np.minimum(self.origin, self.destination) * n_vertices + np.maximum(self.origin, self.destination) # Encoded as a single integer, which is far cheaper to sort
+        order = np.argsort(keys, kind = "stable")
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.diff(sorted_keys, prepend = -1))
+        self.edge_keys = sorted_keys[starts]
+        self.edges = np.stack([self.edge_keys // n_vertices, self.edge_keys % n_vertices], axis = 1).reshape((-1, 2))
+        self.edge_offsets = np.append(starts, len(keys))
+        self.edge_halfedges = order
+        self.edge_counts = np.diff(self.edge_offsets)
+        self.halfedge_edge = np.empty((len(keys),), dtype = np.intp)
+        self.halfedge_edge[order] = np.repeat(np.arange(len(starts)), self.edge_counts)
+
+        # Only manifold edges (used by exactly 2 triangles) have an opposite half-edge
+        self.opposite = np.full((len(keys),), -1, dtype = np.intp)
+        first = order[starts[self.edge_counts == 2]]
+        second = order[starts[self.edge_counts == 2] + 1]
+        self.opposite[first] = second
+        self.opposite[second] = first
+
+        # Group the half-edges by their origin vertex
+        self.vertex_halfedges = np.argsort(self.origin, kind = "stable")
+        self.vertex_offsets = np.searchsorted(self.origin[self.vertex_halfedges], np.arange(n_vertices + 1))
+
+    def vertex_triangles(self, vertex: int) -> np.ndarray[np.intp]:
+        """
+        Returns the indices of all triangles using the given vertex.
+        """
+        return self.vertex_halfedges[self.vertex_offsets[vertex]:self.vertex_offsets[vertex + 1]] // 3
+
+    def edge_triangles(self, edge: int) -> np.ndarray[np.intp]:
+        """
+        Returns the indices of all triangles using the given edge.
+        """
+        return self.edge_halfedges[self.edge_offsets[edge]:self.edge_offsets[edge + 1]] // 3
+
+    def find_edges(self, nodes_0: np.ndarray[np.intp], nodes_1: np.ndarray[np.intp]) -> np.ndarray[np.intp]:
+        """
+        Returns the edge indices of the edges between the given vertex pairs, or -1 for any pair of vertices that is not connected by an edge.
+        """
+        nodes_0 = np.asarray(nodes_0, dtype = np.intp)
+        nodes_1 = np.asarray(nodes_1, dtype = np.intp)
+        keys = np.minimum(nodes_0, nodes_1) * self.n_vertices + np.maximum(nodes_0, nodes_1)
+        edges = np.searchsorted(self.edge_keys, keys)
+        found = edges < len(self.edge_keys)
+        found[found] = self.edge_keys[edges[found]] == keys[found]
+        return np.where(found, edges, -1)
+
+    @cached_property
+    def vertex_triangle(self) -> np.ndarray[np.intp]:
+        """
+        For every vertex, the index of one of the triangles using that vertex, or -1 if the vertex is not used by any triangle.
+        """
+        used = np.diff(self.vertex_offsets) > 0
+        triangle = np.full((self.n_vertices,), -1, dtype = np.intp)
+        triangle[used] = self.vertex_halfedges[self.vertex_offsets[:-1][used]] // 3
+        return triangle
+
+    @cached_property
+    def boundary_halfedges(self) -> np.ndarray[np.intp]:
+        """
+        The indices of all half-edges on the boundary of the mesh, i.e. the half-edges of edges that are used by only a single triangle.
+        """
+        return np.flatnonzero(self.edge_counts[self.halfedge_edge] == 1)
+
+    @property
+    def boundary_edges(self) -> np.ndarray[np.intp]:
+        """
+        The boundary edges of the mesh, in the same format as edges.
+        """
+        return self.edges[self.edge_counts == 1]
+
+    @cached_property
+    def boundary_vertices(self) -> np.ndarray[np.intp]:
+        """
+        The (sorted) indices of all vertices on the boundary of the mesh.
+        """
+        return np.unique(self.origin[self.boundary_halfedges])
+
+    @property
+    def boundary_loops(self) -> list[np.ndarray[np.intp]]:
+        """
+        The loops formed by the boundary edges of the mesh. Every loop is given as the ordered origin vertices of its half-edges, oriented in the same direction as the triangles bordering the loop.
+        At vertices where multiple loops touch (e.g. two triangles sharing only a vertex), the loops are split arbitrarily, such that a loop may not return to its first vertex. The vertex at which every loop ends is given by boundary_loop_ends.
+        """
+        return self.boundary_traversal[0]
+
+    @property
+    def boundary_loop_ends(self) -> np.ndarray[np.intp]:
+        """
+        For every boundary loop, the destination of its last half-edge. This is the first vertex of the loop if the loop is closed.
+        """
+        return self.boundary_traversal[1]
+
+    @cached_property
+    def boundary_traversal(self) -> tuple[list[np.ndarray[np.intp]], np.ndarray[np.intp]]:
+        """
+        Follows the boundary half-edges of the mesh, splitting them into the boundary_loops and their boundary_loop_ends.
+        """
+        halfedges = self.boundary_halfedges
+        # The boundary half-edge leaving every vertex, used to find the next half-edge along the loop
+        outgoing = np.full((self.n_vertices,), -1, dtype = np.intp)
+        outgoing[self.origin[halfedges]] = np.arange(len(halfedges))
+        successor = outgoing[self.destination[halfedges]].tolist()
+        origin = self.origin[halfedges].tolist()
+        destination = self.destination[halfedges].tolist()
+
+        loops = []
+        ends = []
+        visited = [False] * len(halfedges)
+        for start in range(len(halfedges)):
+            if visited[start]:
+                continue
+            loop = []
+            current = start
+            while current >= 0 and not visited[current]:
+                visited[current] = True
+                loop.append(origin[current])
+                last = current
+                current = successor[current]
+            loops.append(np.array(loop, dtype = np.intp))
+            ends.append(destination[last])
+        return loops, np.array(ends, dtype = np.intp)
+
+    @cached_property
+    def components(self) -> tuple[int, np.ndarray[np.intp]]:
+        """
+        The connected components of the mesh.
+
+        Returns:
+        n_components: int - The number of connected components. Vertices that are not used by any triangle form a component of their own.
+        labels: (N,) np.ndarray - The component index of every vertex
+        """
+        graph = sp.sparse.coo_array((np.ones((len(self.edges),), dtype = np.int8), (self.edges[:, 0], self.edges[:, 1])), (self.n_vertices, self.n_vertices))
+        return sp.sparse.csgraph.connected_components(graph, directed = False)
+
+    @property
+    def triangle_components(self) -> np.ndarray[np.intp]:
+        """
+        The component index of every triangle.
+        """
+        return self.components[1][self.triangles[:, 0]]
+
+def edge_chains(n_vertices: int, edges: np.ndarray[np.intp]) -> list[np.ndarray[np.intp]]:
+    """
+    Combines the given set of mesh edges into polylines. A polyline ends at any vertex that is not used by exactly two of the edges, such that the polylines do not pass through junctions.
+    Closed polylines start and end at the same vertex.
+
+    edges: (E, 2) array_like - The vertex indices of every edge
+
+    Returns:
+    A list of the ordered vertex indices along every polyline.
+    """
+    edges = np.asarray(edges, dtype = np.intp).reshape((-1, 2))
+    # The edges around every vertex, in a compressed (offsets + values) format
+    ends = edges.ravel()
+    order = np.argsort(ends, kind = "stable")
+    offsets = np.searchsorted(ends[order], np.arange(n_vertices + 1))
+    degree = np.diff(offsets)
+    starts = np.flatnonzero((degree != 2) & (degree > 0)).tolist()
+    degree = degree.tolist()
+    vertex_edges = (order // 2).tolist()
+    offsets = offsets.tolist()
+    edge_list = edges.tolist()
+
+    chains = []
+    used = [False] * len(edges)
+    def follow(vertex, edge):
+        chain = [vertex]
+        while True:
+            used[edge] = True
+            vertex = edge_list[edge][0] if edge_list[edge][1] == vertex else edge_list[edge][1]
+            chain.append(vertex)
+            if degree[vertex] != 2:
+                break
+            edge = next((e for e in vertex_edges[offsets[vertex]:offsets[vertex + 1]] if not used[e]), None)
+            if edge is None: # Closed loop
+                break
+        chains.append(np.array(chain, dtype = np.intp))
+    # Open polylines start at a vertex that is not used by exactly two edges. Any remaining edges form closed loops.
+    for vertex in starts:
+        for edge in vertex_edges[offsets[vertex]:offsets[vertex + 1]]:
+            if not used[edge]:
+                follow(vertex, edge)
+    for edge in range(len(edges)):
+        if not used[edge]:
+            follow(edge_list[edge][0], edge)
+    return chains
@@ -2,35 +2,44 @@ __all__ = ["unlink_edge_nodes"]
 
 # Official module imports
 import numpy as np
+import scipy as sp
 import FreeCAD
 
 # Local module imports
 from .utils import EnumerationDict
 
-def match_nodes(face: "OCCT::Face", vertices: list[FreeCAD.Base.Vector], UVNodes: list[tuple[float]], dtype: np.dtype = np.float32) -> list[tuple[int]]:
+def match_nodes(face: "OCCT::Face", vertices: np.ndarray[np.float64], UVNodes: list[tuple[float]], dtype: np.dtype = np.float32) -> list[tuple[int]]:
     """
     A function that will match the list of UV nodes to the related vertices in 3D space.
 
     Returns a list containing, for every vertex, the UV nodes related to this vertex.
     """
     # Get the 3D locations of the UV nodes
-    uv3D = [face.valueAt(*node) for node in UVNodes]
-    # Determine the separations between each vertex and every UV node. Rows are the vertices, columns are UV nodes.
-    separations = np.linalg.norm(np.array(vertices, dtype = dtype)[:, None, :] - np.array(uv3D, dtype = dtype)[None, :, :], axis = 2)
-    # For each UV node (column) determine the closest vertex
-    minima = separations == separations.min(axis = 0, keepdims = True)
+    # Note: OCCT does not provide a batched surface evaluation through the Python API. As such, this is the only per-node call.
+    uv3D = np.array([face.valueAt(*node) for node in UVNodes], dtype = dtype).reshape((-1, 3))
+    vertices = np.asarray(vertices, dtype = dtype).reshape((-1, 3))
+    matches = [[] for vertex in vertices]
+    if not len(vertices):
+        return [(*match,) for match in matches]
+    # For each UV node determine the closest vertex. The 2 closest vertices are queried, such that any equidistant vertices are also matched.
+    distances, indices = sp.spatial.cKDTree(vertices).query(uv3D, k = min(2, len(vertices)))
+    distances = distances.reshape((len(uv3D), -1))
+    indices = indices.reshape((len(uv3D), -1))
+    for node, (node_distances, node_indices) in enumerate(zip(distances.tolist(), indices.tolist())):
+        matches[node_indices[0]].append(node)
+        if len(node_indices) > 1 and node_distances[1] == node_distances[0]:
+            matches[node_indices[1]].append(node)
     # For every vertex, determine the linked UV nodes
-    matches = [(*row.nonzero()[0],) for row in minima]
-    return matches
+    return [(*match,) for match in matches]
 
-def unlink_edge_nodes(face: "OCCT::Face", vertices: list[FreeCAD.Base.Vector], UVNodes: list[tuple[float]], triangles: list[tuple[int]]):
+def unlink_edge_nodes(face: "OCCT::Face", vertices: np.ndarray[np.float64], UVNodes: list[tuple[float]], triangles: np.ndarray[np.int32]) -> tuple[np.ndarray]:
     """
     Takes a face mesh which might have reused vertices if it has a shared edge with itself (as might be the case for e.g. a cone), and separates reused vertices based on what side of the edge the node is on.
 
     face: OCCT::Face object
-    vertices: list[Base.Vector] - The vertices / positions as given by the tessellation
+    vertices: (N, 3) np.ndarray - The vertices / positions as given by the tessellation
     uvNodes: list[tuple[float]] - The UV nodes in the tessellation as given by the face.getUVNodes() function
-    triangles: list[tuple[int]] - The vertex indices of the triangle as given by the tessellation
+    triangles: (T, 3) np.ndarray - The vertex indices of the triangle as given by the tessellation
     """
     # Config
     weighting = 0.9 # The weighting of the positions for the sample point.
@@ -41,7 +50,7 @@ def unlink_edge_nodes(face: "OCCT::Face", vertices: list[FreeCAD.Base.Vector], U
 
     _triangles = []
 
-    for triangle in triangles:
+    for triangle in triangles.tolist():
         _triangle = []
         for i_vertex, vertex in enumerate(triangle):
             # If there is no conflict of multiple UV nodes being applicable to this vertex, simply use this vertex.
@@ -52,11 +61,11 @@ def unlink_edge_nodes(face: "OCCT::Face", vertices: list[FreeCAD.Base.Vector], U
             else:
                 others = triangle[:i_vertex] + triangle[i_vertex + 1:]
                 sampling_point = weighting * vertices[vertex] + 0.5 * (1 - weighting) * (vertices[others[0]] + vertices[others[1]])
-                uv_ref = face.Surface.parameter(sampling_point)
+                uv_ref = face.Surface.parameter(FreeCAD.Base.Vector(*sampling_point))
                 nearest = min(matches[vertex], key = lambda uv_index: (UVNodes[uv_index][0] - uv_ref[0])**2 + (UVNodes[uv_index][1] - uv_ref[1])**2)
                 _triangle.append(index_cache[(vertex, nearest)])
 
         _triangles.append(_triangle)
 
-    _vertices = [vertices[index[0]] for index in index_cache.keys()]
-    return _vertices, _triangles
+    _vertices = vertices[[index[0] for index in index_cache.keys()]]
+    return _vertices, np.array(_triangles, dtype = np.int32).reshape((-1, 3))
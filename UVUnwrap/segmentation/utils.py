@@ -1,3 +1,5 @@
+import numpy as np
+
 class EnumerationDict(dict):
     """
     A data structure for storing sequential indices for hashable items.
@@ -10,3 +12,78 @@ class EnumerationDict(dict):
             value = len(self)
             self[key] = value
             return value
+
+class UnionFind():
+    """
+    A disjoint-set data structure over the integers [0, n), used to keep track of which items have been merged together.
+    """
+    def __init__(self, n: int):
+        self.parent = [*range(n)]
+        self.size = [1] * n
+
+    def find(self, item: int) -> int:
+        """
+        Returns the representative item of the set containing the given item.
+        """
+        parent = self.parent
+        while parent[item] != item:
+            # Path halving: point every other item on the path to its grandparent
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, item0: int, item1: int) -> int:
+        """
+        Merges the sets containing both items, and returns the representative item of the merged set.
+        """
+        root0 = self.find(item0)
+        root1 = self.find(item1)
+        if root0 == root1:
+            return root0
+        # Union by size, to keep the trees shallow
+        if self.size[root0] < self.size[root1]:
+            root0, root1 = root1, root0
+        self.parent[root1] = root0
+        self.size[root0] += self.size[root1]
+        return root0
+
+    def roots(self) -> np.ndarray[np.intp]:
+        """
+        Returns, for every item, the representative item of its set.
+        """
+        return np.array([self.find(item) for item in range(len(self.parent))], dtype = np.intp)
+
+class ShapeSet():
+    """
+    A set of TopoShapes, in which shapes are considered equal if they are the same OCCT shape (isSame: same TShape and Location, regardless of orientation).
+    The shapes are bucketed by their hashCode, such that isSame only needs to be checked for shapes with colliding hashes.
+    """
+    def __init__(self, shapes = ()):
+        self.buckets = {}
+        self.shapes = []
+        for shape in shapes:
+            self.add(shape)
+
+    def add(self, shape) -> bool:
+        """
+        Adds the shape to the set. Returns False if the shape was already included.
+        """
+        bucket = self.buckets.setdefault(shape.hashCode(), [])
+        if any(shape.isSame(other) for other in bucket):
+            return False
+        bucket.append(shape)
+        self.shapes.append(shape)
+        return True
+
+    def clear(self):
+        self.buckets.clear()
+        self.shapes.clear()
+
+    def __contains__(self, shape) -> bool:
+        return any(shape.isSame(other) for other in self.buckets.get(shape.hashCode(), ()))
+
+    def __iter__(self):
+        return iter(self.shapes)
+
+    def __len__(self) -> int:
+        return len(self.shapes)
@@ -8,16 +8,19 @@ At the same time, each of these generated meshes have a lot in common, sharing t
 # Official module imports
 import os
 import math
+import hashlib
+import numpy as np
 import FreeCAD as App
 import FreeCADGui as Gui
-import Part
-from functools import cached_property
-import itertools
 
 # Local module imports
 import UVUlib
-from segmentation.FaceMesh import FaceMesh
+from segmentation.FaceMesh import FaceMesh, mesh_digest
+from segmentation import mesh_file
+from segmentation.topology import MeshTopology, edge_chains
 from .project import *
+from .islands import Island, find_islands, map_islands
+from .decimation import decimate, prolongation_matrix
 
 class UVMesh():
     """
@@ -28,30 +31,131 @@ class UVMesh():
         self.obj = obj
         obj.addProperty("App::PropertyLink", "Source", "Main", "The source FaceMesh to be unwrapped")
         obj.addProperty("App::PropertyBool", "SaveMesh", "Main", "Determines whether the mesh data should be included in the save file").SaveMesh = False
+        self.add_persistence_properties(obj)
 
         if faceMesh is not None:
             self.obj.Source = UVUlib.get_feature(faceMesh)
         # The UV coordinates of the UV unwrapped mesh.
         self.uv = []
+        self.restore_pending = False # Whether the UV coordinates stored in the document still need to be loaded
+        self.legacy_uv = None
+
+    def add_persistence_properties(self, obj):
+        obj.addProperty("App::PropertyFileIncluded", "UVData", "Main", "The UV coordinates stored in the save file", 4 | 8) # Hidden, and does not touch the object when changed
 
     def __getstate__(self):
-        if self.obj.SaveMesh:
-            return {
-                "uv": self.uv,
-                }
-        else:
-            return {}
+        # The UV coordinates are stored in the UVData file instead
+        return {}
     def __setstate__(self, state):
-        self.uv = state.get("uv", [])
+        self.uv = []
+        self.restore_pending = False
+        # Objects saved before the binary storage was introduced store the UV coordinates in the state instead, if SaveMesh was enabled
+        self.legacy_uv = state.get("uv") if state else None
 
     def onDocumentRestored(self, obj):
         self.obj = obj
         self.obj.ViewObject.Proxy.obj = self.obj.ViewObject
-        self.execute(self.obj)
+        # Objects saved before the binary storage was introduced lack the related properties
+        if not hasattr(obj, "UVData"):
+            self.add_persistence_properties(obj)
+        # The UV coordinates are only restored once they are first used. The stored coordinates are loaded if available, otherwise the UV mesh is recomputed.
+        # Nothing is validated here, since the checksum of the current inputs requires the mesh of the source FaceMesh. The checksum stored with the coordinates is only compared once they are loaded (see restore_uv).
+        stored = obj.SaveMesh and (bool(obj.UVData) or self.legacy_uv is not None)
+        if stored or UVUlib.lazy_restore():
+            self.restore_pending = True
+            if not stored:
+                obj.touch() # Marks the object as requiring a recompute
+        else:
+            self.execute(self.obj)
+
+    @property
+    def unwrap_params(self) -> tuple:
+        """
+        All parameters, other than the source mesh, which affect the generated UV coordinates.
+        """
+        return ()
+
+    def checksum(self, unwrap_params: tuple = None) -> str:
+        """
+        A hash of all inputs of the UV coordinates: the source mesh and the unwrapping parameters.
+
+        unwrap_params: tuple - The unwrapping parameters, if already known (e.g. during the recompute). Otherwise, they are determined from the object.
+        """
+        faceMesh = self.obj.Source.Proxy
+        if unwrap_params is None:
+            unwrap_params = self.unwrap_params
+        return hashlib.sha256(repr((type(self).__name__, mesh_digest(faceMesh.vertex_array, faceMesh.triangle_array), unwrap_params)).encode()).hexdigest()
+
+    def store_uv(self, unwrap_params: tuple = None):
+        """
+        Stores the UV coordinates in the document, or removes them if the mesh should not be saved.
+
+        unwrap_params: tuple - The unwrapping parameters the UV coordinates were generated with, if already known. Otherwise, they are determined from the object.
+        """
+        if self.obj.SaveMesh:
+            mesh_file.write(self.obj, "UVData", self.checksum(unwrap_params), uv = self.uv.astype(np.float32))
+        else:
+            mesh_file.clear(self.obj, "UVData")
+
+    def restore_uv(self):
+        """
+        Loads the UV coordinates stored in the document, or those stored in the state of objects saved before the binary storage was introduced. If the stored coordinates are missing, or were generated from different inputs than the current ones, the UV mesh is recomputed instead.
+        Called when the UV coordinates of a restored object are first used.
+        """
+        self.restore_pending = False
+        data = mesh_file.read(self.obj, "UVData", self.checksum())
+        legacy = data is None and self.legacy_uv is not None
+        if legacy:
+            # The legacy UV coordinates lack a checksum, such that only their vertex count can be validated
+            data = {"uv": np.array(self.legacy_uv, dtype = np.float64).reshape((-1, 2))}
+        self.legacy_uv = None
+        if data is None or len(data["uv"]) != len(self.vertex_array):
+            self.execute(self.obj)
+            self.obj.purgeTouched() # The deferred recompute is done
+            return
+        self.uv = data["uv"]
+        if legacy:
+            self.store_uv() # Moves the UV coordinates into the UVData file
 
     def claimChildren(self):
         return [self.obj.Source]
 
+    def add_decimation_properties(self, obj):
+        obj.addProperty("App::PropertyBool", "Decimate", "Decimation", "Simplifies the mesh before unwrapping it, which greatly reduces the unwrapping time of finely tessellated meshes. The uv coordinates of the removed vertices are interpolated from the unwrapped simplified mesh.").Decimate = False
+        obj.addProperty("App::PropertyInteger", "TargetVertices", "Decimation", "The number of vertices the mesh is simplified to. Vertices on the boundary of the mesh are never removed, so the simplified mesh may contain more vertices.").TargetVertices = 2000
+
+    def decimate_islands(self, islands: list[Island], locked: list[list[int]] = None) -> list[tuple]:
+        """
+        Simplifies every island of the source mesh, if decimation is enabled. The target vertex count is distributed over the islands proportional to their size.
+
+        locked: list[list[int]] - For every island, the island-local indices of the vertices that may not be removed (e.g. pinned vertices)
+
+        Returns, for every island:
+        coarse: Island - The simplified island, with its vertices indexing into the source mesh
+        kept: np.ndarray - The island-local indices of the retained vertices
+        prolongation: sp.sparse.csr_array - The matrix interpolating the uv coordinates of the simplified island onto all vertices of the island. None if the island is not simplified.
+        """
+        if locked is None:
+            locked = [None] * len(islands)
+        if not self.obj.Decimate:
+            return [(island, np.arange(len(island.vertices)), None) for island in islands]
+        vertex_array = self.vertex_array
+        n_vertices = sum(len(island.vertices) for island in islands)
+        def decimate_island(island, locked):
+            target = max(3, round(self.obj.TargetVertices * len(island.vertices) / n_vertices))
+            if len(island.vertices) <= target:
+                return (island, np.arange(len(island.vertices)), None)
+            kept, triangles = decimate(vertex_array[island.vertices], island.triangles, target, locked)
+            return (Island(island.vertices[kept], triangles), kept, prolongation_matrix(vertex_array[island.vertices], kept, triangles))
+        return map_islands(decimate_island, islands, locked)
+
+    @staticmethod
+    def prolong(uvs: list[np.ndarray[np.float64]], decimated: list[tuple]) -> list[np.ndarray[np.float64]]:
+        """
+        Interpolates the uv coordinates of the simplified islands back onto all vertices of the islands.
+        """
+        return [uv if prolongation is None else prolongation @ np.asarray(uv, dtype = np.float64).reshape((-1, 2)) for uv, (coarse, kept, prolongation) in zip(uvs, decimated)]
+
     @property
     def vertices(self):
         try:
@@ -65,154 +169,151 @@ class UVMesh():
         except AttributeError:
             return []
     @property
+    def vertex_array(self) -> np.ndarray[np.float64]:
+        try:
+            return self.obj.Source.Proxy.vertex_array
+        except AttributeError:
+            return np.empty((0, 3), dtype = np.float64)
+    @property
+    def triangle_array(self) -> np.ndarray[np.int32]:
+        try:
+            return self.obj.Source.Proxy.triangle_array
+        except AttributeError:
+            return np.empty((0, 3), dtype = np.int32)
+    @property
+    def topology(self) -> MeshTopology:
+        """
+        The connectivity of the UV Mesh.
+        """
+        return self.obj.Source.Proxy.topology
+    @property
+    def fused_edge_array(self) -> np.ndarray[np.int32]:
+        """
+        The (E, 2) edges of the UV Mesh along which faces were fused together.
+        """
+        return self.obj.Source.Proxy.fused_edge_array
+    @property
+    def islands(self) -> list[Island]:
+        """
+        The disconnected islands of the source mesh, which can each be unwrapped independently.
+        """
+        faceMesh = self.obj.Source.Proxy
+        if getattr(self, "_islands_revision", None) != faceMesh.revision:
+            self._islands = find_islands(faceMesh.topology)
+            self._islands_revision = faceMesh.revision
+        return self._islands
+    @property
     def valid(self) -> bool:
         return hasattr(self.obj.Source, "Proxy") and isinstance(self.obj.Source.Proxy, FaceMesh) and \
-               len(self.vertices) == len(self.uv)
+               len(self.vertex_array) == len(self.uv)
 
-    @cached_property
+    @property
+    def uv(self) -> np.ndarray[np.float64]:
+        """
+        The (N, 2) UV coordinates of the UV unwrapped mesh. Setting the UV coordinates clears all derived properties.
+        """
+        if self.restore_pending:
+            self.restore_uv()
+        return self._uv
+    @uv.setter
+    def uv(self, value):
+        self._uv = np.ascontiguousarray(value, dtype = np.float64).reshape((-1, 2))
+        self.clear_cache()
+
+    @property
     def uv_area(self) -> float:
         """
         The area of the calculated UV Mesh.
         """
-        return sum(abs( \
-            (self.uv[triangle[1]][0] - self.uv[triangle[0]][0]) * (self.uv[triangle[2]][1] - self.uv[triangle[0]][1]) - \
-            (self.uv[triangle[1]][1] - self.uv[triangle[0]][1]) * (self.uv[triangle[2]][0] - self.uv[triangle[0]][0])) \
-                   for triangle in self.triangles) / 2
+        return self.uv_properties["uv_area"]
 
     @property
     def bounds(self) -> tuple[float]:
         """
         Returns the bounding box of the UV Mesh in the form (x_min, y_min, x_max, y_max)
         """
-        return (
-            min(i[0] for i in self.uv),
-            min(i[1] for i in self.uv),
-            max(i[0] for i in self.uv),
-            max(i[1] for i in self.uv),
-            )
+        return self.uv_properties["bounds"]
 
-    @cached_property
-    def normalised_uv(self):
+    @property
+    def normalised_uv(self) -> np.ndarray[np.float64]:
         """
         The area-normalised UV coordinates.
         When packing multiple meshes into the same file, it is highly recommended to use these coordinates over the ones generated in .uv, to ensure a similar texture resolution / pixel density over the entire model.
         """
-        if self.uv_area == 0:
-            return []
-        transform = self.normal_transform[:2]
-        return [transform @ [*p, 1] for p in self.uv]
+        return self.uv_properties["normalised_uv"]
 
-    @cached_property
+    @property
     def normalised_bounds(self) -> tuple[float]:
         """
         Returns the bounding box of the area-normalised UV Mesh in the form (x_min, y_min, x_max, y_max)
         """
-        return (
-            min(i[0] for i in self.normalised_uv), # Should be 0 by definition of normalised_uv
-            min(i[1] for i in self.normalised_uv), # Should be 0 by definition of normalised_uv
-            max(i[0] for i in self.normalised_uv),
-            max(i[1] for i in self.normalised_uv),
-            )
+        return self.uv_properties["normalised_bounds"]
+
+    @property
+    def normal_transform(self) -> np.ndarray[np.float64]:
+        """
+        The (3, 3) transformation matrix from the UV coordinates to the area-normalised UV coordinates.
+        """
+        return self.uv_properties["normal_transform"]
+
+    @property
+    def uv_properties(self) -> dict:
+        """
+        All properties derived from the UV coordinates, which are calculated together the first time any of them is requested.
+        If the UV Mesh has no area, the normalised coordinates are empty, and the normal transform only moves the mesh to the origin.
+        """
+        if self._uv_properties is not None:
+            return self._uv_properties
+        uv = self.uv
+        triangles = self.triangle_array
+        e1 = uv[triangles[:, 1]] - uv[triangles[:, 0]]
+        e2 = uv[triangles[:, 2]] - uv[triangles[:, 0]]
+        uv_area = float(np.abs(e1[:, 0] * e2[:, 1] - e1[:, 1] * e2[:, 0]).sum() / 2)
+        bounds = (*uv.min(axis = 0).tolist(), *uv.max(axis = 0).tolist()) if len(uv) else (0., 0., 0., 0.)
+
+        scale = math.sqrt(self.obj.Source.Proxy.mesh_area / uv_area) if uv_area > 0 else 1.
+        normal_transform = UVUlib.get_layout_transform([-bounds[0] * scale, -bounds[1] * scale, scale, 0])
+        if uv_area > 0:
+            normalised_uv = UVUlib.transform_points(normal_transform, uv)
+            normalised_bounds = (*normalised_uv.min(axis = 0).tolist(), *normalised_uv.max(axis = 0).tolist())
+        else:
+            normalised_uv = np.empty((0, 2), dtype = np.float64)
+            normalised_bounds = (0., 0., 0., 0.)
 
-    @cached_property
-    def normal_transform(self):
-        scale = math.sqrt(self.obj.Source.Proxy.mesh_area / self.uv_area)
-        offset = (-min(p[0] for p in self.uv) * scale, -min(p[1] for p in self.uv) * scale)
-        return UVUlib.get_layout_transform([*offset, scale, 0])
+        self._uv_properties = {
+            "uv_area": uv_area,
+            "bounds": bounds,
+            "normalised_uv": normalised_uv,
+            "normalised_bounds": normalised_bounds,
+            "normal_transform": normal_transform,
+            }
+        return self._uv_properties
 
     def clear_cache(self):
         """
         Clears all cached properties (if they exist) such that they will be recalculated the next time they are queried.
         """
-        try: del self.uv_area
-        except: pass
-        try: del self.normal_transform
-        except: pass
-        try: del self.normalised_uv
-        except: pass
-        try: del self.normalised_bounds
-        except: pass
+        self._uv_properties = None
 
     @property
     def draw_edges(self):
         """
         For every edge in the mesh, returns the uv coordinates of the edge, as well as whether the edge is an internal or an external edge.
 
+        The external edges are the boundary loops of the mesh, which includes both sides of every edge along which the mesh is cut. The internal edges are the edges along which faces were fused together, split at every junction.
+
         Returns:
         [(edge_coords, edge_mode), ...]
         edge_coords: A list of un-transformed UV coordinates that form the edge boundary line
         edge_mode: bool - False if the edge is an exterior edge. True if the edge is interior only.
         """
-        tolerance = 1e-3
-        # Resolve all included edges without duplicates
-        edges = set().union(*(UVUlib.resolve_subfeatures_edge(face) for face in self.obj.Source.Proxy.faces))
-
-        for edge in edges:
-            edgeShape = UVUlib.get_feature(edge)
-            edge_nodes = [i for i, vertex in enumerate(self.vertices) if edgeShape.isInside(vertex, tolerance, False)]
-            # Find all the segments that lay on the edge. Every triangle may
-            # not provide more than 2 segments, since any more than that is
-            # likely to include faulty backtracking segments that don't actually
-            # lay on the edge.
-            edge_segments = sum(
-                ([*itertools.combinations(filter(lambda i: i in edge_nodes, tri), 2)]
-                     for tri in self.triangles)
-                , start = [])
-            edge_nodes = set().union(*edge_segments) # Filter out unused edge nodes that originated from a different terminally coincident edge
-
-            if not edge_segments:
-                App.Console.PrintWarning("Edge without segments\n")
-                continue
-
-            # Determine the edge mode (internal / external) and draw count
-            shape = next(UVUlib.get_feature_shapes(edge, implicit = True))
-            faces = shape.ancestorsOfType(edgeShape, Part.Face)
-            face_included = [any(face.isSame(i) for i in self.obj.Source.Proxy.topo_faces) for face in faces]
-            if len(face_included) == 1: # Ensure that seems of e.g. a cone or cylinder are properly handled.
-                face_included *= 2
-            # Edge is interior ONLY if it is fused, and all adjecent faces are included.
-            interior_edge = edge in self.obj.Source.Proxy.edges and all(face_included)
-            draw_count = 1 if interior_edge else sum(face_included)
-
-            # Find the points that start / end the edge
-            start_point = edgeShape.Vertexes[0]
-            start_idxs = [i for i in edge_nodes if start_point.isInside(self.vertices[i], tolerance, False)]
-            end_point = edgeShape.Vertexes[-1]
-            end_idxs = [i for i in edge_nodes if end_point.isInside(self.vertices[i], tolerance, False)]
-
-            # Generate all uv-space edges
-            for draw_i in range(draw_count):
-                # For any second edge, update the start_idxs
-                if draw_i:
-                    edge_nodes = set().union(*edge_segments) # Filter out unused edge nodes that originated from a different terminally coincident edge
-                    start_idxs = [i for i in start_idxs if i in edge_nodes]
-                    end_idxs = [i for i in end_idxs if i in edge_nodes]
-                # Create a the actual line
-                cur_idx = start_idxs[0]
-                edge_coords = [self.uv[cur_idx]]
-                edge_idxs = {cur_idx}
-                while edge_segments and (cur_idx not in end_idxs or len(edge_coords) <= 1):
-                    # The next segment is chosen as:
-                    # If possible, go to a new vertex (avoids backtracking in triangle fans).
-                    # If at least ones without backtrack, take the shortest segment (avoids corner cutting)
-                    # If none without backtrack, pick one that goes to an end_idx (circular edge) (or if not possible, pick any but that shouldn't happen anyway)
-                    candidates = [*filter(lambda seg: cur_idx in seg, edge_segments)]
-                    no_backtrack = [*filter(lambda seg: any(i not in edge_idxs for i in seg), candidates)]
-                    if no_backtrack:
-                        next_seg = min(no_backtrack,
-                                       key = lambda seg: sum((i - j)**2 for i, j in zip(self.uv[seg[0]], self.uv[seg[1]]))
-                                       )
-                    else:
-                        next_seg = next((seg for seg in candidates if any(i in end_idxs for i in seg)), candidates[0])
-                    edge_segments.remove(next_seg)
-                    # If necessary, flip the segment direction
-                    if next_seg[1] == cur_idx:
-                        next_seg = next_seg[-1::-1]
-                    cur_idx = next_seg[1]
-                    edge_coords.append(self.uv[cur_idx])
-                    edge_idxs.add(cur_idx)
-
-                yield (edge_coords, interior_edge)
+        uv = self.uv
+        topology = self.topology
+        # A loop is only closed if its last half-edge returns to its first vertex, which is not the case for loops split at a pinched vertex
+        for loop, end in zip(topology.boundary_loops, topology.boundary_loop_ends):
+            yield (uv[np.append(loop, end)].tolist(), False)
+        for chain in edge_chains(len(uv), self.fused_edge_array):
+            yield (uv[chain].tolist(), True)
 
 class UVMeshVP():
     def __init__(self, obj):
@@ -2,6 +2,7 @@
 import os
 import FreeCAD as App
 import FreeCADGui as Gui
+import numpy as np
 
 # Local module imports
 import UVUlib
@@ -9,15 +10,38 @@ from Exceptions import *
 import dialogs
 from .UVMesh import UVMesh, UVMeshVP
 from segmentation.FaceMesh import FaceMesh
-from .lscm import unwrap_lscm
+from .lscm import LSCMSystem
+from .islands import Island, map_islands, stitch_islands
 
 class UVMeshLSCM(UVMesh):
     def __init__(self, obj, faceMesh: tuple[str] = None, pins: list[tuple[str]] = []):
         super().__init__(obj, faceMesh)
         obj.addProperty("App::PropertyLinkList", "Pins", "LSCM", "The pins which pin specific vertices at particular local UV coordinates").Pins = [UVUlib.get_feature(pin) for pin in pins]
-        obj.addProperty("App::PropertyBool", "AllowLargeMesh", "LSCM", "Enables calculations for 'large' meshes (>3000 vertices). Note that this may take a long time, causing the program to go unresponsive.").AllowLargeMesh = False
+        obj.addProperty("App::PropertyBool", "AllowLargeMesh", "LSCM", "Enables calculations for 'large' meshes (>3000 vertices) using the Direct solver. Note that this may take a long time, causing the program to go unresponsive.").AllowLargeMesh = False
+        self.add_solver_properties(obj)
+        self.add_decimation_properties(obj)
+        self.clear_system()
+
+    def add_solver_properties(self, obj):
+        obj.addProperty("App::PropertyEnumeration", "Solver", "LSCM", "The solver used. Direct is fastest for small meshes and repeated pin edits. The iterative solvers (LSQR, CG) do not form the normal equations, and scale to large meshes.").Solver = LSCMSystem.solvers
+        obj.addProperty("App::PropertyFloat", "Tolerance", "LSCM", "The relative convergence tolerance of the iterative solvers.").Tolerance = 1e-8
+        obj.addProperty("App::PropertyInteger", "MaxIterations", "LSCM", "The maximum number of iterations of the iterative solvers. Large meshes may require more iterations, in which case a warning is shown.").MaxIterations = 2000
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self.clear_system()
+
+    def onDocumentRestored(self, obj):
+        # Objects saved before the solver selection was introduced lack the related properties
+        if not hasattr(obj, "Solver"):
+            self.add_solver_properties(obj)
+        # Objects saved before decimation was introduced lack the related properties
+        if not hasattr(obj, "Decimate"):
+            self.add_decimation_properties(obj)
+        super().onDocumentRestored(obj)
 
     def execute(self, obj):
+        self.restore_pending = False
         if not hasattr(obj.Source, "Proxy") or not isinstance(obj.Source.Proxy, FaceMesh):
             raise RuntimeError("Invalid source object selected. Source must be a FaceMesh object.")
         self.recompute_pinned()
@@ -27,12 +51,68 @@ class UVMeshLSCM(UVMesh):
             raise UnderconstrainedMeshException("All pinned vertices in the LSCM UV Mesh are constrained to the same coordinates. This would yield a singular UV mesh.")
         elif len(self.pinned_vertices) != len(set(self.pinned_vertices)):
             raise OverconstrainedMeshException("A node within the LSCM UV Mesh is multiply constrained. Please ensure each vertex only has one constrained UV coordinate.")
-        elif len(self.vertices) > 3000 and not self.obj.AllowLargeMesh:
-            raise LargeMeshException(f"The provided mesh has {len(self.vertices)} vertices, which is more than the allowed 3000. Calculating the LSCM for such a large mesh might take a long time. Either reduce mesh detail level, or enable AllowLargeMesh for the UVMeshLSCM object.")
 
         faceMesh = obj.Source.Proxy
-        self.uv = unwrap_lscm(faceMesh.vertices, faceMesh.triangles, self.pinned_vertices, self.pinned_uvs)
-        self.clear_cache()
+        islands = self.islands
+        island_pins = self.split_pins(islands)
+        for i, (pinned_vertices, pinned_uvs) in enumerate(island_pins):
+            if len(pinned_vertices) < 2:
+                raise UnderconstrainedMeshException(f"Island {i + 1} of the {len(islands)} disconnected islands in the LSCM UV Mesh has less than 2 pinned vertices. Each island is unwrapped independently, and must be constrained separately.")
+            elif len(set(pinned_uvs)) < 2:
+                raise UnderconstrainedMeshException(f"All pinned vertices in island {i + 1} of the {len(islands)} disconnected islands in the LSCM UV Mesh are constrained to the same coordinates. This would yield a singular UV mesh.")
+
+        # The factorised systems only depend on the (simplified) mesh and the set of pinned vertices. If neither changed (e.g. only a pin was moved), the cached systems can be reused.
+        # The pinned vertices are never removed when simplifying the mesh, and are mapped to their index in the simplified islands.
+        system_key = (faceMesh.revision, tuple(sorted(self.pinned_vertices)), obj.Decimate, obj.TargetVertices)
+        if self.system_key != system_key:
+            self.clear_system()
+            self.decimated = self.decimate_islands(islands, [pins[0] for pins in island_pins])
+            self.systems = map_islands(lambda coarse, pins: LSCMSystem(faceMesh.vertex_array[coarse[0].vertices], coarse[0].triangles, [int(i) for i in np.searchsorted(coarse[1], pins[0])]), self.decimated, island_pins)
+            self.system_key = system_key
+        # The size of the system is that of the simplified mesh, which may be larger than the target vertex count, since boundary vertices are never removed
+        n_vertices = sum(len(coarse[0].vertices) for coarse in self.decimated)
+        if n_vertices > 3000 and self.obj.Solver == "Direct" and not self.obj.AllowLargeMesh:
+            raise LargeMeshException(f"The {'simplified ' if obj.Decimate else ''}mesh has {n_vertices} vertices, which is more than the allowed 3000. Calculating the LSCM for such a large mesh might take a long time. Either reduce mesh detail level, enable Decimate (or lower its TargetVertices), select an iterative Solver, or enable AllowLargeMesh for the UVMeshLSCM object.")
+        coarse_pins = [([int(i) for i in np.searchsorted(kept, pins[0])], pins[1]) for (coarse, kept, prolongation), pins in zip(self.decimated, island_pins)]
+        # The previous solution is used to warm-start the iterative solvers
+        uv0 = self.uv if len(self.uv) == len(self.vertex_array) else None
+        uvs = map_islands(lambda system, coarse, pins: system.solve(*pins, self.obj.Solver,
+                uv0 = None if uv0 is None else uv0[coarse[0].vertices], tolerance = self.obj.Tolerance, max_iterations = self.obj.MaxIterations),
+            self.systems, self.decimated, coarse_pins)
+        self.uv = stitch_islands(len(self.vertex_array), islands, self.prolong(uvs, self.decimated))
+        self.store_uv()
+
+    @property
+    def unwrap_params(self) -> tuple:
+        self.recompute_pinned()
+        return (self.pinned_vertices, self.pinned_uvs, self.obj.Solver, self.obj.Tolerance, self.obj.MaxIterations, self.obj.Decimate, self.obj.TargetVertices)
+
+    def split_pins(self, islands: list[Island]) -> list[tuple[list]]:
+        """
+        Distributes the pinned vertices over the islands of the mesh.
+
+        Returns, for every island, the island-local indices of the pinned vertices, and their pinned uv coordinates.
+        """
+        island_index = np.full((len(self.vertex_array),), -1, dtype = np.intp)
+        local_index = np.empty((len(self.vertex_array),), dtype = np.intp)
+        for i, island in enumerate(islands):
+            island_index[island.vertices] = i
+            local_index[island.vertices] = np.arange(len(island.vertices))
+
+        island_pins = [([], []) for island in islands]
+        for vertex, uv in zip(self.pinned_vertices, self.pinned_uvs):
+            if island_index[vertex] >= 0:
+                island_pins[island_index[vertex]][0].append(int(local_index[vertex]))
+                island_pins[island_index[vertex]][1].append(uv)
+        return island_pins
+
+    def clear_system(self):
+        """
+        Clears the cached factorised LSCM systems, such that these will be regenerated during the next recompute.
+        """
+        self.systems = []
+        self.decimated = []
+        self.system_key = None
 
     def recompute_pinned(self):
         self.pinned_vertices = []
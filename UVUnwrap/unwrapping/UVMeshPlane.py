@@ -11,6 +11,7 @@ from Exceptions import *
 import dialogs
 from .UVMesh import UVMesh, UVMeshVP
 from segmentation.FaceMesh import FaceMesh
+from .project import plane_frame
 
 class UVMeshPlane(UVMesh):
     def __init__(self, obj):
@@ -29,18 +30,26 @@ class UVMeshPlane(UVMesh):
         obj.addProperty("App::PropertyAngle", "Angle", "Reference 3", "The rotation of the projection plane w.r.t. the default orientation")
 
     def execute(self, obj):
+        self.restore_pending = False
         if not hasattr(obj.Source, "Proxy") or not isinstance(obj.Source.Proxy, FaceMesh):
             raise RuntimeError("Invalid source object selected. Source must be a FaceMesh object.")
 
+        # The projection is applied to all vertices at once: uv = R @ (p - origin)
         matrix = self.projection_matrix
-        self.uv = [(*(matrix @ [*p, 1.]),) for p in self.vertices]
-        self.clear_cache()
+        self.uv = self.vertex_array @ matrix[:, :3].T + matrix[:, 3]
+        # The matrix is passed on for the checksum of the stored UV coordinates, such that the references are only resolved once
+        self.store_uv((matrix.tolist(),))
 
 
+    @property
+    def unwrap_params(self) -> tuple:
+        return (self.projection_matrix.tolist(),)
+
     @property
     def projection_matrix(self) -> np.ndarray[np.float64]:
         """
         Generates the matrix that, when multiplied with the 4-component vertex, gives the 2 component uv coordinates.
+        The reference datums are only resolved once for the entire matrix.
         """
         # Translation: 4 (x, y, z, 1) -> 3 (x, y z)
         translation = np.array([
@@ -50,55 +59,22 @@ class UVMeshPlane(UVMesh):
             [*(-self.origin)],
             ], dtype = np.float64).T
         # Rotation: 3 (x, y, z) -> 2 (u, v)
-        rotation = np.array([
-            self.u_dir,
-            self.v_dir,
-            ], dtype = np.float64)
+        rotation = self.uv_dir
 
         return rotation @ translation
 
     @property
-    def _xy_dir(self) -> tuple[App.Base.Vector]:
+    def uv_dir(self) -> np.ndarray[np.float64]:
         """
-        Returns the x_dir and y_dir vectors (the preliminary u and v, before angle rotation).
+        Returns the u_dir and v_dir vectors as the rows of a (2, 3) array, i.e. the x_dir and y_dir vectors of the placement mode rotated by the angle of the projection plane.
+        The first reference is the normal of the plane in the N + A and N + U modes, and the u direction in the U + V mode. The second reference is only used by the N + U and U + V modes.
         """
+        first = self.obj.ReferenceVec1 if self.obj.Manual1 else UVUlib.get_axis(self.obj.ReferenceLink1)
         if self.obj.PlacementMode == "0": # N + A
-            if self.obj.Manual1:
-                normal = self.obj.ReferenceVec1
-            else:
-                normal = UVUlib.get_axis(self.obj.ReferenceLink1)
-            try:
-                x_dir = App.Base.Vector(-normal.y, normal.x, 0).normalize()
-            except: # Purely vertical normal
-                x_dir = App.Base.Vector(1, 0, 0)
-            y_dir = normal.cross(x_dir).normalize()
-
-        elif self.obj.PlacementMode == "1": # N + U (+ A)
-            if self.obj.Manual2:
-                x_dir = self.obj.ReferenceVec2 / self.obj.ReferenceVec2.Length
-            else:
-                x_dir = UVUlib.get_axis(self.obj.ReferenceLink2)
-            y_dir = self.obj.Normal.cross(x_dir).normalize()
-
-        elif self.obj.PlacementMode == "2": # U + V (+ A)
-            if self.obj.Manual1:
-                x_dir = self.obj.ReferenceVec1 / self.obj.ReferenceVec1.Length
-            else:
-                x_dir = UVUlib.get_axis(self.obj.ReferenceLink1)
-            if self.obj.Manual2:
-                y_dir = self.obj.ReferenceVec2 / self.obj.ReferenceVec2.Length
-            else:
-                y_dir = UVUlib.get_axis(self.obj.ReferenceLink2)
-        return x_dir, y_dir
-
-    @property
-    def u_dir(self) -> App.Base.Vector:
-        x_dir, y_dir = self._xy_dir
-        return math.cos(math.radians(self.obj.Angle.Value)) * x_dir + math.sin(math.radians(self.obj.Angle.Value)) * y_dir
-    @property
-    def v_dir(self) -> App.Base.Vector:
-        x_dir, y_dir = self._xy_dir
-        return -math.sin(math.radians(self.obj.Angle)) * x_dir + math.cos(math.radians(self.obj.Angle)) * y_dir
+            second = None
+        else: # N + U (+ A), U + V (+ A)
+            second = self.obj.ReferenceVec2 if self.obj.Manual2 else UVUlib.get_axis(self.obj.ReferenceLink2)
+        return plane_frame(self.obj.PlacementMode, [*first], None if second is None else [*second], math.radians(self.obj.Angle.Value))
 
     @property
     def origin(self) -> App.Base.Vector:
@@ -0,0 +1,257 @@
+# Official module imports
+import os
+import math
+import numpy as np
+import FreeCAD as App
+import FreeCADGui as Gui
+
+# Local module imports
+import UVUlib
+from Exceptions import *
+import dialogs
+from .UVMesh import UVMesh, UVMeshVP
+from segmentation.FaceMesh import FaceMesh
+from segmentation.topology import MeshTopology
+from segmentation import mesh_file
+from .project import project_cylinder, project_sphere, project_torus, split_seams
+
+class UVMeshProjection(UVMesh):
+    """
+    The base class for all UV Meshes generated by projecting the mesh onto a surface of revolution around an axis.
+
+    Since the projections wrap around the axis, the mesh is cut open along the seam of the projection. As such, unlike the other UV Meshes, the vertices and triangles of the UV Mesh are not the same as those of the source FaceMesh. The vertex_map gives the source vertex of every vertex of the UV Mesh.
+    """
+    def __init__(self, obj, faceMesh: tuple[str] = None):
+        self.vertex_map = np.empty((0,), dtype = np.intp)
+        self._triangle_array = np.empty((0, 3), dtype = np.int32)
+        super().__init__(obj, faceMesh)
+        self.add_projection_properties(obj)
+
+    def add_projection_properties(self, obj):
+        obj.addProperty("App::PropertyBool", "Manual", "Projection", "Whether the axis of the projection is manually defined, or by reference.").Manual = True
+        obj.addProperty("App::PropertyLinkGlobal", "ReferenceLink", "Projection", "The reference datum defining the axis of the projection.")
+        obj.addProperty("App::PropertyVector", "ReferenceVec", "Projection", "The manually defined direction of the axis of the projection.").ReferenceVec = App.Base.Vector(0, 0, 1)
+        obj.addProperty("App::PropertyVector", "Center", "Projection", "The manually defined center of the projection.")
+        obj.addProperty("App::PropertyBool", "AutoSeam", "Projection", "Places the seam of the projection in the largest angular gap of the mesh, such that partial revolutions are not cut.").AutoSeam = True
+        obj.addProperty("App::PropertyAngle", "SeamAngle", "Projection", "The angle of the seam around the axis, if it is not placed automatically.")
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self.vertex_map = np.empty((0,), dtype = np.intp)
+        self._triangle_array = np.empty((0, 3), dtype = np.int32)
+
+    def execute(self, obj):
+        self.restore_pending = False
+        if not hasattr(obj.Source, "Proxy") or not isinstance(obj.Source.Proxy, FaceMesh):
+            raise RuntimeError("Invalid source object selected. Source must be a FaceMesh object.")
+
+        faceMesh = obj.Source.Proxy
+        origin, axis = self.frame
+        uv, periods, singular = self.project(faceMesh.vertex_array, origin, axis)
+        self.vertex_map, uv, self._triangle_array = split_seams(uv, faceMesh.triangle_array, periods, singular)
+        self.uv = uv
+        self.store_uv()
+
+    def project(self, points: np.ndarray[np.float64], origin: np.ndarray[np.float64], axis: np.ndarray[np.float64]) -> tuple:
+        """
+        Projects the points onto the surface of the projection. Implemented by the derived classes.
+
+        Returns:
+        uv: (N, 2) np.ndarray - The projected coordinates
+        periods: tuple[float] - The period of the u and v coordinates, or 0 if the coordinate does not wrap around
+        singular: (N,) np.ndarray - Whether the u coordinate of the point is undefined. None if there are no singular points.
+        """
+        raise NotImplementedError
+
+    @property
+    def frame(self) -> tuple[np.ndarray[np.float64]]:
+        """
+        The origin and the (unit) direction of the axis of the projection.
+        """
+        if self.obj.Manual:
+            origin = self.obj.Center
+            axis = self.obj.ReferenceVec
+        else:
+            if self.obj.ReferenceLink is None:
+                raise RuntimeError("No reference selected for the axis of the projection.")
+            origin = self.obj.ReferenceLink.Placement.Base
+            axis = UVUlib.get_axis(self.obj.ReferenceLink)
+        if axis is None or axis.Length == 0:
+            raise RuntimeError("Invalid axis defined for the projection.")
+        return np.array([*origin], dtype = np.float64), np.array([*axis], dtype = np.float64) / axis.Length
+
+    @property
+    def seam(self) -> float:
+        """
+        The angle of the seam around the axis, or None if it is placed automatically.
+        """
+        return None if self.obj.AutoSeam else math.radians(self.obj.SeamAngle.Value)
+
+    @property
+    def unwrap_params(self) -> tuple:
+        origin, axis = self.frame
+        return (origin.tolist(), axis.tolist(), self.seam)
+
+    def store_uv(self):
+        """
+        Stores the UV coordinates in the document, together with the seam-split mesh they belong to.
+        """
+        if self.obj.SaveMesh:
+            mesh_file.write(self.obj, "UVData", self.checksum(), uv = self.uv.astype(np.float32), vertex_map = self.vertex_map, triangles = self._triangle_array)
+        else:
+            mesh_file.clear(self.obj, "UVData")
+
+    def restore_uv(self):
+        """
+        Loads the UV coordinates and the seam-split mesh stored in the document. If the stored data is missing, or was generated from different inputs than the current ones, the UV mesh is recomputed instead.
+        Called when the UV coordinates of a restored object are first used.
+        """
+        self.restore_pending = False
+        data = mesh_file.read(self.obj, "UVData", self.checksum())
+        if data is None or not {"uv", "vertex_map", "triangles"} <= data.keys() or len(data["uv"]) != len(data["vertex_map"]):
+            self.execute(self.obj)
+            self.obj.purgeTouched() # The deferred recompute is done
+            return
+        self.vertex_map = data["vertex_map"]
+        self._triangle_array = data["triangles"]
+        self.uv = data["uv"]
+
+    @property
+    def vertex_array(self) -> np.ndarray[np.float64]:
+        if self.restore_pending:
+            self.restore_uv()
+        if self._vertex_array is None:
+            try:
+                self._vertex_array = self.obj.Source.Proxy.vertex_array[self.vertex_map]
+            except (AttributeError, IndexError):
+                return np.empty((0, 3), dtype = np.float64)
+        return self._vertex_array
+    @property
+    def triangle_array(self) -> np.ndarray[np.int32]:
+        if self.restore_pending:
+            self.restore_uv()
+        return self._triangle_array
+    @property
+    def vertices(self):
+        return [App.Base.Vector(*vertex) for vertex in self.vertex_array.tolist()]
+    @property
+    def triangles(self):
+        return [(*triangle,) for triangle in self.triangle_array.tolist()]
+
+    @property
+    def topology(self) -> MeshTopology:
+        """
+        The connectivity of the seam-split mesh. The seams are part of the boundary of the mesh.
+        """
+        if self._topology is None:
+            self._topology = MeshTopology(len(self.uv), self.triangle_array)
+        return self._topology
+    @property
+    def fused_edge_array(self) -> np.ndarray[np.int32]:
+        """
+        The fused edges of the source FaceMesh, in the vertex indices of the seam-split mesh. Fused edges on the seam are boundary edges of the UV Mesh, and are not included.
+        """
+        topology = self.topology
+        n_source = len(self.obj.Source.Proxy.vertex_array)
+        fused = np.sort(self.obj.Source.Proxy.fused_edge_array, axis = 1)
+        edges = np.sort(self.vertex_map[topology.edges], axis = 1)
+        internal = np.isin(edges[:, 0] * n_source + edges[:, 1], fused[:, 0] * n_source + fused[:, 1]) & (topology.edge_counts == 2)
+        return topology.edges[internal]
+
+    def clear_cache(self):
+        super().clear_cache()
+        self._vertex_array = None
+        self._topology = None
+
+    def claimChildren(self):
+        return [*filter(lambda i: i is not None, [self.obj.Source, self.obj.ReferenceLink])]
+
+    @property
+    def taskDialog(self):
+        return getattr(dialogs, f"UnwrapDialog{self.method}")
+
+class UVMeshCylinder(UVMeshProjection):
+    """
+    A UV Mesh generated by projecting the mesh onto a cylinder around an axis.
+    """
+    method = "Cylinder"
+    def project(self, points, origin, axis):
+        return project_cylinder(points, origin, axis, self.seam)
+
+class UVMeshSphere(UVMeshProjection):
+    """
+    A UV Mesh generated by projecting the mesh onto a sphere, using the longitude and latitude w.r.t. the axis as uv coordinates.
+    """
+    method = "Sphere"
+    def project(self, points, origin, axis):
+        return project_sphere(points, origin, axis, self.seam)
+
+class UVMeshTorus(UVMeshProjection):
+    """
+    A UV Mesh generated by projecting the mesh onto a torus around an axis.
+    """
+    method = "Torus"
+    def __init__(self, obj, faceMesh: tuple[str] = None):
+        super().__init__(obj, faceMesh)
+        obj.addProperty("App::PropertyLength", "MajorRadius", "Projection", "The distance from the axis to the center of the tube of the torus. If 0, it is derived from the radial extent of the mesh.")
+
+    def project(self, points, origin, axis):
+        return project_torus(points, origin, axis, self.obj.MajorRadius.Value or None, self.seam)
+
+    @property
+    def unwrap_params(self) -> tuple:
+        return (*super().unwrap_params, self.obj.MajorRadius.Value)
+
+class UVMeshProjectionVP(UVMeshVP):
+    def getIcon(self):
+        return os.path.join(UVUlib.path_icons, "UVMeshPlane.svg") # The projections share the icon of the planar projection
+
+# The object and view provider classes for every projection method
+projection_types = {
+    "Cylinder": (UVMeshCylinder, UVMeshProjectionVP),
+    "Sphere": (UVMeshSphere, UVMeshProjectionVP),
+    "Torus": (UVMeshTorus, UVMeshProjectionVP),
+    }
+
+def make_UVMeshProjection(
+    method: str,
+    faceMesh: tuple[str],
+    manual: bool,
+    ref: tuple[str],
+    refv: App.Base.Vector,
+    center: App.Base.Vector,
+    ):
+    """
+    General constructor method for all projection UVMesh instances
+
+    method: str - The surface the mesh is projected on: "Cylinder", "Sphere" or "Torus"
+    """
+    fm = UVUlib.get_feature(faceMesh)
+    if not hasattr(fm, "Proxy") or not isinstance(fm.Proxy, FaceMesh):
+        raise InvalidSelectionException(f"Invalid FaceMesh selection for unwrapping. Cannot create object.")
+
+    obj = App.ActiveDocument.addObject("Part::FeaturePython", f"UVMesh{method}")
+    uvMesh = projection_types[method][0](obj)
+    uvMesh_vp = projection_types[method][1](obj.ViewObject)
+    update_UVMeshProjection(obj, faceMesh, manual, ref, refv, center)
+    return obj
+
+def update_UVMeshProjection(
+    obj,
+    faceMesh: tuple[str],
+    manual: bool,
+    ref: tuple[str],
+    refv: App.Base.Vector,
+    center: App.Base.Vector,
+    ):
+    fm = UVUlib.get_feature(faceMesh)
+    if not hasattr(fm, "Proxy") or not isinstance(fm.Proxy, FaceMesh):
+        raise InvalidSelectionException(f"Invalid FaceMesh selection for unwrapping. Object is not updated.")
+
+    obj.Source = fm
+    obj.Manual = manual
+    obj.ReferenceLink = UVUlib.feature_to_obj(ref)
+    obj.ReferenceVec = refv
+    obj.Center = center
+
+    App.ActiveDocument.recompute()
@@ -0,0 +1,75 @@
+# Official module imports
+import os
+import FreeCAD as App
+import FreeCADGui as Gui
+
+# Local module imports
+import UVUlib
+from Exceptions import *
+import dialogs
+from .UVMesh import UVMesh, UVMeshVP
+from segmentation.FaceMesh import FaceMesh
+from .scp import unwrap_scp
+from .islands import map_islands, stitch_islands, arrange_islands
+
+class UVMeshSCP(UVMesh):
+    """
+    A UV Mesh generated using the spectral conformal parameterisation. Unlike LSCM, this does not require any pinned vertices.
+    Every disconnected island of the mesh is unwrapped independently, after which the islands are placed side by side.
+    """
+    def __init__(self, obj, faceMesh: tuple[str] = None):
+        super().__init__(obj, faceMesh)
+        self.add_decimation_properties(obj)
+
+    def onDocumentRestored(self, obj):
+        # Objects saved before decimation was introduced lack the related properties
+        if not hasattr(obj, "Decimate"):
+            self.add_decimation_properties(obj)
+        super().onDocumentRestored(obj)
+
+    def execute(self, obj):
+        self.restore_pending = False
+        if not hasattr(obj.Source, "Proxy") or not isinstance(obj.Source.Proxy, FaceMesh):
+            raise RuntimeError("Invalid source object selected. Source must be a FaceMesh object.")
+
+        faceMesh = obj.Source.Proxy
+        islands = self.islands
+        decimated = self.decimate_islands(islands)
+        uvs = map_islands(lambda coarse: unwrap_scp(faceMesh.vertex_array[coarse[0].vertices], coarse[0].triangles), decimated)
+        uvs = self.prolong(uvs, decimated)
+        self.uv = stitch_islands(len(self.vertex_array), islands, arrange_islands(uvs))
+        self.store_uv()
+
+    @property
+    def unwrap_params(self) -> tuple:
+        return (self.obj.Decimate, self.obj.TargetVertices)
+
+    @property
+    def taskDialog(self):
+        return dialogs.UnwrapDialogSCP
+
+class UVMeshSCPVP(UVMeshVP):
+    def getIcon(self):
+        return os.path.join(UVUlib.path_icons, "UVMeshSCP.svg")
+
+def make_UVMeshSCP(faceMesh: tuple[str]):
+    """
+    General constructor method for all UVMesh instances
+    """
+    fm = UVUlib.get_feature(faceMesh)
+    if not hasattr(fm, "Proxy") or not isinstance(fm.Proxy, FaceMesh):
+        raise InvalidSelectionException(f"Invalid FaceMesh selection for unwrapping. Cannot create object.")
+
+    obj = App.ActiveDocument.addObject("Part::FeaturePython", f"UVMeshSCP")
+    uvMesh = UVMeshSCP(obj, faceMesh)
+    uvMesh_vp = UVMeshSCPVP(obj.ViewObject)
+    App.ActiveDocument.recompute()
+    return obj
+
+def update_UVMeshSCP(uvMesh, faceMesh: tuple[str]):
+    fm = UVUlib.get_feature(faceMesh)
+    if not hasattr(fm, "Proxy") or not isinstance(fm.Proxy, FaceMesh):
+        raise InvalidSelectionException(f"Invalid FaceMesh selection for unwrapping. Object is not updated.")
+
+    uvMesh.Source = UVUlib.get_feature(faceMesh)
+    App.ActiveDocument.recompute()
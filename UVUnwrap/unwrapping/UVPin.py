@@ -10,11 +10,26 @@ Additionally, pins can be used to force a mathematically suboptimal mapping whic
 import os
 import FreeCAD as App
 import FreeCADGui as Gui
+import numpy as np
 
 # Local module imports
 import UVUlib
 import dialogs
 
+def coincident_vertices(faceMesh, point: App.Base.Vector, *, ignored: list[int] = [], tolerance: float = 1e-3) -> dict[int, App.Base.Vector]:
+    """
+    Finds the vertices of the FaceMesh coincident with the given point, i.e. those within the tolerance distance of the point.
+    This is the same test as the isInside check of a Part.Vertex, evaluated for all vertices at once.
+    Vertices which are not used by any triangle are not part of any unwrapped mesh, and are skipped, as are the ignored vertices.
+
+    Returns, for every coincident vertex, the centroid of one of the triangles using it. This indicates on which side of the point the vertex is located.
+    """
+    vertex_array = faceMesh.vertex_array
+    triangle = faceMesh.topology.vertex_triangle
+    ignored = set(ignored)
+    coincidents = np.flatnonzero((np.linalg.norm(vertex_array - [*point], axis = 1) <= tolerance) & (triangle >= 0))
+    return {i: App.Base.Vector(*vertex_array[faceMesh.triangle_array[triangle[i]]].mean(axis = 0)) for i in coincidents.tolist() if i not in ignored}
+
 class UVPin():
     def __init__(self, obj, feature: tuple[str], uvs: tuple[float] = (0., 0., 1., 0.), collision_method: str = "First", order_vector: tuple[float] = (1., 1., 1.)):
         obj.Proxy = self
@@ -46,8 +61,8 @@ class UVPin():
             # Determine all vertices that are coincident with the given vertex
             # NOTE: No sorting is implemented yet. The order is simply defined by the order by which the vertices appear in the tessellation
             p_ref = UVUlib.get_feature(self.feature)
-            coincidents = [i_vertex for i_vertex, vertex in enumerate(faceMesh.Proxy.vertices) if p_ref.isInside(vertex, tolerance, False) and i_vertex not in ignored]
-            p_bias = {i: sum((faceMesh.Proxy.vertices[i] for i in next(tri for tri in faceMesh.Proxy.triangles if i in tri)), start = App.Base.Vector()) / 3 for i in coincidents}
+            p_bias = coincident_vertices(faceMesh.Proxy, p_ref.Point, ignored = ignored, tolerance = tolerance)
+            coincidents = [*p_bias]
 
             u0, v0, u1, v1 = self.obj.UV
             du, dv = u1 - u0, v1 - v0
@@ -0,0 +1,247 @@
+"""
+This file contains the mesh simplification used to speed up the unwrapping of finely tessellated meshes.
+
+The mesh is simplified using quadric error metric edge collapses (Garland & Heckbert, cited below), in which every vertex is collapsed onto one of its neighbours. As such, the vertices of the simplified mesh are a subset of the original vertices. The vertices on the mesh boundary (the seams of the UV mesh) are never removed, such that the boundary of the unwrapped mesh is retained exactly.
+The collapses are performed in passes, each of which collapses a large set of cheap, independent collapses at once, such that the whole simplification is vectorised. Collapses which would change the topology of the mesh or flip a triangle are rejected, and are retried once the neighbourhood of the vertex changes.
+
+After unwrapping the simplified mesh, the uv coordinates of the removed vertices are interpolated from the closest triangle of the simplified mesh, using barycentric coordinates.
+
+Garland, Michael, and Paul S. Heckbert. "Surface simplification using quadric error metrics." Proceedings of the 24th annual conference on Computer graphics and interactive techniques. 1997. 209-216.
+"""
+__all__ = ["decimate", "prolongation_matrix"]
+
+import numpy as np
+import scipy as sp
+
+def decimate(vertices: np.ndarray[np.float64], triangles: np.ndarray[np.int32], target_vertices: int, locked: list[int] = None) -> tuple[np.ndarray]:
+    """
+    Simplifies the mesh until it has at most the target number of vertices, or until no more edges can be collapsed.
+
+    vertices: (N, 3) np.ndarray - The vertex positions
+    triangles: (T, 3) np.ndarray - The vertex indices of every triangle
+    target_vertices: int - The number of vertices to simplify the mesh to
+    locked: list[int] - The indices of the vertices that may not be removed (in addition to the boundary vertices)
+
+    Returns:
+    kept: (M,) np.ndarray - The (sorted) indices of the vertices that are retained in the simplified mesh
+    triangles: (K, 3) np.ndarray - The triangles of the simplified mesh, indexing into kept
+    """
+    vertices = np.asarray(vertices, dtype = np.float64).reshape((-1, 3))
+    triangles = np.asarray(triangles, dtype = np.intp).reshape((-1, 3))
+    n = len(vertices)
+
+    # Boundary and non-manifold vertices may not be removed, nor may any of the explicitly locked vertices
+    is_locked = np.zeros((n,), dtype = bool)
+    if locked is not None:
+        is_locked[np.asarray(locked, dtype = np.intp)] = True
+    edges, counts = unique_edges(triangles, n, return_counts = True)
+    is_locked[edges[counts != 2].ravel()] = True
+
+    # In flat regions, all collapses are (nearly) free, which leaves large, elongated triangles. Hence a small multiple of the squared distance to the original vertex is added to every quadric, weighted by the area around the vertex.
+    quadrics = vertex_quadrics(vertices, triangles)
+    homogeneous = np.concatenate([vertices, np.ones((n, 1))], axis = 1)
+    offsets = np.zeros((n, 4, 4)) # The quadric of the squared distance to the vertex
+    offsets[:, [0, 1, 2], [0, 1, 2]] = 1
+    offsets[:, :3, 3] = offsets[:, 3, :3] = -vertices
+    offsets[:, 3, 3] = np.sum(vertices ** 2, axis = 1)
+    quadrics += 1e-3 * np.trace(quadrics[:, :3, :3], axis1 = 1, axis2 = 2)[:, None, None] * offsets
+
+    # The cost of collapsing onto a vertex is the product of the (symmetric) quadric with the outer product of the homogeneous position of that vertex, of which only the upper triangle is kept
+    rows, columns = np.triu_indices(4)
+    quadrics = quadrics[:, rows, columns]
+    monomials = homogeneous[:, rows] * homogeneous[:, columns] * np.where(rows == columns, 1., 2.)
+    rejected = np.empty((0,), dtype = np.intp) # The rejected collapses (encoded as removed * n + kept), which are retried once the neighbourhood of either vertex changes
+
+    priority = np.random.default_rng(0).permutation(n) # Fixed, such that the result is reproducible
+
+    remaining = len(np.unique(triangles))
+    while remaining > target_vertices:
+        # All collapses (removed, kept) along the edges of the mesh, grouped by the removed vertex. This doubles as the adjacency of the mesh.
+        half_edges = triangles[:, [[0, 1], [1, 2], [2, 0]]].reshape((-1, 2))
+        keys = np.concatenate([half_edges[:, 0] * n + half_edges[:, 1], half_edges[:, 1] * n + half_edges[:, 0]])
+        keys.sort()
+        keys = keys[np.append(True, keys[1:] != keys[:-1])]
+        removed, kept = keys // n, keys % n
+        start = np.searchsorted(removed, np.arange(n + 1))
+        connected = start[1:] > start[:-1]
+        def ring_min(values):
+            """
+            The minimum of the values over every vertex and its neighbours.
+            """
+            result = values.copy()
+            result[connected] = np.minimum(result[connected], np.minimum.reduceat(values[kept], start[:-1][connected]))
+            return result
+
+        costs = np.full((len(keys),), np.inf)
+        allowed = ~is_locked[removed] & ~np.isin(keys, rejected)
+        costs[allowed] = np.einsum("ei,ei->e", quadrics[removed[allowed]], monomials[kept[allowed]]) + np.einsum("ei,ei->e", quadrics, monomials)[kept[allowed]]
+        best_cost = np.full((n,), np.inf)
+        best_cost[connected] = np.minimum.reduceat(costs, start[:-1][connected])
+        available = np.isfinite(best_cost)
+        if not available.any():
+            break
+
+        # A collapse only changes the triangles around the removed vertex. As long as no two removed vertices are neighbours, no triangle is changed by more than one collapse, so that many collapses can be performed at once.
+        # Only the cheapest half of the vertices is considered, from which the removed vertices are selected in a random order: a vertex is selected if it comes first out of all its available neighbours, after which its neighbours are no longer available.
+        rank = np.empty((n,), dtype = np.intp)
+        rank[np.argsort(best_cost, kind = "stable")] = np.arange(n)
+        available &= rank < max(available.sum() // 2, 1)
+        selected = np.zeros((n,), dtype = bool)
+        for i in range(3):
+            values = np.where(available, priority, n)
+            chosen = available & (ring_min(values) == values)
+            selected |= chosen
+            available &= ring_min(np.where(chosen, 0, 1)) == 1
+            if not available.any():
+                break
+
+        # All collapses of the selected vertices are checked, after which the cheapest valid collapse of every vertex is performed
+        pairs = np.flatnonzero(selected[removed] & np.isfinite(costs))
+        sources, targets = removed[pairs], kept[pairs]
+
+        # Link condition: both vertices of an (interior) edge must share exactly 2 neighbours, otherwise the collapse changes the topology of the mesh
+        source_counts = start[sources + 1] - start[sources]
+        neighbour_pairs = np.repeat(np.arange(len(pairs)), source_counts)
+        source_neighbours = kept[_ranges(start[sources], source_counts)]
+        shared = targets[neighbour_pairs] * n + source_neighbours
+        shared = keys[np.minimum(np.searchsorted(keys, shared), len(keys) - 1)] == shared
+        valid = np.bincount(neighbour_pairs[shared], minlength = len(pairs)) == 2
+
+        # Additionally, reject any collapse which (nearly) flips one of the remaining triangles
+        first = np.searchsorted(sources, np.arange(n)) # The first collapse of every vertex
+        collapse_counts = np.bincount(sources, minlength = n)
+        rows, corner = np.nonzero(selected[triangles])
+        vertex = triangles[rows, corner]
+        old_normals = triangle_normals(vertices, triangles[rows])
+        repeats = collapse_counts[vertex] # Every triangle is checked for every collapse of its selected vertex
+        rows, corner, old_normals, pair = np.repeat(rows, repeats), np.repeat(corner, repeats), np.repeat(old_normals, repeats, axis = 0), _ranges(first[vertex], repeats)
+        moved = ~np.any(triangles[rows] == targets[pair, None], axis = 1)
+        rows, corner, old_normals, pair = rows[moved], corner[moved], old_normals[moved], pair[moved]
+        new = triangles[rows]
+        new[np.arange(len(rows)), corner] = targets[pair]
+        new_normals = triangle_normals(vertices, new)
+        flipped = np.sum(old_normals * new_normals, axis = 1) <= 0.5 * np.linalg.norm(old_normals, axis = 1) * np.linalg.norm(new_normals, axis = 1)
+        valid &= np.bincount(pair[flipped], minlength = len(pairs)) == 0
+        rejected = np.concatenate([rejected, keys[pairs[~valid]]])
+
+        valid_costs = np.where(valid, costs[pairs], np.inf)
+        cheapest = np.full((n,), np.inf)
+        cheapest[selected] = np.minimum.reduceat(valid_costs, first[selected])
+        accepted = valid & (valid_costs == cheapest[sources])
+        accepted[np.flatnonzero(accepted)[1:][sources[accepted][1:] == sources[accepted][:-1]]] = False # Only a single collapse per vertex
+
+        # Two collapses sharing a neighbour may both connect it to the same vertex, which would create a non-manifold edge. Of all collapses creating the same edge, only the cheapest is performed, the others are retried in the next pass.
+        new_edges = accepted[neighbour_pairs] & ~shared & (source_neighbours != targets[neighbour_pairs])
+        owner, new_edges = neighbour_pairs[new_edges], source_neighbours[new_edges]
+        new_edges = np.minimum(targets[owner], new_edges) * n + np.maximum(targets[owner], new_edges)
+        order = np.lexsort((costs[pairs[owner]], new_edges))
+        new_edges, owner = new_edges[order], owner[order]
+        accepted[owner[1:][new_edges[1:] == new_edges[:-1]]] = False
+
+        accepted = np.flatnonzero(accepted)
+        accepted = accepted[np.argsort(costs[pairs[accepted]], kind = "stable")][:remaining - target_vertices] # Cheapest first
+        sources, targets = sources[accepted], targets[accepted]
+        if len(sources):
+            changed = np.ones((n,), dtype = np.intp)
+            changed[sources] = changed[targets] = 0
+            changed = ring_min(changed) == 0
+            rejected = rejected[~changed[rejected // n] & ~changed[rejected % n]]
+
+            mapping = np.arange(n)
+            mapping[sources] = targets
+            triangles = mapping[triangles]
+            triangles = triangles[(triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2]) & (triangles[:, 2] != triangles[:, 0])]
+            np.add.at(quadrics, targets, quadrics[sources])
+            remaining -= len(sources)
+
+    kept, triangles = np.unique(triangles, return_inverse = True)
+    return kept, triangles.reshape((-1, 3)).astype(np.int32)
+
+def _ranges(starts: np.ndarray[np.intp], counts: np.ndarray[np.intp]) -> np.ndarray[np.intp]:
+    """
+    The concatenation of the ranges [start, start + count).
+    """
+    offsets = np.cumsum(counts) - counts
+    return np.repeat(starts - offsets, counts) + np.arange(counts.sum())
+
+def prolongation_matrix(vertices: np.ndarray[np.float64], kept: np.ndarray[np.intp], triangles: np.ndarray[np.int32], candidates: int = 8) -> sp.sparse.csr_array:
+    """
+    Generates the matrix which interpolates values defined on the vertices of a simplified mesh onto the vertices of the original mesh, i.e. uv = P @ coarse_uv.
+    Retained vertices copy their own value. Every removed vertex is projected onto the closest triangle of the simplified mesh, and is interpolated using the barycentric coordinates of its projection.
+
+    vertices: (N, 3) np.ndarray - The vertex positions of the original mesh
+    kept: (M,) np.ndarray - The indices of the vertices that are retained in the simplified mesh
+    triangles: (K, 3) np.ndarray - The triangles of the simplified mesh, indexing into kept
+    candidates: int - The number of triangles (closest by centroid) that are checked for every removed vertex
+    """
+    vertices = np.asarray(vertices, dtype = np.float64).reshape((-1, 3))
+    triangles = np.asarray(triangles, dtype = np.intp).reshape((-1, 3))
+    coarse = vertices[kept]
+    removed = np.setdiff1d(np.arange(len(vertices)), kept)
+
+    rows = [kept]
+    columns = [np.arange(len(kept))]
+    weights = [np.ones((len(kept),))]
+    if len(removed) and len(triangles):
+        points = vertices[removed]
+        candidates = min(candidates, len(triangles))
+        _, nearest = sp.spatial.cKDTree(coarse[triangles].mean(axis = 1)).query(points, candidates)
+        nearest = nearest.reshape((len(removed), candidates))
+        bary = clamped_barycentric(points[:, None], *(coarse[triangles[nearest, i]] for i in range(3)))
+        distance = np.linalg.norm(np.einsum("rci,rcij->rcj", bary, coarse[triangles[nearest]]) - points[:, None], axis = 2)
+        best = np.argmin(distance, axis = 1)
+        select = np.arange(len(removed))
+        rows.append(np.repeat(removed, 3))
+        columns.append(triangles[nearest[select, best]].ravel())
+        weights.append(bary[select, best].ravel())
+    return sp.sparse.coo_array((np.concatenate(weights), (np.concatenate(rows), np.concatenate(columns))), (len(vertices), len(kept))).tocsr()
+
+def clamped_barycentric(p: np.ndarray[np.float64], a: np.ndarray[np.float64], b: np.ndarray[np.float64], c: np.ndarray[np.float64]) -> np.ndarray[np.float64]:
+    """
+    Returns the barycentric coordinates of the projection of the point p onto the plane of the triangle abc.
+    If the projection lays outside of the triangle, the coordinates are clamped to the triangle. Degenerate triangles are given equal weights.
+    """
+    e0, e1, ep = b - a, c - a, p - a
+    d00 = np.sum(e0 * e0, axis = -1)
+    d01 = np.sum(e0 * e1, axis = -1)
+    d11 = np.sum(e1 * e1, axis = -1)
+    d20 = np.sum(ep * e0, axis = -1)
+    d21 = np.sum(ep * e1, axis = -1)
+    denominator = d00 * d11 - d01 * d01
+    degenerate = denominator <= 1e-12 * (d00 + d11) ** 2
+    denominator = np.where(degenerate, 1., denominator)
+    v = np.where(degenerate, 1 / 3, (d11 * d20 - d01 * d21) / denominator)
+    w = np.where(degenerate, 1 / 3, (d00 * d21 - d01 * d20) / denominator)
+    bary = np.clip(np.stack([1 - v - w, v, w], axis = -1), 0, None)
+    return bary / bary.sum(axis = -1, keepdims = True)
+
+def unique_edges(triangles: np.ndarray[np.intp], n_vertices: int, return_counts: bool = False) -> np.ndarray[np.intp]:
+    """
+    Returns the unique (sorted) edges of the triangles, and optionally the number of triangles using every edge.
+    """
+    edges = np.sort(triangles[:, [[0, 1], [1, 2], [2, 0]]].reshape((-1, 2)), axis = 1)
+    keys = edges[:, 0] * n_vertices + edges[:, 1] # Encoded as a single integer, which is far cheaper to sort
+    keys.sort()
+    first = np.flatnonzero(np.append(True, keys[1:] != keys[:-1]))
+    edges = np.stack([keys[first] // n_vertices, keys[first] % n_vertices], axis = 1)
+    if return_counts:
+        return edges, np.diff(np.append(first, len(keys)))
+    return edges
+
+def triangle_normals(vertices: np.ndarray[np.float64], triangles: np.ndarray[np.intp]) -> np.ndarray[np.float64]:
+    """
+    Returns the (area weighted) normals of the triangles.
+    """
+    return np.cross(vertices[triangles[:, 1]] - vertices[triangles[:, 0]], vertices[triangles[:, 2]] - vertices[triangles[:, 0]])
+
+def vertex_quadrics(vertices: np.ndarray[np.float64], triangles: np.ndarray[np.intp]) -> np.ndarray[np.float64]:
+    """
+    Returns the (4, 4) error quadric of every vertex: the area weighted sum of the squared distance to the planes of all surrounding triangles.
+    """
+    normals = triangle_normals(vertices, triangles)
+    areas = np.linalg.norm(normals, axis = 1)
+    unit_normals = np.divide(normals, areas[:, None], out = np.zeros_like(normals), where = areas[:, None] > 0)
+    planes = np.concatenate([unit_normals, -np.sum(unit_normals * vertices[triangles[:, 0]], axis = 1)[:, None]], axis = 1)
+    triangle_quadrics = areas[:, None, None] / 2 * planes[:, :, None] * planes[:, None, :]
+    incidence = sp.sparse.csr_array((np.ones((triangles.size,)), (triangles.ravel(), np.repeat(np.arange(len(triangles)), 3))), (len(vertices), len(triangles)))
+    return (incidence @ triangle_quadrics.reshape((-1, 16))).reshape((-1, 4, 4))
@@ -0,0 +1,84 @@
+"""
+This file contains the tools to split a mesh into its disconnected islands, such that each island can be unwrapped independently.
+
+Since the cost of solving the unwrapping systems grows superlinearly with the system size, solving a number of smaller, independent systems is cheaper than solving a single coupled system. Additionally, the independent systems can be solved concurrently.
+"""
+__all__ = ["Island", "find_islands", "map_islands", "stitch_islands", "arrange_islands"]
+
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from segmentation.topology import MeshTopology
+
+# vertices: The (global) indices of the vertices in the island
+# triangles: The triangles of the island, indexing into the vertices of the island
+Island = namedtuple("Island", ["vertices", "triangles"])
+
+def find_islands(topology: MeshTopology) -> list[Island]:
+    """
+    Splits the mesh into its connected components.
+    Vertices that are not part of any triangle are not included in any island.
+    """
+    triangles = topology.triangles
+    n_vertices = topology.n_vertices
+    n_islands, labels = topology.components
+
+    # Group the vertices and triangles by island
+    vertex_order = np.argsort(labels, kind = "stable")
+    vertex_bounds = np.searchsorted(labels[vertex_order], np.arange(n_islands + 1))
+    triangle_labels = topology.triangle_components
+    triangle_order = np.argsort(triangle_labels, kind = "stable")
+    triangle_bounds = np.searchsorted(triangle_labels[triangle_order], np.arange(n_islands + 1))
+
+    islands = []
+    local_index = np.empty((n_vertices,), dtype = np.intp)
+    for i in range(n_islands):
+        island_triangles = triangles[triangle_order[triangle_bounds[i]:triangle_bounds[i + 1]]]
+        if not len(island_triangles): # Isolated vertex
+            continue
+        island_vertices = vertex_order[vertex_bounds[i]:vertex_bounds[i + 1]]
+        local_index[island_vertices] = np.arange(len(island_vertices))
+        islands.append(Island(island_vertices, local_index[island_triangles]))
+    return islands
+
+def map_islands(function, *iterables) -> list:
+    """
+    Calls the function for every set of arguments (like the built-in map), solving each of the islands concurrently.
+
+    A thread pool is used, since the sparse solvers release the GIL for the expensive parts of the computation, and since FreeCAD cannot reliably spawn worker processes from within the GUI.
+    """
+    args = [*zip(*iterables)]
+    if len(args) <= 1:
+        return [function(*arg) for arg in args]
+    with ThreadPoolExecutor(max_workers = min(len(args), os.cpu_count() or 1)) as executor:
+        return [*executor.map(function, *zip(*args))]
+
+def stitch_islands(n_vertices: int, islands: list[Island], uvs: list[np.ndarray[np.float64]]) -> np.ndarray[np.float64]:
+    """
+    Combines the uv coordinates of the individual islands back into the uv coordinates of the full mesh.
+    Vertices which are not part of any island are placed at the origin.
+    """
+    uv = np.zeros((n_vertices, 2), dtype = np.float64)
+    for island, island_uv in zip(islands, uvs):
+        uv[island.vertices] = island_uv
+    return uv
+
+def arrange_islands(uvs: list[np.ndarray[np.float64]], spacing: float = 0.05) -> list[np.ndarray[np.float64]]:
+    """
+    Places the uv coordinates of the islands next to each other, such that the islands do not overlap.
+    Used for unwrapping methods that do not define the location of the result, unlike e.g. the pinned LSCM.
+
+    spacing: float - The spacing between the islands, relative to the size of the largest island.
+    """
+    uvs = [np.asarray(uv, dtype = np.float64).reshape((-1, 2)) for uv in uvs]
+    if not uvs:
+        return uvs
+    spacing *= max((uv.max(axis = 0) - uv.min(axis = 0)).max() for uv in uvs)
+    offset = 0.
+    arranged = []
+    for uv in uvs:
+        arranged.append(uv - uv.min(axis = 0) + (offset, 0.))
+        offset += uv[:, 0].max() - uv[:, 0].min() + spacing
+    return arranged
@@ -3,84 +3,163 @@ This file implements the least squares conformal mapping (lscm) algorithm for UV
 
 Lévy, Bruno, et al. "Least squares conformal maps for automatic texture atlas generation." Seminal Graphics Papers: Pushing the Boundaries, Volume 2. 2023. 193-202.
 """
-__all__ = ["unwrap_lscm"]
+__all__ = ["unwrap_lscm", "LSCMSystem"]
 
+from functools import cached_property
 import math
 import numpy as np
 import scipy as sp
-import FreeCAD
 
 from Exceptions import *
 
-def unwrap_lscm(vertices: list[tuple[FreeCAD.Base.Vector]], triangles: list[tuple[int]], pinned_vertices: list[int], pinned_uvs: list[tuple[float]]) -> list[tuple[float]]:
+# scipy < 1.12 names the relative tolerance of the Krylov solvers "tol" rather than "rtol"
+_rtol = "rtol" if tuple(int(part) for part in sp.__version__.split(".")[:2]) >= (1, 12) else "tol"
+
+def unwrap_lscm(vertices: np.ndarray[np.float64], triangles: list[tuple[int]], pinned_vertices: list[int], pinned_uvs: list[tuple[float]]) -> list[tuple[float]]:
     """
     Unwraps the mesh using the least squares conformal mapping algorithm laid out by Lévy et al.
     """
-    if len(pinned_vertices) < 2:
-        raise UnderconstrainedMeshException("The mesh does not have the required number of pinned vertices. At least 2 pinned vertices are required for the unwrapping algorithm to succeed.")
-
-    # Ensure the pins are sorted
-    pinned_vertices, pinned_uvs = [[*i] for i in zip(*sorted(zip(pinned_vertices, pinned_uvs)))]
-
-    M = generate_coefficients(vertices, triangles)
-    M = M.tocsr()
-    pinned_mask = np.zeros((len(vertices),), dtype = bool)
-    pinned_mask[pinned_vertices] = True
-    Mf = M[:, ~pinned_mask] # The matrix containing all free entries of M
-    Mp = M[:,  pinned_mask] # The matrix containing all fixed entries of M
-
-    A = sp.sparse.block_array([[Mf.real, -Mf.imag], [Mf.imag, Mf.real]], format = "csr")
-    B = sp.sparse.block_array([[Mp.real, -Mp.imag], [Mp.imag, Mp.real]], format = "csr")
-    b = -B @ np.array(pinned_uvs, dtype = np.float64).T.flatten()
-    uv = sp.sparse.linalg.spsolve(A.T @ A, A.T @ b)
+    return LSCMSystem(vertices, triangles, pinned_vertices).solve(pinned_vertices, pinned_uvs)
 
-    # Turn uv into a list of tuples, and re-insert the pinned vertex uvs at their correct positions
-    uv = [(*i,) for i in uv.reshape((2, uv.size // 2)).T]
-    for vertex_index, vertex_uv in sorted(zip(pinned_vertices, pinned_uvs)):
-        uv.insert(vertex_index, vertex_uv)
 
-    return uv
+class LSCMSystem():
+    """
+    The least squares system of the LSCM problem for a given mesh and set of pinned vertices.
 
+    Since only the right hand side of the system depends on the pinned uv coordinates, the system (and its factorisation) can be reused for as long as the mesh and the set of pinned vertices remain the same. Moving the pins then only requires a back-substitution.
 
-def generate_coefficients(vertices: list[FreeCAD.Base.Vector], triangles: list[tuple[int]], dtype: np.dtype = np.complex128) -> sp.sparse.dok_array:
+    vertices: (N, 3) array_like - The vertex positions of the tessellation
+    triangles: (T, 3) array_like - The vertex indices of every triangle in the tessellation
+    pinned_vertices: list[int] - The indices of the pinned vertices
+    """
+    solvers = ["Direct", "LSQR", "CG"]
+
+    def __init__(self, vertices: np.ndarray[np.float64], triangles: np.ndarray[np.int32], pinned_vertices: list[int]):
+        if len(pinned_vertices) < 2:
+            raise UnderconstrainedMeshException("The mesh does not have the required number of pinned vertices. At least 2 pinned vertices are required for the unwrapping algorithm to succeed.")
+
+        M = generate_coefficients(vertices, triangles)
+        M = M.tocsr()
+        self.n_vertices = M.shape[1]
+        self.pinned_vertices = np.array(sorted(pinned_vertices), dtype = np.intp) # Sorted, such that the order matches that of the columns in Mp
+        self.pinned_mask = np.zeros((self.n_vertices,), dtype = bool)
+        self.pinned_mask[self.pinned_vertices] = True
+        Mf = M[:, ~self.pinned_mask] # The matrix containing all free entries of M
+        Mp = M[:,  self.pinned_mask] # The matrix containing all fixed entries of M
+
+        self.A = sp.sparse.block_array([[Mf.real, -Mf.imag], [Mf.imag, Mf.real]], format = "csr")
+        self.B = sp.sparse.block_array([[Mp.real, -Mp.imag], [Mp.imag, Mp.real]], format = "csr")
+        self.AT = self.A.T.tocsr()
+
+    @cached_property
+    def solve_normal(self):
+        """
+        The factorisation of the normal equations A.T @ A, which is only generated once it is first required by the direct solver.
+        """
+        return sp.sparse.linalg.factorized((self.AT @ self.A).tocsc())
+
+    def solve(self, pinned_vertices: list[int], pinned_uvs: list[tuple[float]], solver: str = "Direct", *, uv0: list[tuple[float]] = None, tolerance: float = 1e-8, max_iterations: int = None) -> list[tuple[float]]:
+        """
+        Solves the system for the given pinned uv coordinates.
+
+        pinned_vertices: list[int] - The indices of the pinned vertices, in the order of pinned_uvs. Must be the same set of vertices as used to create the system.
+        pinned_uvs: list[tuple[float]] - The uv coordinates of each of the pinned vertices
+        solver: str - Any of ["Direct", "LSQR", "CG"] - The solver used:
+            Direct: Sparse LU factorisation of the normal equations. The factorisation is cached, making repeated solves cheap.
+            LSQR: Iterative least squares solver working directly on the (sparse) system, without forming the normal equations.
+            CG: Jacobi preconditioned conjugate gradient on the normal equations, which are only applied implicitly.
+        uv0: list[tuple[float]] - The initial guess of all uv coordinates used to warm-start the iterative solvers. Ignored if it does not match the mesh.
+        tolerance: float - The relative tolerance of the iterative solvers.
+        max_iterations: int - The iteration budget of the iterative solvers.
+        """
+        pinned_uvs = self.sort_pinned(pinned_vertices, pinned_uvs)
+        b = -self.B @ pinned_uvs.T.flatten()
+
+        if solver == "Direct":
+            uv = self.solve_normal(self.AT @ b)
+            return self.assemble(uv, pinned_uvs)
+
+        x0 = None
+        if uv0 is not None and len(uv0) == self.n_vertices:
+            x0 = np.asarray(uv0, dtype = np.float64).reshape((-1, 2))[~self.pinned_mask].T.flatten()
+
+        if solver == "LSQR":
+            uv, istop, n_iter = sp.sparse.linalg.lsqr(self.A, b, atol = tolerance, btol = tolerance, iter_lim = max_iterations, x0 = x0)[:3]
+            converged = istop in (1, 2, 4, 5)
+        elif solver == "CG":
+            rhs = self.AT @ b
+            normal = sp.sparse.linalg.LinearOperator(2 * (self.A.shape[1],), matvec = lambda x: self.AT @ (self.A @ x), dtype = np.float64)
+            diagonal = np.asarray(self.A.multiply(self.A).sum(axis = 0)).ravel()
+            diagonal[diagonal == 0] = 1.
+            preconditioner = sp.sparse.linalg.LinearOperator(2 * (self.A.shape[1],), matvec = lambda x: x / diagonal, dtype = np.float64)
+            uv, info = sp.sparse.linalg.cg(normal, rhs, x0 = x0, maxiter = max_iterations, M = preconditioner, **{_rtol: tolerance})
+            converged = info == 0
+            n_iter = info # The number of iterations if the solver did not converge
+        else:
+            raise ValueError(f"Invalid LSCM solver selected: {solver}")
+
+        if not converged:
+            warn( ConvergenceWarning(f"The {solver} solver did not converge within {n_iter} iterations. The unwrapped mesh might be inaccurate. Increase MaxIterations, enable Decimate, or use the Direct solver.") )
+        return self.assemble(uv, pinned_uvs)
+
+    def sort_pinned(self, pinned_vertices: list[int], pinned_uvs: list[tuple[float]]) -> np.ndarray[np.float64]:
+        """
+        Sorts the pinned uv coordinates to match the order of the pinned vertices in the system.
+        """
+        order = np.argsort(pinned_vertices)
+        if len(pinned_vertices) != len(self.pinned_vertices) or np.any(np.asarray(pinned_vertices)[order] != self.pinned_vertices):
+            raise ValueError("The pinned vertices do not match the pinned vertices of the LSCM system.")
+        return np.asarray(pinned_uvs, dtype = np.float64).reshape((-1, 2))[order]
+
+    def assemble(self, uv: np.ndarray[np.float64], pinned_uvs: np.ndarray[np.float64]) -> list[tuple[float]]:
+        """
+        Turns the solution vector of the free vertices into a list of tuples, and re-inserts the pinned vertex uvs at their correct positions.
+        """
+        _uv = np.empty((self.n_vertices, 2), dtype = np.float64)
+        _uv[~self.pinned_mask] = uv.reshape((2, uv.size // 2)).T
+        _uv[self.pinned_mask] = pinned_uvs
+        return [(*i,) for i in _uv]
+
+
+def generate_coefficients(vertices: np.ndarray[np.float64], triangles: np.ndarray[np.int32], dtype: np.dtype = np.complex128) -> sp.sparse.coo_array:
     """
     Generates the complex coefficient matrix M for the given tessellation.
+
+    vertices: (N, 3) array_like - The vertex positions of the tessellation
+    triangles: (T, 3) array_like - The vertex indices of every triangle in the tessellation
     """
-    row = []
-    col = []
-    vals = []
+    vertices = np.asarray(vertices, dtype = np.float64).reshape((-1, 3))
+    triangles = np.asarray(triangles, dtype = np.intp).reshape((-1, 3))
 
     # Triangle-local axis system definition:
     # A right handed axis system is used
     # vertex[0] is at the origin of the axis system (0., 0.)
     # vertex[1] lies on the +x axis
     # vertex[2] lies on the +y side of the axis system
-
-    for i_triangle, triangle in enumerate(triangles):
-        triangle_vertices = [vertices[i_vertex] for i_vertex in triangle]
-
-        try:
-            x_dir = (triangle_vertices[1] - triangle_vertices[0]).normalize()
-        except:
-            raise
-
-        x0 = y0 = y1 = 0. # By definition
-        x1 = (triangle_vertices[1] - triangle_vertices[0]).Length
-        x2 = (triangle_vertices[2] - triangle_vertices[0]).dot(x_dir)
-        y2 = ((triangle_vertices[2] - triangle_vertices[0]) - (x2 * x_dir)).Length
-
-        triangle_area = abs(x1 * y2 / 2) # 1/2 * the cross product of vec(p0->p1) and vec(p0->p2) which reduces to this
-        sq_d_ti = math.sqrt(triangle_area)
-
-        w0 = (x2 - x1) + (y2 - y1) * 1j
-        w1 = (x0 - x2) + (y0 - y2) * 1j
-        w2 = (x1 - x0) + (y1 - y0) * 1j
-
-        for weight, vertex in zip([w0, w1, w2], triangle):
-            # The matrix entry is the weight of the vertex / sqrt(triangle area)
-            row.append(i_triangle)
-            col.append(vertex)
-            vals.append(weight / sq_d_ti)
-
-    M = sp.sparse.coo_array((vals, (row, col)), (len(triangles), len(vertices)), dtype = dtype)
+    # As such, x0 = y0 = y1 = 0 by definition.
+    p0 = vertices[triangles[:, 0]]
+    e1 = vertices[triangles[:, 1]] - p0
+    e2 = vertices[triangles[:, 2]] - p0
+
+    x1 = np.linalg.norm(e1, axis = 1)
+    if not np.all(x1 > 0):
+        raise DegenerateMeshException(f"The mesh contains {np.count_nonzero(x1 <= 0)} triangle(s) with coincident vertices.")
+    x_dir = e1 / x1[:, None]
+    x2 = np.einsum("ij,ij->i", e2, x_dir)
+    y2 = np.linalg.norm(e2 - x2[:, None] * x_dir, axis = 1)
+
+    triangle_area = np.abs(x1 * y2 / 2) # 1/2 * the cross product of vec(p0->p1) and vec(p0->p2) which reduces to this
+    if not np.all(triangle_area > 0):
+        raise DegenerateMeshException(f"The mesh contains {np.count_nonzero(triangle_area <= 0)} triangle(s) with zero area.")
+    sq_d_ti = np.sqrt(triangle_area)
+
+    # The matrix entry is the weight of the vertex / sqrt(triangle area)
+    weights = np.empty(triangles.shape, dtype = dtype)
+    weights[:, 0] = (x2 - x1) + y2 * 1j
+    weights[:, 1] = -x2 - y2 * 1j
+    weights[:, 2] = x1
+    weights /= sq_d_ti[:, None]
+
+    row = np.repeat(np.arange(len(triangles)), 3)
+    M = sp.sparse.coo_array((weights.ravel(), (row, triangles.ravel())), (len(triangles), len(vertices)), dtype = dtype)
     return M
@@ -1,14 +1,199 @@
 """
 This file contains the code for UV unwrapping using simple projections of coordinates on simple shapes.
+
+Unlike the conformal methods, these projections are closed-form, and are computed for all vertices at once. This makes them a cheap alternative for (parts of) turned and revolved shapes, for which the projection closely matches the surface.
+The projections onto a cylinder, sphere or torus contain an angular coordinate, which wraps around at a seam. The seam is placed in the largest angular gap of the mesh, such that partial revolutions are not cut at all. Triangles crossing the seam are then given their own copies of the vertices on one side of the seam, such that every triangle remains continuous in the UV mesh.
 """
+__all__ = ["axis_frame", "plane_frame", "find_seam", "project_cylinder", "project_sphere", "project_torus", "split_seams"]
+
+# Official module imports
+import math
+import numpy as np
+
+def axis_frame(axis: np.ndarray[np.float64]) -> np.ndarray[np.float64]:
+    """
+    Creates an orthonormal frame around the given axis.
+
+    Returns:
+    (3, 3) np.ndarray - The frame vectors [x_dir, y_dir, axis] as rows, such that points @ frame.T gives the local coordinates of the points.
+    """
+    axis = np.asarray(axis, dtype = np.float64)
+    axis = axis / np.linalg.norm(axis)
+    if math.hypot(axis[0], axis[1]) > 1e-12:
+        x_dir = np.array([-axis[1], axis[0], 0.]) / math.hypot(axis[0], axis[1])
+    else: # Purely vertical axis
+        x_dir = np.array([1., 0., 0.])
+    return np.array([x_dir, np.cross(axis, x_dir), axis])
+
+def plane_frame(mode: str, first: np.ndarray[np.float64], second: np.ndarray[np.float64], angle: float) -> np.ndarray[np.float64]:
+    """
+    Creates the u and v directions of a projection plane from its reference directions.
+
+    mode: str - The placement mode of the plane:
+        "0" (N + A): first is the normal of the plane, second is unused
+        "1" (N + U): first is the normal of the plane, second the preliminary u direction
+        "2" (U + V): first and second are the preliminary u and v directions
+    angle: float - The rotation (in radians) of the u and v directions within the plane
+
+    Returns:
+    (2, 3) np.ndarray - The directions [u_dir, v_dir] as rows, such that points @ frame.T gives the uv coordinates of the points.
+    """
+    first = np.asarray(first, dtype = np.float64)
+    if mode == "0":
+        x_dir, y_dir = axis_frame(first)[:2]
+    elif mode == "1":
+        x_dir = np.asarray(second, dtype = np.float64) / np.linalg.norm(second)
+        y_dir = np.cross(first, x_dir)
+        y_dir /= np.linalg.norm(y_dir)
+    elif mode == "2":
+        x_dir = first / np.linalg.norm(first)
+        y_dir = np.asarray(second, dtype = np.float64) / np.linalg.norm(second)
+    else:
+        raise ValueError(f"Unknown placement mode: {mode}")
+    return np.array([
+        math.cos(angle) * x_dir + math.sin(angle) * y_dir,
+        -math.sin(angle) * x_dir + math.cos(angle) * y_dir,
+        ])
+
+def find_seam(angles: np.ndarray[np.float64]) -> float:
+    """
+    Finds the angle at the centre of the largest gap between the given angles, which is the best location for the seam of an angular coordinate.
+    """
+    if not len(angles):
+        return math.pi
+    angles = np.sort(np.mod(angles, 2 * math.pi))
+    gaps = np.diff(np.append(angles, angles[0] + 2 * math.pi))
+    i = np.argmax(gaps)
+    return float(angles[i] + gaps[i] / 2)
+
+def _wrap(angles: np.ndarray[np.float64], seam: float) -> np.ndarray[np.float64]:
+    """
+    Wraps the angles to the range [-pi, pi), with the seam at the ends of the range.
+    """
+    return np.mod(angles - seam, 2 * math.pi) - math.pi
+
+def project_cylinder(points: np.ndarray[np.float64], origin: np.ndarray[np.float64], axis: np.ndarray[np.float64], seam: float = None) -> tuple:
+    """
+    Projects the points onto a cylinder around the given axis. The u coordinate is the arc length around the axis (at the mean radius of the points), the v coordinate the height along the axis.
+
+    seam: float - The angle of the seam w.r.t. the x_dir of the axis frame. If None, the seam is placed in the largest angular gap of the points.
+
+    Returns:
+    uv: (N, 2) np.ndarray - The projected coordinates
+    periods: tuple[float] - The period of the u and v coordinates, or 0 if the coordinate does not wrap around
+    singular: (N,) np.ndarray - Whether the u coordinate of the point is undefined, i.e. whether the point is on the axis
+    """
+    local = (np.asarray(points, dtype = np.float64).reshape((-1, 3)) - origin) @ axis_frame(axis).T
+    radius = np.hypot(local[:, 0], local[:, 1])
+    singular = radius <= 1e-9 * (radius.max() if len(radius) else 0.)
+    theta = np.arctan2(local[:, 1], local[:, 0])
+    if seam is None:
+        seam = find_seam(theta[~singular])
+    mean_radius = float(radius.mean()) if len(radius) else 0.
+    uv = np.column_stack([mean_radius * _wrap(theta, seam), local[:, 2]])
+    return uv, (2 * math.pi * mean_radius, 0.), singular
+
+def project_sphere(points: np.ndarray[np.float64], origin: np.ndarray[np.float64], axis: np.ndarray[np.float64], seam: float = None) -> tuple:
+    """
+    Projects the points onto a sphere around the given origin, using an equirectangular projection. The u coordinate is the longitude, the v coordinate the latitude w.r.t. the given (polar) axis, both as arc lengths at the mean radius of the points.
+
+    seam: float - The longitude of the seam w.r.t. the x_dir of the axis frame. If None, the seam is placed in the largest longitudinal gap of the points.
+
+    Returns:
+    uv: (N, 2) np.ndarray - The projected coordinates
+    periods: tuple[float] - The period of the u and v coordinates, or 0 if the coordinate does not wrap around
+    singular: (N,) np.ndarray - Whether the u coordinate of the point is undefined, i.e. whether the point is on one of the poles
+    """
+    local = (np.asarray(points, dtype = np.float64).reshape((-1, 3)) - origin) @ axis_frame(axis).T
+    radius = np.linalg.norm(local, axis = 1)
+    polar_radius = np.hypot(local[:, 0], local[:, 1])
+    singular = polar_radius <= 1e-9 * (radius.max() if len(radius) else 0.)
+    theta = np.arctan2(local[:, 1], local[:, 0])
+    if seam is None:
+        seam = find_seam(theta[~singular])
+    latitude = np.arctan2(local[:, 2], polar_radius)
+    mean_radius = float(radius.mean()) if len(radius) else 0.
+    uv = np.column_stack([mean_radius * _wrap(theta, seam), mean_radius * latitude])
+    return uv, (2 * math.pi * mean_radius, 0.), singular
+
+def project_torus(points: np.ndarray[np.float64], origin: np.ndarray[np.float64], axis: np.ndarray[np.float64], major_radius: float = None, seam: float = None, tube_seam: float = None) -> tuple:
+    """
+    Projects the points onto a torus around the given axis. The u coordinate is the arc length around the axis (at the major radius), the v coordinate the arc length around the tube (at the mean tube radius of the points).
+
+    major_radius: float - The distance from the axis to the centre of the tube. If None, the centre of the radial extent of the points is used.
+    seam: float - The angle of the seam around the axis, w.r.t. the x_dir of the axis frame. If None, the seam is placed in the largest angular gap of the points.
+    tube_seam: float - The angle of the seam around the tube, w.r.t. the outward radial direction. If None, the seam is placed in the largest angular gap of the points.
+
+    Returns:
+    uv: (N, 2) np.ndarray - The projected coordinates
+    periods: tuple[float] - The period of the u and v coordinates
+    singular: None - The projection has no singular points on the surface of a torus
+    """
+    local = (np.asarray(points, dtype = np.float64).reshape((-1, 3)) - origin) @ axis_frame(axis).T
+    radius = np.hypot(local[:, 0], local[:, 1])
+    if major_radius is None:
+        major_radius = float(radius.max() + radius.min()) / 2 if len(radius) else 0.
+    theta = np.arctan2(local[:, 1], local[:, 0])
+    if seam is None:
+        seam = find_seam(theta)
+    tube_radius = np.hypot(radius - major_radius, local[:, 2])
+    phi = np.arctan2(local[:, 2], radius - major_radius)
+    if tube_seam is None:
+        tube_seam = find_seam(phi)
+    mean_tube_radius = float(tube_radius.mean()) if len(tube_radius) else 0.
+    uv = np.column_stack([major_radius * _wrap(theta, seam), mean_tube_radius * _wrap(phi, tube_seam)])
+    return uv, (2 * math.pi * major_radius, 2 * math.pi * mean_tube_radius), None
+
+def split_seams(uv: np.ndarray[np.float64], triangles: np.ndarray[np.int32], periods: tuple[float], singular: np.ndarray[np.bool_] = None) -> tuple:
+    """
+    Cuts the mesh open along the seams of the wrapped coordinates, such that every triangle is continuous in uv space.
+
+    The wrapped coordinates must be centred around 0 (i.e. within [-period / 2, period / 2)). Triangles crossing a seam are detected by spanning more than half a period, after which their corners on the negative side of the seam are replaced by copies shifted by one period.
+    Additionally, every triangle corner at a singular point (e.g. the pole of a sphere) is given its own copy, with the u coordinate taken as the mean of the other corners of the triangle.
+    Vertices which are no longer used by any triangle are removed.
+
+    uv: (N, 2) array_like - The projected coordinates
+    triangles: (T, 3) array_like - The vertex indices of every triangle
+    periods: tuple[float] - The period of the u and v coordinates, or 0 if the coordinate does not wrap around
+    singular: (N,) array_like - Whether the u coordinate of the point is undefined. None if there are no singular points.
+
+    Returns:
+    vertex_map: (M,) np.ndarray - The original vertex index of every vertex of the split mesh
+    uv: (M, 2) np.ndarray - The uv coordinates of the split mesh
+    triangles: (T, 3) np.ndarray - The triangles of the split mesh
+    """
+    uv = np.asarray(uv, dtype = np.float64).reshape((-1, 2))
+    triangles = np.array(triangles, dtype = np.intp).reshape((-1, 3))
+    vertex_map = np.arange(len(uv))
 
-def project_plane(faceMesh, origin, normal, base_axis):
-    normal_axis = ...
-    base_axis = ... # The direction of the u-axis of the plane
-    ...
+    for i, period in enumerate(periods):
+        if not period:
+            continue
+        coords = uv[triangles, i]
+        crossing = coords.max(axis = 1) - coords.min(axis = 1) > period / 2
+        corners = crossing[:, None] & (coords < 0)
+        # Every vertex only needs a single copy, regardless of how many triangles cross the seam at that vertex
+        vertices, inverse = np.unique(triangles[corners], return_inverse = True)
+        triangles[corners] = len(uv) + inverse
+        shifted = uv[vertices]
+        shifted[:, i] += period
+        uv = np.concatenate([uv, shifted])
+        vertex_map = np.concatenate([vertex_map, vertex_map[vertices]])
 
-def project_cylinder(faceMesh):
-    ...
+    if singular is not None and np.any(singular):
+        corners = np.asarray(singular)[vertex_map][triangles]
+        regular = ~corners
+        rows = corners.any(axis = 1) & regular.any(axis = 1)
+        mean = (uv[triangles[rows], 0] * regular[rows]).sum(axis = 1) / regular[rows].sum(axis = 1)
+        # A copy for every singular corner, since the singular coordinate differs for every triangle
+        row_indices, corner_indices = np.nonzero(corners[rows])
+        copies = triangles[rows][row_indices, corner_indices]
+        new_uv = uv[copies]
+        new_uv[:, 0] = mean[row_indices]
+        triangles[np.flatnonzero(rows)[row_indices], corner_indices] = len(uv) + np.arange(len(copies))
+        uv = np.concatenate([uv, new_uv])
+        vertex_map = np.concatenate([vertex_map, vertex_map[copies]])
 
-def project_torus(faceMesh):
-    ...
+    # Remove the vertices which were replaced by a copy in all of their triangles
+    used, triangles = np.unique(triangles, return_inverse = True)
+    return vertex_map[used], uv[used], triangles.reshape((-1, 3))
@@ -0,0 +1,69 @@
+"""
+This file implements the spectral conformal parameterisation (scp) algorithm for UV unwrapping as laid out in the research paper by Mullen et al. (cited below).
+
+The conformal energy is the same as the one used by the least squares conformal mapping, but rather than requiring pinned vertices to fix the solution, the mesh boundary is constrained to have unit "size" which turns the minimisation into a generalised eigenvalue problem.
+
+Mullen, Patrick, et al. "Spectral conformal parameterization." Computer Graphics Forum. Vol. 27. No. 5. 2008. 1487-1494.
+"""
+__all__ = ["unwrap_scp"]
+
+import numpy as np
+import scipy as sp
+
+from Exceptions import *
+from .lscm import generate_coefficients
+
+def unwrap_scp(vertices: np.ndarray[np.float64], triangles: np.ndarray[np.int32]) -> list[tuple[float]]:
+    """
+    Unwraps the mesh using the spectral conformal parameterisation laid out by Mullen et al.
+    The resulting uv coordinates are scaled such that the uv area matches the mesh area.
+
+    vertices: (N, 3) array_like - The vertex positions of the tessellation
+    triangles: (T, 3) array_like - The vertex indices of every triangle in the tessellation
+    """
+    vertices = np.asarray(vertices, dtype = np.float64).reshape((-1, 3))
+    triangles = np.asarray(triangles, dtype = np.intp).reshape((-1, 3))
+    n = len(vertices)
+
+    boundary = boundary_vertices(triangles)
+    if not boundary.size:
+        raise UnderconstrainedMeshException("The mesh does not have a boundary. Closed meshes cannot be unwrapped without first splitting them along an edge.")
+    elif n < 3:
+        raise UnderconstrainedMeshException("The mesh does not have enough vertices to be unwrapped.")
+
+    # The conformal energy matrix, using the same coefficients as the lscm. The unknowns are ordered as [u_0, ..., u_n, v_0, ..., v_n]
+    M = generate_coefficients(vertices, triangles).tocsr()
+    A = sp.sparse.block_array([[M.real, -M.imag], [M.imag, M.real]], format = "csr")
+    L = (A.T @ A).tocsc()
+    # The boundary mass matrix, which only contains entries for the boundary vertices
+    mass = np.zeros((2 * n,), dtype = np.float64)
+    mass[boundary] = 1.
+    mass[boundary + n] = 1.
+    B = sp.sparse.diags_array(mass, format = "csc")
+
+    # The conformal energy is invariant to translations, resulting in two trivial (zero) eigenvalues. The desired solution
+    # is the eigenvector of the next eigenvalue, which is repeated due to its 90 degree rotated counterpart also being a
+    # solution. A small negative shift ensures L - sigma * B is non-singular, while still finding the smallest eigenvalues.
+    sigma = -1e-8 * L.diagonal().mean()
+    eigenvalues, eigenvectors = sp.sparse.linalg.eigsh(L, k = 3, M = B, sigma = sigma, which = "LM")
+    x = eigenvectors[:, np.argsort(eigenvalues)[-1]]
+
+    uv = x.reshape((2, n)).T
+    uv -= uv[boundary].mean(axis = 0)
+    # Rescale the uv coordinates to match the mesh area
+    e1 = uv[triangles[:, 1]] - uv[triangles[:, 0]]
+    e2 = uv[triangles[:, 2]] - uv[triangles[:, 0]]
+    uv_area = np.abs(e1[:, 0] * e2[:, 1] - e1[:, 1] * e2[:, 0]).sum() / 2
+    mesh_area = np.linalg.norm(np.cross(vertices[triangles[:, 1]] - vertices[triangles[:, 0]], vertices[triangles[:, 2]] - vertices[triangles[:, 0]]), axis = 1).sum() / 2
+    uv *= np.sqrt(mesh_area / uv_area)
+
+    return [(*i,) for i in uv]
+
+
+def boundary_vertices(triangles: np.ndarray[np.int32]) -> np.ndarray[np.intp]:
+    """
+    Returns the indices of all vertices that lie on the boundary of the mesh, i.e. that are part of an edge that is only used by a single triangle.
+    """
+    edges = np.sort(triangles[:, [[0, 1], [1, 2], [2, 0]]].reshape((-1, 2)), axis = 1)
+    edges, counts = np.unique(edges, axis = 0, return_counts = True)
+    return np.unique(edges[counts == 1])
@@ -0,0 +1,5 @@
+# The workbench modules import each other relative to the UVUnwrap directory, as FreeCAD adds it to sys.path
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "UVUnwrap"))
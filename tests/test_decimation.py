@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from unwrapping.decimation import decimate, prolongation_matrix, unique_edges
+from unwrapping.lscm import LSCMSystem
+
+def curved_grid(n):
+    """
+    A (non-developable) height field over the unit square, triangulated as an n by n grid of vertices.
+    """
+    x, y = np.meshgrid(np.linspace(0, 1, n), np.linspace(0, 1, n))
+    vertices = np.column_stack([x.ravel(), y.ravel(), 0.3 * np.sin(2 * x.ravel()) * np.cos(y.ravel())])
+    i, j = np.meshgrid(np.arange(n - 1), np.arange(n - 1))
+    a = (j * n + i).ravel()
+    triangles = np.concatenate([np.column_stack([a, a + 1, a + n + 1]), np.column_stack([a, a + n + 1, a + n])])
+    return vertices, triangles
+
+@pytest.fixture(scope = "module")
+def mesh():
+    return curved_grid(60)
+
+@pytest.fixture(scope = "module")
+def decimated(mesh):
+    vertices, triangles = mesh
+    return decimate(vertices, triangles, 400, locked = [1830])
+
+def test_decimate(mesh, decimated):
+    vertices, triangles = mesh
+    kept, coarse_triangles = decimated
+    edges, counts = unique_edges(triangles, len(vertices), return_counts = True)
+    boundary = np.unique(edges[counts == 1])
+    assert len(kept) == 400
+    assert np.all(np.isin(boundary, kept)) and 1830 in kept
+    # The simplified mesh is still a manifold disk, without any flipped triangles
+    coarse_edges, coarse_counts = unique_edges(coarse_triangles, len(kept), return_counts = True)
+    assert np.all(coarse_counts <= 2)
+    assert len(kept) - len(coarse_edges) + len(coarse_triangles) == 1
+    coarse = vertices[kept]
+    normals = np.cross(coarse[coarse_triangles[:, 1]] - coarse[coarse_triangles[:, 0]], coarse[coarse_triangles[:, 2]] - coarse[coarse_triangles[:, 0]])
+    assert np.all(normals[:, 2] > 0)
+
+def test_prolongation(mesh, decimated):
+    vertices, triangles = mesh
+    kept, coarse_triangles = decimated
+    prolongation = prolongation_matrix(vertices, kept, coarse_triangles)
+    assert np.allclose(prolongation.sum(axis = 1), 1)
+    assert np.allclose(prolongation[kept].toarray(), np.eye(len(kept)))
+    # The removed vertices are close to the simplified surface
+    assert np.abs(prolongation @ vertices[kept] - vertices).max() < 0.05
+
+def test_matches_full_solve(mesh, decimated):
+    vertices, triangles = mesh
+    kept, coarse_triangles = decimated
+    pins, pinned_uvs = [0, 59], [(0, 0), (1, 0)]
+    full = np.asarray(LSCMSystem(vertices, triangles, pins).solve(pins, pinned_uvs))
+    coarse = LSCMSystem(vertices[kept], coarse_triangles, np.searchsorted(kept, pins).tolist()).solve(np.searchsorted(kept, pins).tolist(), pinned_uvs)
+    uv = prolongation_matrix(vertices, kept, coarse_triangles) @ np.asarray(coarse)
+    assert uv.shape == full.shape
+    error = np.linalg.norm(uv - full, axis = 1) / np.ptp(full, axis = 0).max()
+    assert error.max() < 0.05 and error.mean() < 5e-3
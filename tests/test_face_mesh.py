@@ -0,0 +1,51 @@
+import pytest
+
+App = pytest.importorskip("FreeCAD")
+pytest.importorskip("FreeCADGui")
+import dialogs # Loaded before the objects, as the workbench does, since the object and dialog modules import each other
+from segmentation import fuse_edge
+from segmentation.FaceMesh import FaceMesh
+
+@pytest.fixture
+def document():
+    document = App.newDocument("FaceMeshTest")
+    yield document
+    App.closeDocument(document.Name)
+
+@pytest.fixture
+def warnings(monkeypatch):
+    warnings = []
+    monkeypatch.setattr(fuse_edge, "warn", warnings.append)
+    return warnings
+
+def shared_edge(shape, a, b):
+    """
+    The name of the edge shared by the faces a and b of the shape.
+    """
+    edges = [edge for edge in shape.getElement(a).Edges if any(edge.isSame(other) for other in shape.getElement(b).Edges)]
+    return next(f"Edge{i + 1}" for i, edge in enumerate(shape.Edges) if edge.isSame(edges[0]))
+
+def test_added_face_is_fused_topologically(document, warnings):
+    # Half a cylinder, such that the edges between the curved face and the caps are open arcs
+    cylinder = document.addObject("Part::Cylinder", "Cylinder")
+    cylinder.Angle = 180
+    document.recompute()
+    shape = cylinder.Shape
+    curved = next(f"Face{i + 1}" for i, face in enumerate(shape.Faces) if face.Surface.TypeId == "Part::GeomCylinder")
+    caps = [f"Face{i + 1}" for i, face in enumerate(shape.Faces) if face.Surface.TypeId == "Part::GeomPlane" and any(edge.Curve.TypeId == "Part::GeomCircle" for edge in face.Edges)]
+    feature = lambda element: (document.Name, cylinder.Name, element)
+
+    obj = document.addObject("Part::FeaturePython", "FaceMesh")
+    faceMesh = FaceMesh(obj, [feature(curved), feature(caps[0])], [feature(shared_edge(shape, curved, caps[0]))])
+    obj.UseCache = False
+    obj.SaveMesh = False
+    document.recompute()
+    assert len(faceMesh.fused_edge_array)
+
+    # Only the added face lacks a face block, but it must still be discretised consistently with the curved face that was meshed before
+    fused = len(faceMesh.fused_edge_array)
+    faceMesh.add_face(feature(caps[1]))
+    faceMesh.add_edge(feature(shared_edge(shape, curved, caps[1])))
+    document.recompute()
+    assert not warnings
+    assert len(faceMesh.fused_edge_array) > fused
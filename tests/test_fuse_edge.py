@@ -0,0 +1,93 @@
+import numpy as np
+import scipy as sp
+import pytest
+
+from segmentation import fuse_edge
+from segmentation.topology import MeshTopology
+
+# The edge along the x axis, from (0, 0, 0) to (1, 0, 0), as discretised by discretize_edge
+points = np.array([(0, 0, 0), (1, 0, 0)], dtype = np.float64)
+tolerance = 1e-6
+
+def strip(xs, side):
+    """
+    A strip of triangles on one side of the edge along the x axis, with edge nodes at the given x positions.
+    """
+    xs = np.asarray(xs, dtype = np.float64)
+    n = len(xs)
+    vertices = np.concatenate([np.column_stack([xs, np.zeros(n), np.zeros(n)]), np.column_stack([xs, np.full(n, side), np.zeros(n)])])
+    triangles = [(i, i + 1, n + i) for i in range(n - 1)] + [(i + 1, n + i + 1, n + i) for i in range(n - 1)]
+    return vertices, np.array(triangles)
+
+def combine(*strips):
+    offsets = np.cumsum([0, *(len(vertices) for vertices, triangles in strips)])
+    vertices = np.concatenate([vertices for vertices, triangles in strips])
+    triangles = np.concatenate([triangles + offset for (vertices, triangles), offset in zip(strips, offsets)])
+    return vertices, triangles
+
+def topological_pairs(vertices, triangles):
+    nodes, parameters = fuse_edge.get_edge_nodes(vertices, sp.spatial.cKDTree(vertices), points, tolerance)
+    return fuse_edge.get_topological_fuse_pairs(vertices, MeshTopology(len(vertices), triangles).boundary_edges, nodes, parameters, tolerance)
+
+def geometric_pairs(vertices, triangles):
+    edge_vertices = np.flatnonzero(np.abs(vertices[:, 1]) <= tolerance)
+    return fuse_edge.get_fuse_pairs(vertices, MeshTopology(len(vertices), triangles).edges, edge_vertices, tolerance)
+
+def sorted_pairs(pairs):
+    return sorted(map(tuple, np.sort(np.array(pairs, dtype = np.intp).reshape((-1, 2)), axis = 1).tolist()))
+
+def test_edge_nodes():
+    vertices = np.array([(0.5, 0, 0), (0.25, 1e-7, 0), (1, 0, 0), (0.5, 1e-3, 0), (1.5, 0, 0), (0, 0, 0)])
+    nodes, parameters = fuse_edge.get_edge_nodes(vertices, sp.spatial.cKDTree(vertices), points, tolerance)
+    # Only the vertices within the tolerance of the edge are nodes, at their position along the edge
+    order = np.argsort(nodes)
+    assert nodes[order].tolist() == [0, 1, 2, 5]
+    assert parameters[order] == pytest.approx([0.5, 0.25, 1, 0])
+
+def test_even_sides_are_paired_by_order():
+    xs = [0, 0.25, 0.5, 0.75, 1]
+    vertices, triangles = combine(strip(xs, -1), strip(xs, 1))
+    pairs = topological_pairs(vertices, triangles)
+    assert sorted_pairs(pairs) == [(i, 10 + i) for i in range(5)]
+    fused_vertices, fused_triangles = fuse_edge.merge_vertices(vertices, triangles, pairs)
+    assert len(fused_vertices) == 15
+    assert len(np.unique(np.sort(fused_triangles, axis = 1), axis = 0)) == len(triangles)
+
+def test_uneven_split_is_not_paired_topologically():
+    # One face on one side of the edge, two faces on the other side, split halfway along the edge
+    vertices, triangles = combine(strip([0, 0.25, 0.5, 0.75, 1], -1), strip([0, 0.25, 0.5], 1), strip([0.5, 0.75, 1], 1))
+    assert topological_pairs(vertices, triangles) is None
+
+def test_uneven_split_is_paired_geometrically():
+    vertices, triangles = combine(strip([0, 0.25, 0.5, 0.75, 1], -1), strip([0, 0.25, 0.5], 1), strip([0.5, 0.75, 1], 1))
+    fused_vertices, fused_triangles = fuse_edge.merge_vertices(vertices, triangles, geometric_pairs(vertices, triangles))
+    # All 11 edge nodes are fused into the 5 distinct nodes along the edge
+    assert len(fused_vertices) == 5 + 11
+    assert np.count_nonzero(fused_vertices[:, 1] == 0) == 5
+    assert len(np.unique(fused_triangles, axis = 0)) == len(triangles)
+
+def test_uneven_discretisation_is_paired_geometrically():
+    # Only the mesh edges present on both sides of the edge are fused, i.e. those between x = 0.5, 0.75 and 1
+    vertices, triangles = combine(strip([0, 0.5, 0.75, 1], -1), strip([0, 0.25, 0.5, 0.75, 1], 1))
+    assert set(sorted_pairs(geometric_pairs(vertices, triangles))) == {(1, 10), (2, 11), (3, 12)}
+
+def test_merge_vertices():
+    vertices = np.array([(0, 0, 0), (1, 0, 0), (0, 1, 0), (1, 0, 0), (0, 1, 0), (1, 1, 0), (5, 5, 5)], dtype = np.float64)
+    triangles = np.array([(0, 1, 2), (3, 5, 4)])
+    fused_vertices, fused_triangles, edges = fuse_edge.merge_vertices(vertices, triangles, [(1, 3), (4, 2)], [(3, 4)])
+    # The merged vertices and the unused vertex are removed, and the triangles and edges remapped onto the remaining vertices
+    assert len(fused_vertices) == 4
+    assert fused_vertices[fused_triangles].tolist() == [[[0, 0, 0], [1, 0, 0], [0, 1, 0]], [[1, 0, 0], [1, 1, 0], [0, 1, 0]]]
+    assert fused_vertices[edges].tolist() == [[[1, 0, 0], [0, 1, 0]]]
+
+def test_fallback_warning(monkeypatch):
+    Part = pytest.importorskip("Part")
+    warnings = []
+    monkeypatch.setattr(fuse_edge, "warn", warnings.append)
+    vertices, triangles = combine(strip([0, 0.25, 0.5, 0.75, 1], -1), strip([0, 0.25, 0.5], 1), strip([0.5, 0.75, 1], 1))
+    edge = Part.makeLine((0, 0, 0), (1, 0, 0))
+    pairs = fuse_edge.get_edge_fuse_pairs(vertices, sp.spatial.cKDTree(vertices), MeshTopology(len(vertices), triangles), edge, "Topology")
+    assert len(warnings) == 1 and isinstance(warnings[0], fuse_edge.FuseFallbackWarning)
+    assert sorted_pairs(pairs) == sorted_pairs(geometric_pairs(vertices, triangles))
+    fuse_edge.get_edge_fuse_pairs(vertices, sp.spatial.cKDTree(vertices), MeshTopology(len(vertices), triangles), edge, "Geometry")
+    assert len(warnings) == 1
@@ -0,0 +1,101 @@
+import math
+import numpy as np
+import scipy as sp
+import pytest
+
+from Exceptions import DegenerateMeshException
+from unwrapping import lscm
+from unwrapping.lscm import LSCMSystem, generate_coefficients
+
+def generate_coefficients_reference(vertices: np.ndarray[np.float64], triangles: np.ndarray[np.int32], dtype: np.dtype = np.complex128) -> sp.sparse.coo_array:
+    """
+    Generates the complex coefficient matrix M for the given tessellation, one triangle at a time.
+
+    This is the original per-triangle implementation, which is kept as a reference to verify the equivalence of generate_coefficients against.
+    """
+    row = []
+    col = []
+    vals = []
+
+    # Triangle-local axis system definition:
+    # A right handed axis system is used
+    # vertex[0] is at the origin of the axis system (0., 0.)
+    # vertex[1] lies on the +x axis
+    # vertex[2] lies on the +y side of the axis system
+
+    for i_triangle, triangle in enumerate(triangles):
+        triangle_vertices = [np.asarray(vertices[i_vertex], dtype = np.float64) for i_vertex in triangle]
+
+        x_dir = (triangle_vertices[1] - triangle_vertices[0]) / np.linalg.norm(triangle_vertices[1] - triangle_vertices[0])
+
+        x0 = y0 = y1 = 0. # By definition
+        x1 = np.linalg.norm(triangle_vertices[1] - triangle_vertices[0])
+        x2 = (triangle_vertices[2] - triangle_vertices[0]).dot(x_dir)
+        y2 = np.linalg.norm((triangle_vertices[2] - triangle_vertices[0]) - (x2 * x_dir))
+
+        triangle_area = abs(x1 * y2 / 2) # 1/2 * the cross product of vec(p0->p1) and vec(p0->p2) which reduces to this
+        sq_d_ti = math.sqrt(triangle_area)
+
+        w0 = (x2 - x1) + (y2 - y1) * 1j
+        w1 = (x0 - x2) + (y0 - y2) * 1j
+        w2 = (x1 - x0) + (y1 - y0) * 1j
+
+        for weight, vertex in zip([w0, w1, w2], triangle):
+            # The matrix entry is the weight of the vertex / sqrt(triangle area)
+            row.append(i_triangle)
+            col.append(vertex)
+            vals.append(weight / sq_d_ti)
+
+    M = sp.sparse.coo_array((vals, (row, col)), (len(triangles), len(vertices)), dtype = dtype)
+    return M
+
+def assert_equivalent(vertices, triangles):
+    M = generate_coefficients(vertices, triangles).toarray()
+    M_reference = generate_coefficients_reference(vertices, triangles).toarray()
+    assert np.abs(M - M_reference).max() <= 1e-12 * np.abs(M_reference).max()
+
+def test_random_mesh():
+    rng = np.random.default_rng(0)
+    vertices = rng.normal(size = (200, 3))
+    triangles = np.array([rng.choice(len(vertices), 3, replace = False) for i in range(500)])
+    assert_equivalent(vertices, triangles)
+
+def test_nearly_degenerate_triangle():
+    # A sliver triangle, with its third vertex almost on its first edge
+    vertices = np.array([(0, 0, 0), (1, 0, 0), (0, 1, 0), (0.5, 1e-9, 0)])
+    assert_equivalent(vertices, np.array([(0, 1, 2), (0, 1, 3)]))
+
+@pytest.mark.parametrize("vertices", [
+    [(0, 0, 0), (0, 0, 0), (0, 1, 0)], # Coincident vertices
+    [(0, 0, 0), (1, 0, 0), (2, 0, 0)], # Collinear vertices
+    ])
+def test_degenerate_triangle(vertices):
+    # The reference assembly divides by zero for these, the vectorised assembly rejects them
+    with pytest.raises(DegenerateMeshException):
+        generate_coefficients(np.array(vertices, dtype = np.float64), np.array([(0, 1, 2)]))
+
+def curved_grid(n):
+    x, y = np.meshgrid(np.linspace(0, 1, n), np.linspace(0, 1, n))
+    vertices = np.column_stack([x.ravel(), y.ravel(), 0.3 * np.sin(2 * x.ravel()) * np.cos(y.ravel())])
+    i, j = np.meshgrid(np.arange(n - 1), np.arange(n - 1))
+    a = (j * n + i).ravel()
+    return vertices, np.concatenate([np.column_stack([a, a + 1, a + n + 1]), np.column_stack([a, a + n + 1, a + n])])
+
+@pytest.fixture
+def warnings(monkeypatch):
+    warnings = []
+    monkeypatch.setattr(lscm, "warn", warnings.append)
+    return warnings
+
+@pytest.mark.parametrize("solver", ["LSQR", "CG"])
+def test_iterative_solvers(solver, warnings):
+    vertices, triangles = curved_grid(15)
+    pins, pinned_uvs = [0, 14], [(0, 0), (1, 0)]
+    system = LSCMSystem(vertices, triangles, pins)
+    direct = np.asarray(system.solve(pins, pinned_uvs))
+    uv = np.asarray(system.solve(pins, pinned_uvs, solver, tolerance = 1e-10, max_iterations = 2000))
+    assert not warnings
+    assert np.abs(uv - direct).max() < 1e-6
+    # An insufficient iteration budget is reported, rather than silently returning an inaccurate result
+    system.solve(pins, pinned_uvs, solver, max_iterations = 5)
+    assert len(warnings) == 1 and "5 iterations" in str(warnings[0])
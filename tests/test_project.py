@@ -0,0 +1,119 @@
+import math
+import numpy as np
+import pytest
+
+from unwrapping.project import plane_frame, find_seam, project_cylinder, project_sphere, project_torus, split_seams
+
+def periodic_grid(n, m, wrap_u, wrap_v):
+    """
+    The triangles of an n by m grid of vertices, which optionally wraps around in either direction.
+    """
+    triangles = []
+    for j in range(m if wrap_v else m - 1):
+        for i in range(n if wrap_u else n - 1):
+            a, b = j * n + i, j * n + (i + 1) % n
+            c, d = (j + 1) % m * n + i, (j + 1) % m * n + (i + 1) % n
+            triangles += [(a, b, d), (a, d, c)]
+    return np.array(triangles)
+
+def cylinder(radius, height, n, m, arc = 2 * math.pi):
+    full = arc >= 2 * math.pi
+    theta = np.linspace(0, arc, n, endpoint = not full)
+    theta, z = np.meshgrid(theta, np.linspace(0, height, m))
+    vertices = np.column_stack([radius * np.cos(theta.ravel()), radius * np.sin(theta.ravel()), z.ravel()])
+    return vertices, periodic_grid(n, m, full, False)
+
+def torus(major_radius, minor_radius, n, m):
+    theta, phi = np.meshgrid(np.linspace(0, 2 * math.pi, n, endpoint = False), np.linspace(0, 2 * math.pi, m, endpoint = False))
+    radius = major_radius + minor_radius * np.cos(phi.ravel())
+    vertices = np.column_stack([radius * np.cos(theta.ravel()), radius * np.sin(theta.ravel()), minor_radius * np.sin(phi.ravel())])
+    return vertices, periodic_grid(n, m, True, True)
+
+def signed_areas(uv, triangles):
+    a, b, c = uv[triangles[:, 0]], uv[triangles[:, 1]], uv[triangles[:, 2]]
+    return ((b - a)[:, 0] * (c - a)[:, 1] - (b - a)[:, 1] * (c - a)[:, 0]) / 2
+
+def surface_area(vertices, triangles):
+    a, b, c = vertices[triangles[:, 0]], vertices[triangles[:, 1]], vertices[triangles[:, 2]]
+    return np.linalg.norm(np.cross(b - a, c - a), axis = 1).sum() / 2
+
+origin, axis = np.zeros(3), np.array([0., 0., 1.])
+
+def test_plane_frame_normal_and_u():
+    # The first reference is the normal of the plane, the second the u direction
+    frame = plane_frame("1", [0, -2, 0], [3, 0, 0], 0)
+    assert frame == pytest.approx(np.array([[1, 0, 0], [0, 0, 1]]))
+    # The angle rotates the u and v directions within the plane
+    frame = plane_frame("1", [0, -2, 0], [3, 0, 0], math.pi / 2)
+    assert frame == pytest.approx(np.array([[0, 0, 1], [-1, 0, 0]]))
+    assert frame @ [0, -1, 0] == pytest.approx(np.zeros(2))
+
+def test_plane_frame_modes():
+    frame = plane_frame("0", [0, 0, 5], None, 0)
+    assert frame == pytest.approx(np.array([[1, 0, 0], [0, 1, 0]]))
+    frame = plane_frame("0", [1, 1, 0], None, math.radians(30))
+    assert frame @ frame.T == pytest.approx(np.eye(2))
+    assert frame @ [1, 1, 0] == pytest.approx(np.zeros(2))
+    frame = plane_frame("2", [0, 2, 0], [0, 0, 2], math.pi)
+    assert frame == pytest.approx(np.array([[0, -1, 0], [0, 0, -1]]))
+
+def test_find_seam():
+    assert find_seam(np.array([0., 0.5, 1.])) == pytest.approx(0.5 + math.pi)
+    # The largest gap may wrap around the -pi / pi boundary of the angles
+    assert math.cos(find_seam(np.array([-3., 3., 2.5]))) == pytest.approx(math.cos(-0.25), abs = 1e-9)
+
+def test_cylinder_partial_revolution_is_not_cut():
+    vertices, triangles = cylinder(2, 3, 40, 10, arc = 1.5 * math.pi)
+    uv, periods, singular = project_cylinder(vertices, origin, axis)
+    vertex_map, uv, split = split_seams(uv, triangles, periods, singular)
+    assert len(vertex_map) == len(vertices)
+    assert np.all(signed_areas(uv, split) > 0)
+    assert np.abs(signed_areas(uv, split)).sum() == pytest.approx(2 * 1.5 * math.pi * 3, rel = 1e-3)
+
+def test_cylinder_seam():
+    n, m = 36, 10
+    vertices, triangles = cylinder(2, 3, n, m)
+    # The seam lays between the columns of vertices at 50 and 60 degrees
+    uv, periods, singular = project_cylinder(vertices, origin, axis, seam = math.radians(55))
+    vertex_map, uv, split = split_seams(uv, triangles, periods, singular)
+    # Only the column of vertices just past the seam is duplicated, and shifted by one period to the end of the uv mesh
+    assert len(vertex_map) == len(vertices) + m
+    assert np.all(vertex_map[len(vertices):] % n == 6)
+    assert uv[:, 0].min() == pytest.approx(2 * math.radians(5 - 180))
+    assert uv[:, 0].max() == pytest.approx(2 * math.radians(5 + 180))
+    areas = signed_areas(uv, split)
+    assert np.all(areas > 0)
+    # The cylinder is developable, so the uv area matches the surface area (up to the chord error of the tessellation)
+    assert areas.sum() == pytest.approx(surface_area(vertices, triangles), rel = 1e-2)
+    assert areas.sum() == pytest.approx(2 * math.pi * 2 * 3, rel = 1e-2)
+
+def test_torus():
+    n, m = 48, 24
+    vertices, triangles = torus(5, 1, n, m)
+    uv, periods, singular = project_torus(vertices, origin, axis)
+    assert periods == pytest.approx((2 * math.pi * 5, 2 * math.pi))
+    vertex_map, uv, split = split_seams(uv, triangles, periods, singular)
+    # Cutting both seams opens the torus into a single rectangle
+    assert len(vertex_map) == (n + 1) * (m + 1)
+    areas = signed_areas(uv, split)
+    assert np.all(areas > 0) or np.all(areas < 0)
+    assert np.ptp(uv, axis = 0) == pytest.approx(periods, rel = 1e-9)
+    assert np.abs(areas).sum() == pytest.approx(4 * math.pi ** 2 * 5 * 1, rel = 2e-2)
+
+def test_sphere_poles():
+    # A uv sphere with a single vertex at either pole
+    n, m = 24, 12
+    theta, latitude = np.meshgrid(np.linspace(0, 2 * math.pi, n, endpoint = False), np.linspace(-math.pi / 2, math.pi / 2, m + 1)[1:-1])
+    rings = np.column_stack([np.cos(latitude.ravel()) * np.cos(theta.ravel()), np.cos(latitude.ravel()) * np.sin(theta.ravel()), np.sin(latitude.ravel())])
+    vertices = np.concatenate([rings, [(0, 0, -1), (0, 0, 1)]])
+    south, north = len(rings), len(rings) + 1
+    fans = [(south, (i + 1) % n, i) for i in range(n)] + [(north, (m - 2) * n + i, (m - 2) * n + (i + 1) % n) for i in range(n)]
+    triangles = np.concatenate([periodic_grid(n, m - 1, True, False), fans])
+    uv, periods, singular = project_sphere(vertices, origin, axis)
+    assert np.flatnonzero(singular).tolist() == [south, north]
+    vertex_map, uv, split = split_seams(uv, triangles, periods, singular)
+    # Every pole triangle has its own copy of the pole, at the longitude of the triangle
+    assert np.count_nonzero(np.isin(vertex_map, [south, north])) == 2 * n
+    assert len(split) == len(triangles)
+    assert np.all(np.ptp(uv[split, 0], axis = 1) < periods[0] / 2)
+    assert np.all(signed_areas(uv, split) > 0)
@@ -0,0 +1,23 @@
+import numpy as np
+
+from segmentation.topology import MeshTopology
+
+def boundary_edges(topology):
+    """
+    The directed boundary edges traced by the boundary loops, including the edge back to the end of every loop.
+    """
+    return sorted((int(a), int(b)) for loop, end in zip(topology.boundary_loops, topology.boundary_loop_ends) for a, b in zip(loop, [*loop[1:], end]))
+
+def test_closed_boundary_loop():
+    # A square of two triangles
+    topology = MeshTopology(4, [(0, 1, 2), (0, 2, 3)])
+    assert len(topology.boundary_loops) == 1
+    assert topology.boundary_loop_ends.tolist() == [topology.boundary_loops[0][0]]
+    assert boundary_edges(topology) == [(0, 1), (1, 2), (2, 3), (3, 0)]
+
+def test_pinched_boundary():
+    # Two triangles sharing only vertex 0, such that their boundary loops touch at vertex 0
+    triangles = [(1, 2, 0), (0, 3, 4)]
+    topology = MeshTopology(5, triangles)
+    # The loops may be split at vertex 0, but together they trace every boundary half-edge exactly once
+    assert boundary_edges(topology) == sorted((a, b) for triangle in triangles for a, b in zip(triangle, [*triangle[1:], triangle[0]]))
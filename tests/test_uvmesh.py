@@ -0,0 +1,22 @@
+import types
+import numpy as np
+import pytest
+
+pytest.importorskip("FreeCAD")
+pytest.importorskip("FreeCADGui")
+import dialogs # Loaded before the objects, as the workbench does, since the object and dialog modules import each other
+from segmentation.topology import MeshTopology
+from unwrapping.UVMesh import UVMesh
+
+def test_draw_pinched_boundary():
+    # Two triangles sharing only vertex 0, such that their boundary loops touch at vertex 0
+    uv = np.array([(0, 0), (1, 0), (1, 1), (-1, 0), (-1, -1)], dtype = np.float64)
+    triangles = [(1, 2, 0), (0, 3, 4)]
+    uvMesh = types.SimpleNamespace(uv = uv, topology = MeshTopology(len(uv), triangles), fused_edge_array = np.empty((0, 2), dtype = np.int32))
+    drawn = set()
+    for coords, interior in UVMesh.draw_edges.fget(uvMesh):
+        assert not interior
+        drawn |= {(tuple(a), tuple(b)) for a, b in zip(coords[:-1], coords[1:])}
+    # Only the edges of the triangles are drawn, without any segments closing a loop that was split at the pinched vertex
+    expected = {(tuple(uv[a]), tuple(uv[b])) for triangle in triangles for a, b in zip(triangle, [*triangle[1:], triangle[0]])}
+    assert drawn == expected
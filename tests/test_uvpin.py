@@ -0,0 +1,36 @@
+import types
+import numpy as np
+import pytest
+
+App = pytest.importorskip("FreeCAD")
+pytest.importorskip("FreeCADGui")
+import dialogs # Loaded before the objects, as the workbench does, since the object and dialog modules import each other
+from segmentation.topology import MeshTopology
+from unwrapping.UVPin import coincident_vertices
+
+def face_mesh(vertices, triangles):
+    vertices = np.array(vertices, dtype = np.float64)
+    triangles = np.array(triangles, dtype = np.int32)
+    return types.SimpleNamespace(vertex_array = vertices, triangle_array = triangles, topology = MeshTopology(len(vertices), triangles))
+
+@pytest.fixture
+def mesh():
+    # Two triangles on either side of a (not fused) edge through the origin, and an isolated vertex at the origin
+    return face_mesh(
+        [(0, 0, 0), (1, 0, 0), (0, 1, 0), (0, 0, 0), (0, -1, 0), (1, 0, 0), (0, 0, 0), (0.0005, 0, 0), (0, 0, 0.01)],
+        [(0, 1, 2), (3, 4, 5), (7, 1, 8)],
+        )
+
+def test_coincident_vertices(mesh):
+    coincidents = coincident_vertices(mesh, App.Base.Vector(0, 0, 0))
+    # The isolated vertex 6 is skipped. Vertex 7 is within the tolerance, vertex 8 is not.
+    assert sorted(coincidents) == [0, 3, 7]
+    # The vertices are biased towards the side of the triangle using them
+    assert coincidents[0].y > 0 and coincidents[3].y < 0
+
+def test_coincident_vertices_ignored(mesh):
+    assert sorted(coincident_vertices(mesh, App.Base.Vector(0, 0, 0), ignored = [0], tolerance = 1e-4)) == [3]
+
+def test_isolated_vertex_is_skipped(mesh):
+    # Only the isolated vertex remains, which must not be given the centroid of an arbitrary triangle
+    assert coincident_vertices(mesh, App.Base.Vector(0, 0, 0), ignored = [0, 3, 7]) == {}